@@ -0,0 +1,65 @@
+"""
+Benchmark for the block render cache.
+
+Generates a long page (see corpus.py), renders it once to warm a BlockCache, then edits one block in the
+middle and times rendering the edited page with the cache against rendering it without one.
+
+Usage:
+    python3 benchmarks/bench_block_cache.py [--blocks 10000] [--repeat 5]
+"""
+import io
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from corpus import generate_page
+from block_cache import BlockCache
+from block_markdown import markdown_to_html_node
+
+def build_blocks(block_count: int) -> list[str]:
+    """
+    Generate the blocks of a long page from generated pages, keeping only the first page's title.
+    """
+    blocks = []
+    i = 0
+    while len(blocks) < block_count:
+        page_blocks = generate_page(random.Random(i)).strip().split("\n\n")
+        blocks.extend(page_blocks if i == 0 else page_blocks[1:])
+        i += 1
+    return blocks[:block_count]
+
+def main():
+    parser = argparse.ArgumentParser(description="Time re-rendering a long page after a one-block edit")
+    parser.add_argument("--blocks", type=int, default=10000, help="number of blocks on the page")
+    parser.add_argument("--repeat", type=int, default=5, help="number of edits to time")
+    args = parser.parse_args()
+
+    blocks = build_blocks(args.blocks)
+    cache = BlockCache()
+    cache.write_html("\n\n".join(blocks), io.StringIO())
+    print(f"page: {len(blocks)} blocks, {len(chr(10).join(blocks)) / (1024 * 1024):.1f} MB")
+
+    uncached = []
+    cached = []
+    for edit in range(args.repeat):
+        blocks[len(blocks) // 2] = f"An edited paragraph, version {edit}."
+        markdown = "\n\n".join(blocks)
+
+        start = time.perf_counter()
+        markdown_to_html_node(markdown).write_html(io.StringIO())
+        uncached.append(time.perf_counter() - start)
+
+        fp = io.StringIO()
+        start = time.perf_counter()
+        cache.write_html(markdown, fp)
+        cached.append(time.perf_counter() - start)
+
+    print(f"without cache: {min(uncached) * 1000:8.1f} ms")
+    print(f"with cache:    {min(cached) * 1000:8.1f} ms   ({min(uncached) / min(cached):.0f}x faster)")
+
+if __name__ == "__main__":
+    main()
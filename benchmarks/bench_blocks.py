@@ -0,0 +1,80 @@
+"""
+Benchmark for block-level markdown parsing.
+
+Times the single-pass line scanner (iter_blocks) against the old approach of splitting the document on
+blank lines and re-splitting every block once per block type check. Inline parsing is left out, so only
+block splitting and classification are measured.
+
+Usage:
+    python3 benchmarks/bench_blocks.py [--blocks 20000] [--repeat 5]
+"""
+import os
+import re
+import sys
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from block_markdown import iter_blocks
+from run import time_runs
+
+def build_document(block_count: int) -> str:
+    blocks = []
+    for i in range(block_count):
+        match i % 6:
+            case 0:
+                blocks.append(f"## Section {i}")
+            case 1:
+                blocks.append("\n".join(f"Paragraph {i} line {j} with some words in it." for j in range(4)))
+            case 2:
+                blocks.append("\n".join(f"{'  ' * (j % 3)}* item {j}" for j in range(8)))
+            case 3:
+                blocks.append("\n".join(f"{j + 1}. step {j}" for j in range(8)))
+            case 4:
+                blocks.append("\n".join(f"> quoted line {j}" for j in range(4)))
+            case 5:
+                blocks.append("```\n" + "\n".join(f"line_{j} = {j}" for j in range(6)) + "\n```")
+    return "\n\n".join(blocks)
+
+def legacy_blocks(markdown: str) -> list[tuple[str, list[str]]]:
+    """
+    The block parser before the line scanner: split on blank lines, then re-split each block per check.
+    """
+    blocks = [block.strip() for block in markdown.split("\n\n") if block != ""]
+    result = []
+    for block in blocks:
+        if block.startswith("#"):
+            block_type = "heading"
+        elif block.startswith("```") and block.endswith("```"):
+            block_type = "code"
+        elif all(line.startswith(">") for line in block.split("\n")):
+            block_type = "quote"
+        elif all(line.lstrip().startswith("* ") for line in block.split("\n")):
+            block_type = "unordered_list"
+        elif all(line.lstrip().startswith("- ") for line in block.split("\n")):
+            block_type = "unordered_list"
+        elif all(line.lstrip().startswith("+ ") for line in block.split("\n")):
+            block_type = "unordered_list"
+        elif all(re.match(r'^\d+\.\s', line.lstrip()) for line in block.split("\n")):
+            block_type = "ordered_list"
+        else:
+            block_type = "paragraph"
+        result.append((block_type, block.split("\n"))) # The list builders split the block once more
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark block-level markdown parsing")
+    parser.add_argument("--blocks", type=int, default=20000, help="blocks in the generated document")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per measurement, the best one is reported")
+    args = parser.parse_args()
+
+    markdown = build_document(args.blocks)
+    elapsed = min(time_runs(lambda: list(iter_blocks(markdown.split("\n"))), args.repeat))
+    legacy_elapsed = min(time_runs(lambda: legacy_blocks(markdown), args.repeat))
+
+    print(f"{len(markdown) / (1024 * 1024):.1f} MB, {args.blocks} blocks")
+    print(f"line scanner: {elapsed:.3f}s")
+    print(f"legacy:       {legacy_elapsed:.3f}s ({legacy_elapsed / elapsed:.1f}x slower)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Benchmark for copying static assets.
+
+Generates a tree of many small files and a few large ones, then times a cold copy with each copy strategy,
+serially and with the thread pool, plus shutil.copytree as the baseline the project used to run.
+
+Usage:
+    python3 benchmarks/bench_copy.py [--small 10000] [--large 3] [--large-mb 50]
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from copy_files import mirror_files, COPY_STRATEGIES
+
+def build_tree(root: str, small: int, large: int, large_mb: int):
+    for i in range(small):
+        path = os.path.join(root, f"dir{i % 100}", f"file{i}.css")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(f"/* asset {i} */\n" + "body { margin: 0; }\n" * 20)
+    block = os.urandom(1024 * 1024)
+    for i in range(large):
+        with open(os.path.join(root, f"large{i}.bin"), "wb") as f:
+            for _ in range(large_mb):
+                f.write(block)
+
+def time_copy(copy) -> float:
+    start = time.perf_counter()
+    copy()
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Time copying static assets with each copy strategy")
+    parser.add_argument("--small", type=int, default=10000, help="number of small files")
+    parser.add_argument("--large", type=int, default=3, help="number of large files")
+    parser.add_argument("--large-mb", type=int, default=50, help="size of each large file in MB")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src_dir = os.path.join(tmp, "static")
+        build_tree(src_dir, args.small, args.large, args.large_mb)
+
+        def run(name, copy):
+            dest_dir = os.path.join(tmp, "public")
+            if os.path.exists(dest_dir):
+                shutil.rmtree(dest_dir)
+            os.makedirs(dest_dir)
+            print(f"{name:<20} {time_copy(lambda: copy(dest_dir)):.3f}s")
+
+        run("copytree", lambda dest_dir: shutil.copytree(src_dir, dest_dir, dirs_exist_ok=True))
+        for strategy in COPY_STRATEGIES:
+            run(f"{strategy} serial", lambda dest_dir: mirror_files(src_dir, dest_dir, strategy=strategy, workers=1))
+            run(f"{strategy} threads", lambda dest_dir: mirror_files(src_dir, dest_dir, strategy=strategy))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Benchmark for inline markdown parsing.
+
+Times text_to_textnodes, which scans a paragraph once, against the old pipeline of five split_nodes_*
+passes on link-heavy and mixed paragraphs.
+
+Usage:
+    python3 benchmarks/bench_inline.py [--paragraphs 2000] [--repeat 5]
+"""
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from inline_markdown import split_nodes_delimiter, split_nodes_link, split_nodes_image, text_to_textnodes
+from textnode import TextNode, TextType
+from run import time_runs
+
+def link_heavy_paragraph(i: int) -> str:
+    return " ".join(f"see [page {i}-{j}](/docs/{i}/{j}) and ![figure {j}](/images/{i}-{j}.png)" for j in range(20))
+
+def mixed_paragraph(i: int) -> str:
+    return " ".join(f"some **bold {j}** text, *italic {j}*, `code {j}` and a [link](/p/{i}/{j})." for j in range(10))
+
+def legacy_text_to_textnodes(text: str) -> list[TextNode]:
+    """
+    The inline parser before the single-pass scanner: five passes over the node list.
+    """
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "*", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    nodes = split_nodes_link(nodes)
+    nodes = split_nodes_image(nodes)
+    return nodes
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark inline markdown parsing")
+    parser.add_argument("--paragraphs", type=int, default=2000, help="paragraphs per corpus")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per measurement, the best one is reported")
+    args = parser.parse_args()
+
+    corpora = {
+        "link-heavy": [link_heavy_paragraph(i) for i in range(args.paragraphs)],
+        "mixed": [mixed_paragraph(i) for i in range(args.paragraphs)],
+    }
+
+    print(f"{'corpus':>12} {'single-pass':>12} {'five-pass':>12} {'speedup':>8}")
+    for name, paragraphs in corpora.items():
+        elapsed = min(time_runs(lambda: [text_to_textnodes(paragraph) for paragraph in paragraphs], args.repeat))
+        legacy_elapsed = min(time_runs(lambda: [legacy_text_to_textnodes(paragraph) for paragraph in paragraphs], args.repeat))
+        print(f"{name:>12} {elapsed:>11.3f}s {legacy_elapsed:>11.3f}s {legacy_elapsed / elapsed:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Stress benchmark for nested list building.
+
+Times build_list_structure on lists of up to 100k items in several shapes, doubling the item count at each
+step, so time per item should stay flat. The recursive builder the project used before is timed alongside
+for comparison. It runs out of stack on the deep staircase, where each item is nested one level deeper
+than the one before.
+
+Usage:
+    python3 benchmarks/bench_lists.py [--items 100000] [--depth 10000]
+"""
+import os
+import sys
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from block_markdown import build_list_structure, text_to_children
+from parentnode import ParentNode
+from run import time_runs
+
+def list_shapes(count: int, depth: int) -> dict:
+    """
+    Build (text, indent) items for each list shape.
+    """
+    rng = random.Random(count)
+    walk = []
+    level = 0
+    for i in range(count):
+        level = max(0, min(50, level + rng.choice((-1, 0, 1))))
+        walk.append((f"item {i}", level))
+    return {
+        "flat": [(f"item {i}", 0) for i in range(count)],
+        "sawtooth": [(f"item {i}", i % 8) for i in range(count)],
+        "random walk": walk,
+        "staircase": [(f"item {i}", i % depth) for i in range(count)],
+    }
+
+def legacy_build_list_structure(processed_items, list_tag="ul"):
+    """
+    The builder before the explicit stack: one recursive call per indent level.
+    """
+    nodes_list = [(ParentNode("li", text_to_children(text), None), indent_level) for text, indent_level in processed_items]
+    return legacy_process_at_level(nodes_list, 0, 0, list_tag)[0]
+
+def legacy_process_at_level(nodes_list, start_index, current_indent, list_tag):
+    if start_index >= len(nodes_list):
+        return None, start_index
+    current_node, indent = nodes_list[start_index]
+    if indent < current_indent:
+        return None, start_index
+    nodes_at_level = [current_node]
+    next_index = start_index + 1
+    while next_index < len(nodes_list):
+        next_node, next_indent = nodes_list[next_index]
+        if next_indent == current_indent:
+            nodes_at_level.append(next_node)
+            next_index += 1
+        elif next_indent > current_indent:
+            nested_nodes, next_index = legacy_process_at_level(nodes_list, next_index, next_indent, list_tag)
+            if nested_nodes is not None:
+                nodes_at_level[-1].children.append(nested_nodes)
+        else:
+            break
+    return ParentNode(list_tag, nodes_at_level, None), next_index
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark nested list building")
+    parser.add_argument("--items", type=int, default=100000, help="number of items in the largest list")
+    parser.add_argument("--depth", type=int, default=10000, help="nesting depth the staircase climbs to before starting over")
+    args = parser.parse_args()
+
+    print(f"{'shape':<12} {'items':>8} {'stack':>9} {'us/item':>8} {'recursive':>10} {'us/item':>8}")
+    for fraction in (0.125, 0.25, 0.5, 1.0):
+        count = int(args.items * fraction)
+        for shape, items in list_shapes(count, args.depth).items():
+            elapsed = time_runs(lambda: build_list_structure(items), 1)[0]
+            try:
+                legacy = time_runs(lambda: legacy_build_list_structure(items), 1)[0]
+                legacy_text = f"{legacy:>9.3f}s {legacy / count * 1e6:>8.2f}"
+            except RecursionError:
+                legacy_text = f"{'RecursionError':>19}"
+            print(f"{shape:<12} {count:>8} {elapsed:>8.3f}s {elapsed / count * 1e6:>8.2f} {legacy_text}")
+
+if __name__ == "__main__":
+    main()
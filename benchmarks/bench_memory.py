@@ -0,0 +1,64 @@
+"""
+Memory benchmark for the node classes.
+
+Parses a generated page of about 100k words with markdown_to_html_node while tracemalloc is running, and
+reports the memory held by the finished node tree and the peak during parsing.
+
+Usage:
+    python3 benchmarks/bench_memory.py [--words 100000]
+"""
+import os
+import sys
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from block_markdown import markdown_to_html_node
+from parentnode import ParentNode
+
+def build_markdown(word_count: int) -> str:
+    blocks = []
+    words = 0
+    i = 0
+    while words < word_count:
+        match i % 4:
+            case 0:
+                blocks.append(f"## Section {i}")
+                words += 2
+            case 1:
+                blocks.append(" ".join(f"word{j} **bold{j}** *italic{j}* `code{j}` [link{j}](/p/{j})" for j in range(10)))
+                words += 50
+            case 2:
+                blocks.append("\n".join(f"* item {j} with **bold** text" for j in range(10)))
+                words += 50
+            case 3:
+                blocks.append("\n".join(f"> quote {j} with a [link](/q/{j})" for j in range(5)))
+                words += 25
+        i += 1
+    return "\n\n".join(blocks)
+
+def count_nodes(node) -> int:
+    if isinstance(node, ParentNode):
+        return 1 + sum(count_nodes(child) for child in node.children)
+    return 1
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure memory used by parsed node trees")
+    parser.add_argument("--words", type=int, default=100000, help="approximate number of words on the page")
+    args = parser.parse_args()
+
+    markdown = build_markdown(args.words)
+
+    tracemalloc.start()
+    root = markdown_to_html_node(markdown)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"markdown:  {len(markdown) / (1024 * 1024):.1f} MB")
+    print(f"nodes:     {count_nodes(root)}")
+    print(f"tree size: {current / (1024 * 1024):.1f} MB")
+    print(f"peak:      {peak / (1024 * 1024):.1f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark for HTMLNode rendering.
+
+Builds node trees of increasing size, up to a 50 MB document by default, and times ParentNode.to_html on
+each of them. Time per MB should stay flat as the document grows. The old renderer, which concatenated
+strings at every level of the tree, is timed alongside for comparison.
+
+Usage:
+    python3 benchmarks/bench_render.py [--size-mb 50] [--depth 32]
+"""
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from leafnode import LeafNode
+from parentnode import ParentNode
+from run import time_runs
+
+def build_document(size_bytes: int, depth: int) -> ParentNode:
+    """
+    Build a tree of nested sections, each holding paragraphs with bold, link and plain text leaves,
+    until the rendered document reaches roughly size_bytes.
+    """
+    paragraph_size = len(build_paragraph(0).to_html())
+    paragraphs_per_section = 20
+    section_count = max(1, size_bytes // (paragraph_size * paragraphs_per_section))
+
+    sections = []
+    for i in range(section_count):
+        node = ParentNode("section", [build_paragraph(i * paragraphs_per_section + j) for j in range(paragraphs_per_section)], {"class": "leaf"})
+        for level in range(depth):
+            node = ParentNode("div", [node], {"class": f"level-{level}"})
+        sections.append(node)
+
+    return ParentNode("div", sections, None)
+
+def build_paragraph(i: int) -> ParentNode:
+    return ParentNode("p", [
+        LeafNode(None, f"Paragraph {i} has some plain text, ", None),
+        LeafNode("b", "a bold run", None),
+        LeafNode(None, ", and ", None),
+        LeafNode("a", "a link", {"href": f"/pages/{i}"}),
+        LeafNode(None, " before the end of the sentence.", None),
+    ], None)
+
+def legacy_to_html(node) -> str:
+    """
+    The renderer before the shared fragment buffer: every parent concatenates its children's strings.
+    """
+    if isinstance(node, LeafNode):
+        return node.to_html()
+    output_string = ""
+    for child in node.children:
+        output_string += legacy_to_html(child)
+    props_string = ""
+    for key in node.props:
+        props_string += f" {key}=\"{node.props[key]}\""
+    return f"<{node.tag}{props_string}>{output_string}</{node.tag}>"
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTMLNode rendering")
+    parser.add_argument("--size-mb", type=float, default=50, help="size of the largest generated document")
+    parser.add_argument("--depth", type=int, default=32, help="nesting depth of every section")
+    args = parser.parse_args()
+
+    print(f"{'size':>10} {'to_html':>10} {'s/MB':>8} {'legacy':>10} {'s/MB':>8}")
+    for fraction in (0.125, 0.25, 0.5, 1.0):
+        root = build_document(int(args.size_mb * fraction * 1024 * 1024), args.depth)
+
+        elapsed = time_runs(root.to_html, 1)[0]
+        legacy_elapsed = time_runs(lambda: legacy_to_html(root), 1)[0]
+        html = root.to_html()
+        if html != legacy_to_html(root):
+            raise AssertionError("to_html output differs from the legacy renderer")
+
+        size_mb = len(html) / (1024 * 1024)
+        print(f"{size_mb:>8.1f}MB {elapsed:>9.3f}s {elapsed / size_mb:>8.4f} {legacy_elapsed:>9.3f}s {legacy_elapsed / size_mb:>8.4f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark for the build-time search index.
+
+Writes a generated corpus (see corpus.py) and times a full build of it without an index and with one,
+whose difference is the cost of indexing, since the words are collected while the pages are rendered.
+Then times an incremental build after editing one page, and reports the size of the index file next to
+a plain JSON encoding of the same postings.
+
+Usage:
+    python3 benchmarks/bench_search.py [--pages 2000] [--workers 1]
+"""
+import os
+import sys
+import gzip
+import json
+import time
+import argparse
+import tempfile
+import contextlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from corpus import write_corpus, add_corpus_arguments, corpus_options
+from build import build_site
+from search_index import SEARCH_INDEX_NAME, SearchIndex
+
+TEMPLATE = "<!DOCTYPE html><html><head><title>{{ Title }}</title></head><body>{{ Content }}</body></html>"
+
+def json_size(index) -> int:
+    """
+    Size of the index as compact JSON, with the postings of each word as [id, count] pairs.
+    """
+    words = {}
+    for word in list(index.encoded) + list(index.postings):
+        ids, counts = index.get_postings(word)
+        words[word] = [[doc_id, count] for doc_id, count in zip(ids, counts)]
+    return len(json.dumps({"docs": index.docs, "words": words}, separators=(",", ":")).encode())
+
+def main():
+    parser = argparse.ArgumentParser(description="Time building and updating the search index")
+    add_corpus_arguments(parser)
+    parser.add_argument("--workers", type=int, default=1, help="worker processes rendering pages")
+    parser.set_defaults(pages=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        content_dir = os.path.join(tmp, "content")
+        public_dir = os.path.join(tmp, "public")
+        static_dir = os.path.join(tmp, "static")
+        template_path = os.path.join(tmp, "template.html")
+        os.makedirs(static_dir)
+        with open(template_path, "w") as template_file:
+            template_file.write(TEMPLATE)
+        paths = write_corpus(content_dir, **corpus_options(args))
+        markdown_size = sum(os.path.getsize(path) for path in paths)
+
+        def timed_build(**kwargs):
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(None):
+                build_site(static_dir, content_dir, template_path, public_dir, workers=args.workers, **kwargs)
+            return time.perf_counter() - start
+
+        plain_time = timed_build(full=True)
+        full_time = timed_build(full=True, search=True)
+
+        index_path = os.path.join(public_dir, SEARCH_INDEX_NAME)
+        with open(index_path, "rb") as index_file:
+            data = index_file.read()
+        index = SearchIndex.decode(data)
+        postings = sum(len(ids) for ids, _ in map(index.get_postings, list(index.encoded) + list(index.postings)))
+
+        # Edit one page and build again, which renders and indexes only that page
+        edited = paths[len(paths) // 2]
+        with open(edited, "a") as md_file:
+            md_file.write("\n\nAn edited paragraph about zyzzyva.\n")
+        rel_path = os.path.relpath(edited, content_dir)
+        update_time = timed_build(search=True)
+        with open(index_path, "rb") as index_file:
+            index = SearchIndex.decode(index_file.read())
+        assert index.search("zyzzyva")[0][0].endswith(rel_path[:-len(".md")] + ".html")
+
+        print(f"corpus: {len(paths)} pages, {markdown_size / (1024 * 1024):.1f} MB of markdown, {len(index.postings) + len(index.encoded)} words, {postings} postings")
+        print(f"full build:   {plain_time * 1000:8.0f} ms without the index")
+        print(f"              {full_time * 1000:8.0f} ms with it ({(full_time - plain_time) * 1000:+.0f} ms)")
+        print(f"one-page edit:{update_time * 1000:8.0f} ms")
+        print(f"index file:   {len(data) / 1024:8.0f} KB   ({len(gzip.compress(data)) / 1024:.0f} KB gzipped)")
+        print(f"as JSON:      {json_size(index) / 1024:8.0f} KB")
+
+if __name__ == "__main__":
+    main()
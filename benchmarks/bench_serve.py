@@ -0,0 +1,109 @@
+"""
+Load test for the dev server.
+
+Serves a generated site with the in-memory SiteServer and with the stock http.server, then opens many
+concurrent client connections that each fetch pages in a loop, and reports throughput, latency and errors.
+Half of the in-memory requests are conditional, as a browser revalidating its cache would send.
+
+Usage:
+    python3 benchmarks/bench_serve.py [--clients 300] [--requests 20] [--pages 500]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+import functools
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from serve import SiteStore, start_server
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+def build_site(public_dir: str, pages: int):
+    for i in range(pages):
+        path = os.path.join(public_dir, f"section{i % 10}", f"page{i}.html")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(f"<html><body><h1>Page {i}</h1>" + "<p>Some text on the page.</p>" * 200 + "</body></html>")
+
+def run_clients(port: int, paths: list[str], clients: int, requests: int, conditional: bool):
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def client(index):
+        etags = {}
+        times = []
+        failed = 0
+        connection = http.client.HTTPConnection("localhost", port, timeout=30)
+        for i in range(requests):
+            path = paths[(index * requests + i) % len(paths)]
+            headers = {"If-None-Match": etags[path]} if conditional and path in etags else {}
+            start = time.perf_counter()
+            try:
+                connection.request("GET", path, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                if response.status not in (200, 304):
+                    failed += 1
+                if response.getheader("ETag"):
+                    etags[path] = response.getheader("ETag")
+                if response.getheader("Connection", "").lower() == "close" or response.version == 10:
+                    connection.close()
+                    connection = http.client.HTTPConnection("localhost", port, timeout=30)
+            except OSError:
+                failed += 1
+                connection.close()
+                connection = http.client.HTTPConnection("localhost", port, timeout=30)
+            times.append(time.perf_counter() - start)
+        connection.close()
+        with lock:
+            latencies.extend(times)
+            errors[0] += failed
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        list(executor.map(client, range(clients)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return len(latencies) / elapsed, latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99)], errors[0]
+
+def report(name, result):
+    throughput, p50, p99, errors = result
+    print(f"{name:<22} {throughput:8.0f} req/s   p50 {p50 * 1000:6.1f} ms   p99 {p99 * 1000:7.1f} ms   errors {errors}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the dev server")
+    parser.add_argument("--clients", type=int, default=300, help="number of concurrent client connections")
+    parser.add_argument("--requests", type=int, default=20, help="requests sent by each client")
+    parser.add_argument("--pages", type=int, default=500, help="number of pages in the generated site")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as public_dir:
+        build_site(public_dir, args.pages)
+        paths = [f"/section{i % 10}/page{i}.html" for i in range(args.pages)]
+
+        stock = ThreadingHTTPServer(("", 0), functools.partial(QuietHandler, directory=public_dir))
+        stock.daemon_threads = True
+        threading.Thread(target=stock.serve_forever, daemon=True).start()
+        report("http.server", run_clients(stock.server_address[1], paths, args.clients, args.requests, False))
+        stock.shutdown()
+
+        store = SiteStore(public_dir)
+        store.sync()
+        server = start_server(store, 0)
+        report("in-memory", run_clients(server.server_address[1], paths, args.clients, args.requests, False))
+        report("in-memory conditional", run_clients(server.server_address[1], paths, args.clients, args.requests, True))
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Memory benchmark for streaming large markdown pages.
+
+Writes one large generated page (see corpus.py) and renders it twice, each time in a fresh process: once
+read whole and parsed into one node tree (write_page), and once streamed block by block
+(stream_page_html). Reports the wall time and the peak resident memory of each process.
+
+Usage:
+    python3 benchmarks/bench_stream.py [--mb 50]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import resource
+import subprocess
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from corpus import generate_page
+from generate_page import write_page, write_output, stream_page_html
+from manifest import hash_file
+
+TEMPLATE = "<!DOCTYPE html><html><head><title>{{ Title }}</title></head><body>{{ Content }}</body></html>"
+
+def write_large_page(path: str, megabytes: float):
+    """
+    Write a markdown page of about the given size, made of generated pages with their titles demoted to h2.
+    """
+    target = megabytes * 1024 * 1024
+    size = 0
+    with open(path, "w") as md_file:
+        md_file.write("# Reference\n\n")
+        i = 0
+        while size < target:
+            page = "#" + generate_page(random.Random(i), words=5000) # Keeps one h1 title for the whole file
+            md_file.write(page + "\n")
+            size += len(page) + 1
+            i += 1
+
+def render(mode: str, from_path: str, dest_path: str):
+    """
+    Render the page in this process, and print the wall time and the peak resident memory.
+    """
+    start = time.perf_counter()
+    if mode == "whole":
+        with open(from_path, "r") as md_file:
+            write_page(md_file.read(), TEMPLATE, dest_path)
+    else:
+        with open(from_path, "r") as md_file:
+            write_output(dest_path, lambda html_file: stream_page_html(md_file, TEMPLATE, html_file))
+    elapsed = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss # Kilobytes on Linux
+    print(f"{elapsed} {peak_kb}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare reading large pages whole with streaming them")
+    parser.add_argument("--mb", type=float, default=50, help="approximate size of the markdown page in MB")
+    parser.add_argument("--render", nargs=3, metavar=("MODE", "FROM", "DEST"), help=argparse.SUPPRESS) # Used for the child processes
+    args = parser.parse_args()
+
+    if args.render:
+        render(*args.render)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        from_path = os.path.join(tmp, "reference.md")
+        write_large_page(from_path, args.mb)
+        print(f"markdown: {os.path.getsize(from_path) / (1024 * 1024):.1f} MB")
+
+        hashes = {} # Compared by hash, since ru_maxrss carries over from the parent into the child processes
+        for mode in ("whole", "stream"):
+            dest_path = os.path.join(tmp, f"{mode}.html")
+            result = subprocess.run([sys.executable, __file__, "--render", mode, from_path, dest_path], capture_output=True, text=True, check=True)
+            elapsed, peak_kb = result.stdout.split()
+            print(f"{mode:<8} {float(elapsed):8.2f} s   peak RSS {int(peak_kb) / 1024:8.1f} MB")
+            hashes[mode] = hash_file(dest_path)
+
+        if hashes["whole"] != hashes["stream"]:
+            print("Error: the streamed page differs from the page read whole")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
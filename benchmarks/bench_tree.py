@@ -0,0 +1,87 @@
+"""
+Benchmark for rendering wide and deep node trees.
+
+Times ParentNode.to_html on three tree shapes: a wide tree with one parent holding many leaves, a bushy
+tree of nested lists, and a deep chain of nested blockquotes. The recursive renderer the project used
+before, which checked every child with isinstance on every render, is timed alongside. It raises
+RecursionError on the deep chain.
+
+Usage:
+    python3 benchmarks/bench_tree.py [--nodes 1000000] [--depth 100000]
+"""
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from htmlnode import HTMLNode
+from leafnode import LeafNode
+from parentnode import ParentNode
+from run import time_runs
+
+def wide_tree(nodes: int) -> ParentNode:
+    return ParentNode("div", [LeafNode("b", f"leaf {i}", None) for i in range(nodes)], None)
+
+def bushy_tree(nodes: int) -> ParentNode:
+    """
+    Lists nested four levels deep, with ten items at each level.
+    """
+    def build_list(level):
+        items = []
+        for i in range(10):
+            children = [LeafNode(None, f"item {i} ", None), LeafNode("a", "link", {"href": f"/{level}/{i}"})]
+            if level < 3:
+                children.append(build_list(level + 1))
+            items.append(ParentNode("li", children, None))
+        return ParentNode("ul", items, None)
+    per_list = 1 + 10 * 3 + 100 * 3 + 1000 * 3 + 10000 * 2 # Nodes in one four-level list
+    return ParentNode("div", [build_list(0) for _ in range(max(1, nodes // per_list))], None)
+
+def deep_tree(depth: int) -> ParentNode:
+    node = LeafNode(None, "core", None)
+    for _ in range(depth):
+        node = ParentNode("blockquote", [node], {"class": "quote"})
+    return node
+
+def legacy_to_html(node) -> str:
+    fragments = []
+    legacy_write_fragments(node, fragments.append)
+    return "".join(fragments)
+
+def legacy_write_fragments(node, write):
+    """
+    The renderer before the explicit stack: ParentNode.write_fragments called write_fragments on every
+    child, after checking it with isinstance, and leaves wrote their to_html().
+    """
+    tag = node.tag
+    write(f"<{tag}{node.props_to_html()}>")
+    for child in node.children:
+        if not isinstance(child, HTMLNode):
+            raise ValueError(f"child {child} is not an instance of HTMLNode")
+        if isinstance(child, ParentNode):
+            legacy_write_fragments(child, write)
+        else:
+            child.write_fragments(write)
+    write(f"</{tag}>")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark rendering wide and deep node trees")
+    parser.add_argument("--nodes", type=int, default=1000000, help="approximate number of nodes in the wide and bushy trees")
+    parser.add_argument("--depth", type=int, default=100000, help="nesting depth of the deep tree")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per renderer, the fastest is reported")
+    args = parser.parse_args()
+
+    print(f"{'shape':<8} {'stack':>9} {'recursive':>10} {'speedup':>8}")
+    for shape, root in (("wide", wide_tree(args.nodes)), ("bushy", bushy_tree(args.nodes)), ("deep", deep_tree(args.depth))):
+        elapsed = min(time_runs(root.to_html, args.repeat))
+        try:
+            legacy = min(time_runs(lambda: legacy_to_html(root), args.repeat))
+            if legacy_to_html(root) != root.to_html():
+                raise AssertionError("to_html output differs from the recursive renderer")
+            print(f"{shape:<8} {elapsed:>8.3f}s {legacy:>9.3f}s {legacy / elapsed:>7.2f}x")
+        except RecursionError:
+            print(f"{shape:<8} {elapsed:>8.3f}s {'RecursionError':>19}")
+
+if __name__ == "__main__":
+    main()
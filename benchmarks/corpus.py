@@ -0,0 +1,182 @@
+"""
+Deterministic synthetic markdown corpus for the benchmarks.
+
+Every page is generated from its own random.Random seeded with the corpus seed and the page number, so
+the same options always produce byte-identical pages, on any machine and whatever the page count.
+
+Usage:
+    python3 benchmarks/corpus.py OUTPUT_DIR [--pages 100] [--words 2000] [--list-depth 3]
+        [--link-density 2] [--image-density 0.5] [--code-ratio 0.1] [--seed 1]
+"""
+import os
+import random
+import argparse
+
+WORDS = (
+    "the static site generator turns markdown into html pages with a template and copies every asset "
+    "from the static directory into the public directory so a plain web server can host the result "
+    "blocks are separated by blank lines and inline text can hold bold italic code links and images "
+    "lists nest by indenting their items while quotes and headings stand on their own lines"
+).split()
+
+CODE_LINES = (
+    "def render(node):",
+    "    return node.to_html()",
+    "for page in pages:",
+    "    write(page)",
+    "if __name__ == \"__main__\":",
+    "    main()",
+)
+
+def generate_page(rng: random.Random, words: int=2000, list_depth: int=3, link_density: float=2.0,
+                  image_density: float=0.5, code_ratio: float=0.1) -> str:
+    """
+    Generate one markdown page.
+
+    Args:
+        rng (random.Random): The page's random source
+        words (int): The approximate number of words on the page
+        list_depth (int): The deepest nesting level of list items, 1 for flat lists
+        link_density (float): Links per 100 words of text
+        image_density (float): Images per 100 words of text
+        code_ratio (float): The fraction of blocks that are code blocks
+
+    Returns:
+        str: The markdown page, starting with an h1 title
+    """
+    blocks = [f"# {' '.join(rng.choice(WORDS) for _ in range(4)).title()}"]
+    written = 4
+    while written < words:
+        if rng.random() < code_ratio:
+            blocks.append(code_block(rng))
+            written += 10
+            continue
+        kind = rng.random()
+        if kind < 0.1:
+            blocks.append("#" * rng.randint(2, 6) + " " + sentence(rng, 5, link_density, image_density))
+            written += 5
+        elif kind < 0.55:
+            count = rng.randint(30, 120)
+            blocks.append(sentence(rng, count, link_density, image_density))
+            written += count
+        elif kind < 0.8:
+            block, count = list_block(rng, list_depth, link_density, image_density)
+            blocks.append(block)
+            written += count
+        else:
+            lines = [f"> {sentence(rng, 15, link_density, image_density)}" for _ in range(rng.randint(1, 4))]
+            blocks.append("\n".join(lines))
+            written += 15 * len(lines)
+    return "\n\n".join(blocks) + "\n"
+
+def sentence(rng: random.Random, count: int, link_density: float, image_density: float) -> str:
+    """
+    Generate a line of text with inline markup. Links and images appear at the given rates per 100 words,
+    and some words are bold, italic or code.
+    """
+    parts = []
+    for i in range(count):
+        roll = rng.random() * 100
+        word = rng.choice(WORDS)
+        if roll < link_density:
+            parts.append(f"[{word} {rng.choice(WORDS)}](/{word}/{i})")
+        elif roll < link_density + image_density:
+            parts.append(f"![{word}](/images/{word}-{i}.png)")
+        elif roll < link_density + image_density + 3:
+            parts.append(f"**{word}**")
+        elif roll < link_density + image_density + 6:
+            parts.append(f"*{word}*")
+        elif roll < link_density + image_density + 8:
+            parts.append(f"`{word}`")
+        else:
+            parts.append(word)
+    return " ".join(parts)
+
+def list_block(rng: random.Random, list_depth: int, link_density: float, image_density: float) -> tuple[str, int]:
+    """
+    Generate an ordered or unordered list whose items nest up to list_depth levels, one level at a time.
+
+    Returns:
+        tuple[str, int]: The list block and its word count
+    """
+    ordered = rng.random() < 0.3
+    lines = []
+    level = 0
+    count = 0
+    for i in range(rng.randint(3, 12)):
+        level = max(0, min(list_depth - 1, level + rng.choice((-1, 0, 1)))) if i else 0
+        marker = f"{i + 1}." if ordered else "*"
+        words = rng.randint(3, 12)
+        lines.append(f"{'  ' * level}{marker} {sentence(rng, words, link_density, image_density)}")
+        count += words
+    return "\n".join(lines), count
+
+def code_block(rng: random.Random) -> str:
+    lines = [rng.choice(CODE_LINES) for _ in range(rng.randint(2, 8))]
+    return "```\n" + "\n".join(lines) + "\n```"
+
+def generate_pages(pages: int=100, seed: int=1, **options) -> list[tuple[str, str]]:
+    """
+    Generate a corpus in memory.
+
+    Args:
+        pages (int): The number of pages
+        seed (int): The corpus seed
+        options: Passed on to generate_page
+
+    Returns:
+        list[tuple[str, str]]: (relative path, markdown) pairs, spread over a few directories
+    """
+    corpus = []
+    for i in range(pages):
+        rng = random.Random(f"{seed}-{i}")
+        rel_path = "index.md" if i == 0 else f"section{i % 10}/page{i}.md"
+        corpus.append((rel_path, generate_page(rng, **options)))
+    return corpus
+
+def write_corpus(content_dir: str, pages: int=100, seed: int=1, **options) -> list[str]:
+    """
+    Generate a corpus into a content directory.
+
+    Returns:
+        list[str]: The paths of the markdown files written
+    """
+    paths = []
+    for rel_path, markdown in generate_pages(pages, seed, **options):
+        path = os.path.join(content_dir, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as md_file:
+            md_file.write(markdown)
+        paths.append(path)
+    return paths
+
+def add_corpus_arguments(parser: argparse.ArgumentParser):
+    """
+    Add the corpus options to a command line parser.
+    """
+    parser.add_argument("--pages", type=int, default=100, help="number of pages")
+    parser.add_argument("--words", type=int, default=2000, help="approximate words per page")
+    parser.add_argument("--list-depth", type=int, default=3, help="deepest list nesting level")
+    parser.add_argument("--link-density", type=float, default=2.0, help="links per 100 words")
+    parser.add_argument("--image-density", type=float, default=0.5, help="images per 100 words")
+    parser.add_argument("--code-ratio", type=float, default=0.1, help="fraction of blocks that are code blocks")
+    parser.add_argument("--seed", type=int, default=1, help="corpus seed")
+
+def corpus_options(args) -> dict:
+    """
+    Collect the corpus options from parsed command line arguments.
+    """
+    return {"pages": args.pages, "seed": args.seed, "words": args.words, "list_depth": args.list_depth,
+            "link_density": args.link_density, "image_density": args.image_density, "code_ratio": args.code_ratio}
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic markdown corpus")
+    parser.add_argument("output_dir", help="directory to write the markdown files to")
+    add_corpus_arguments(parser)
+    args = parser.parse_args()
+
+    paths = write_corpus(args.output_dir, **corpus_options(args))
+    print(f"Wrote {len(paths)} pages to {args.output_dir}")
+
+if __name__ == "__main__":
+    main()
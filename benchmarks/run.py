@@ -0,0 +1,196 @@
+"""
+Benchmark suite.
+
+Generates a synthetic corpus (see corpus.py) and times the parser stages and whole-site builds on it:
+
+    markdown_to_html_node  parsing every page of the corpus into node trees
+    text_to_textnodes      inline parsing of every paragraph of the corpus
+    to_html                rendering the parsed node trees
+    build_serial           a full build of the corpus with one process
+    build_parallel         a full build with the default process pool
+    build_noop             an incremental build where nothing changed
+    build_compress         a full build with the default process pool, writing gzip siblings of the outputs
+
+Each benchmark runs --repeat times and reports the fastest and the median run. Results are written as
+JSON, along with the commit, the Python version and the corpus options, so that runs from two commits
+can be compared with --compare.
+
+Usage:
+    python3 benchmarks/run.py [--output results.json] [--compare baseline.json] [--repeat 5]
+        [--only markdown_to_html_node,to_html] [corpus options, see corpus.py]
+"""
+import gc
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import statistics
+import subprocess
+import tempfile
+import contextlib
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCHMARKS_DIR), "src"))
+
+from corpus import generate_pages, write_corpus, add_corpus_arguments, corpus_options
+from block_markdown import markdown_to_html_node, markdown_to_blocks, block_to_blocktype, BlockType
+from inline_markdown import text_to_textnodes
+from build import build_site
+
+TEMPLATE = "<!DOCTYPE html><html><head><title>{{ Title }}</title></head><body>{{ Content }}</body></html>"
+
+def time_runs(run, repeat: int) -> list[float]:
+    """
+    Time a callable repeatedly. The garbage collector is paused during each run, so collections
+    triggered by earlier runs do not land in later ones.
+    """
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return times
+
+def bench_parse(pages, repeat):
+    return time_runs(lambda: [markdown_to_html_node(markdown) for _, markdown in pages], repeat)
+
+def bench_inline(pages, repeat):
+    paragraphs = [block for _, markdown in pages for block in markdown_to_blocks(markdown) if block_to_blocktype(block) == BlockType.PARAGRAPH.value]
+    return time_runs(lambda: [text_to_textnodes(paragraph) for paragraph in paragraphs], repeat)
+
+def bench_render(pages, repeat):
+    nodes = [markdown_to_html_node(markdown) for _, markdown in pages]
+    return time_runs(lambda: [node.to_html() for node in nodes], repeat)
+
+def bench_build(options, repeat, workers, noop=False, compress=()):
+    with tempfile.TemporaryDirectory() as tmp:
+        content_dir = os.path.join(tmp, "content")
+        static_dir = os.path.join(tmp, "static")
+        public_dir = os.path.join(tmp, "public")
+        template_path = os.path.join(tmp, "template.html")
+        write_corpus(content_dir, **options)
+        os.makedirs(static_dir)
+        with open(template_path, "w") as template_file:
+            template_file.write(TEMPLATE)
+
+        def build(full):
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                build_site(static_dir, content_dir, template_path, public_dir, workers=workers, full=full, compress=compress)
+
+        if noop:
+            build(True)
+            return time_runs(lambda: build(False), repeat)
+        return time_runs(lambda: build(True), repeat)
+
+BENCHMARKS = {
+    "markdown_to_html_node": lambda pages, options, repeat: bench_parse(pages, repeat),
+    "text_to_textnodes": lambda pages, options, repeat: bench_inline(pages, repeat),
+    "to_html": lambda pages, options, repeat: bench_render(pages, repeat),
+    "build_serial": lambda pages, options, repeat: bench_build(options, repeat, workers=1),
+    "build_parallel": lambda pages, options, repeat: bench_build(options, repeat, workers=None),
+    "build_noop": lambda pages, options, repeat: bench_build(options, repeat, workers=1, noop=True),
+    "build_compress": lambda pages, options, repeat: bench_build(options, repeat, workers=None, compress=("gzip",)),
+}
+
+def git_commit() -> str:
+    """
+    Get the commit the benchmarks ran on, or None outside a git checkout.
+    """
+    try:
+        result = subprocess.run(["git", "rev-parse", "HEAD"], cwd=BENCHMARKS_DIR, capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+def run_suite(names: list[str], options: dict, repeat: int) -> dict:
+    """
+    Run the named benchmarks on a corpus generated with the given options.
+
+    Returns:
+        dict: The results document, as written to JSON
+    """
+    pages = generate_pages(**options)
+    corpus_bytes = sum(len(markdown.encode()) for _, markdown in pages)
+    results = {}
+    for name in names:
+        times = BENCHMARKS[name](pages, options, repeat)
+        results[name] = {
+            "min_s": min(times),
+            "median_s": statistics.median(times),
+            "mb_per_s": corpus_bytes / min(times) / (1024 * 1024),
+            "times_s": times,
+        }
+        print(f"{name:<24} min {min(times) * 1000:9.1f} ms   median {statistics.median(times) * 1000:9.1f} ms")
+
+    return {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "corpus": dict(options, bytes=corpus_bytes),
+        "repeat": repeat,
+        "results": results,
+    }
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    Compare the fastest runs against a baseline results document.
+
+    Returns:
+        list[str]: The names of the benchmarks that got slower by more than the threshold
+    """
+    if baseline.get("corpus") != results["corpus"]:
+        print("Warning: the baseline was run on a different corpus")
+
+    regressions = []
+    print(f"\n{'benchmark':<24} {'baseline ms':>12} {'now ms':>10} {'change':>8}")
+    for name, result in results["results"].items():
+        if name not in baseline.get("results", {}):
+            continue
+        before = baseline["results"][name]["min_s"]
+        after = result["min_s"]
+        change = after / before - 1
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<24} {before * 1000:>12.1f} {after * 1000:>10.1f} {change * 100:>+7.1f}%{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the benchmark suite")
+    parser.add_argument("--output", help="write the results as JSON to this path")
+    parser.add_argument("--compare", help="compare against a results JSON file from an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.1, help="slowdown that counts as a regression with --compare (default: 0.1 for 10%%)")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per benchmark")
+    parser.add_argument("--only", help="comma-separated benchmarks to run (default: all)")
+    add_corpus_arguments(parser)
+    args = parser.parse_args()
+
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+
+    results = run_suite(names, corpus_options(args), args.repeat)
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
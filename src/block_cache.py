@@ -0,0 +1,208 @@
+import io
+import os
+import re
+import json
+from block_markdown import PARSER_VERSION, iter_blocks, block_to_html_node
+from textnode_to_htmlnode import collecting_page_text, current_page_text
+
+BLOCK_CACHE_NAME = "blocks.json" # The file a block cache is saved to in the cache directory
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+BLOCK_SEPARATOR_PATTERN = re.compile(r"\n\n+") # The empty lines between blocks, see split_block_lines
+
+class BlockCache:
+    """
+    An in-memory cache of the rendered HTML of markdown blocks, keyed by the text of the block.
+
+    write_html splits a page at its empty lines with one regex and looks each chunk up, so after an edit
+    to one paragraph of a long page only that paragraph is parsed and rendered, and the rest of the body
+    is spliced together from cached fragments. A block's type follows from its text, so the text alone
+    is a complete key.
+
+    The HTML also depends on the asset URL map links are rewritten with, which use_variant tracks.
+
+    While the text of a page is being collected, see collecting_page_text, the text and links of each
+    block are kept next to its HTML, so the search index and the link check get them from the cache too.
+    A block first cached without them is rendered once more the first time a collected page uses it.
+
+    Entries are evicted oldest first once the text and HTML they hold pass max_bytes. Hits do not
+    refresh an entry, which keeps lookups to one dict access. An evicted block that is still in use is
+    rendered and cached again on its next page.
+    """
+    def __init__(self, max_bytes: int=DEFAULT_MAX_BYTES):
+        self.entries = {} # Block text -> HTML, oldest first
+        self.texts = {} # Block text -> [the texts of its nodes joined with spaces, the URLs it links to], for blocks of collected pages
+        self.size = 0 # Characters of text and HTML held
+        self.max_bytes = max_bytes
+        self.variant = "" # What the cached HTML was rendered with besides the block text, see use_variant
+
+    def use_variant(self, variant: str):
+        """
+        Set what the blocks are rendered with besides their text, such as the digest of the asset URL map.
+        A different variant than before drops every entry.
+
+        Args:
+            variant (str): The new variant, "" for plain rendering
+        """
+        if variant != self.variant:
+            self.entries.clear()
+            self.texts.clear()
+            self.size = 0
+            self.variant = variant
+
+    def render(self, chunk: str) -> str:
+        """
+        Render one chunk of markdown, a block with no empty lines in it, reusing the cached HTML if any.
+
+        Args:
+            chunk (str): The text of the block
+
+        Returns:
+            str: The HTML of the block, empty if the chunk is only whitespace
+        """
+        html = self.entries.get(chunk)
+        if html is None:
+            buffer = io.StringIO()
+            for block_type, block_lines in iter_blocks(chunk.split("\n")):
+                block_to_html_node(block_type, block_lines).write_html(buffer)
+            html = buffer.getvalue()
+            self.entries[chunk] = html
+            self.size += len(chunk) + len(html)
+        return html
+
+    def render_collecting(self, chunk: str, page_text) -> str:
+        """
+        Render one chunk like render, and add its text and links to the text of the page being collected.
+
+        Args:
+            chunk (str): The text of the block
+            page_text (PageText): The text of the page, see collecting_page_text
+
+        Returns:
+            str: The HTML of the block
+        """
+        block_text = self.texts.get(chunk)
+        html = self.entries.get(chunk)
+        if block_text is None or html is None:
+            with collecting_page_text(None) as recorded:
+                buffer = io.StringIO()
+                for block_type, block_lines in iter_blocks(chunk.split("\n")):
+                    block_to_html_node(block_type, block_lines).write_html(buffer)
+            if html is None:
+                html = buffer.getvalue()
+                self.entries[chunk] = html
+                self.size += len(chunk) + len(html)
+            block_text = self.texts[chunk] = [" ".join(recorded.texts), sorted(recorded.links)]
+            self.size += text_size(block_text)
+        page_text.add_block(*block_text)
+        return html
+
+    def write_html(self, markdown: str, fp):
+        """
+        Convert markdown to HTML block by block, streaming it into a file-like object. The output is the
+        same as markdown_to_html_node(markdown).write_html(fp).
+
+        Args:
+            markdown (str): The markdown content of a page
+            fp: A file-like object with a write method
+        """
+        write = fp.write
+        get = self.entries.get
+        page_text = current_page_text()
+        write("<div>")
+        if page_text is not None:
+            for chunk in BLOCK_SEPARATOR_PATTERN.split(markdown):
+                write(self.render_collecting(chunk, page_text))
+        else:
+            for chunk in BLOCK_SEPARATOR_PATTERN.split(markdown):
+                html = get(chunk)
+                write(html if html is not None else self.render(chunk))
+        write("</div>")
+        if self.size > self.max_bytes:
+            self.prune()
+
+    def prune(self) -> int:
+        """
+        Evict the oldest entries until the cache is down to three quarters of max_bytes, so a cache at its
+        limit is not pruned again after every page.
+
+        Returns:
+            int: The number of entries removed
+        """
+        target = self.max_bytes * 3 // 4
+        removed = []
+        for chunk, html in self.entries.items():
+            if self.size <= target:
+                break
+            self.size -= len(chunk) + len(html) + text_size(self.texts.get(chunk))
+            removed.append(chunk)
+        for chunk in removed:
+            del self.entries[chunk]
+            self.texts.pop(chunk, None)
+        return len(removed)
+
+    def save(self, path: str):
+        """
+        Write the cache to a file, replacing it atomically, so a later process can start with it warm.
+
+        Args:
+            path (str): The path of the cache file
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w") as cache_file:
+                cache_file.write(json.dumps({"parser": PARSER_VERSION, "variant": self.variant, "blocks": self.entries, "texts": self.texts}, separators=(",", ":")))
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def load(self, path: str) -> int:
+        """
+        Add the entries of a file written by save. A missing or unreadable file, or one written by another
+        parser version, adds nothing. An empty cache takes the file's variant, a cache with entries only
+        loads a file of its own variant.
+
+        Args:
+            path (str): The path of the cache file
+
+        Returns:
+            int: The number of entries loaded
+        """
+        try:
+            with open(path, "r") as cache_file:
+                data = json.load(cache_file)
+        except (OSError, ValueError):
+            return 0
+        if not isinstance(data, dict) or data.get("parser") != PARSER_VERSION or not isinstance(data.get("blocks"), dict):
+            return 0
+        variant = data.get("variant", "")
+        if variant != self.variant:
+            if self.entries:
+                return 0
+            self.variant = variant
+
+        blocks = data["blocks"]
+        texts = data.get("texts")
+        if not isinstance(texts, dict):
+            texts = {}
+        for chunk, html in blocks.items():
+            if chunk not in self.entries:
+                self.entries[chunk] = html
+                self.size += len(chunk) + len(html)
+                block_text = texts.get(chunk)
+                if block_text is not None:
+                    self.texts[chunk] = block_text
+                    self.size += text_size(block_text)
+        if self.size > self.max_bytes:
+            self.prune()
+        return len(blocks)
+
+def text_size(block_text) -> int:
+    """
+    Characters held by the recorded text and links of a block, see BlockCache.texts, or 0 for None.
+    """
+    if block_text is None:
+        return 0
+    return len(block_text[0]) + sum(map(len, block_text[1]))
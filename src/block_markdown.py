@@ -1,10 +1,14 @@
 from enum import Enum
 from htmlnode import HTMLNode
 from parentnode import ParentNode
-from leafnode import LeafNode
 from inline_markdown import text_to_textnodes
+from textnode import TextNode, TextType
 from textnode_to_htmlnode import text_node_to_html_node
+from profiler import stage
 import re
+from itertools import groupby
+
+PARSER_VERSION = "2" # Bump whenever a parser change alters the HTML produced for the same markdown
 
 class BlockType(Enum):
     PARAGRAPH = "paragraph"
@@ -14,6 +18,8 @@ class BlockType(Enum):
     UNORDERED_LIST = "unordered_list"
     ORDERED_LIST = "ordered_list"
 
+ORDERED_ITEM_PATTERN = re.compile(r"\d+\.\s")
+
 def markdown_to_blocks(markdown: str) -> list[str]:
     """
     Convert markdown text to a list of blocks
@@ -24,14 +30,54 @@ def markdown_to_blocks(markdown: str) -> list[str]:
     Returns:
         blocks: list of strings representing blocks
     """
-    blocks = [] # Start an empty list of blocks
+    return ["\n".join(block_lines) for block_lines in split_block_lines(markdown.split("\n"))]
 
-    blocks = markdown.split("\n\n") # Split the markdown text into blocks. We look for two newlines to separate blocks
+def split_block_lines(lines):
+    """
+    Group lines of markdown into blocks, walking the lines once. Blocks are separated by empty lines.
 
-    blocks = list(filter(lambda block: block != "", blocks)) # Remove empty blocks
-    blocks = [block.strip() for block in blocks] # Remove leading and trailing whitespaces from blocks
-    
-    return blocks
+    Leading and trailing whitespace is removed from each block, and blocks made only of whitespace are skipped.
+
+    Args:
+        lines: An iterable of markdown lines, without line endings
+
+    Yields:
+        block_lines: list of the lines of the next block
+    """
+    # Group runs of non-empty lines; bool("") is False, so the empty lines between blocks form their own groups
+    for is_block, block_lines in groupby(lines, bool):
+        if is_block:
+            block = strip_block_lines(list(block_lines))
+            if block:
+                yield block
+
+def strip_block_lines(block_lines: list[str]) -> list[str]:
+    """
+    Remove leading and trailing whitespace from a block given as a list of lines, the same way str.strip
+    would on the joined block.
+
+    Args:
+        block_lines (list): The non-empty lines of the block
+
+    Returns:
+        block_lines: The stripped lines, or an empty list if the block is only whitespace
+    """
+    if not block_lines[0][0].isspace() and not block_lines[-1][-1].isspace():
+        return block_lines # Nothing to strip, which is the common case
+
+    start = 0
+    end = len(block_lines)
+    while start < end and block_lines[start].strip() == "":
+        start += 1 # Drop whitespace-only lines at the start
+    while end > start and block_lines[end - 1].strip() == "":
+        end -= 1 # Drop whitespace-only lines at the end
+    if start == end:
+        return []
+
+    stripped = block_lines[start:end]
+    stripped[0] = stripped[0].lstrip()
+    stripped[-1] = stripped[-1].rstrip()
+    return stripped
 
 def block_to_blocktype(block: str) -> str:
     """
@@ -43,22 +89,51 @@ def block_to_blocktype(block: str) -> str:
     Returns:
         block_type: A string representing the type of block        
     """
-    if block.startswith("#"):
-        return BlockType.HEADING.value # The block starts with 1 or more # characters, representing a heading
-    elif block.startswith("```") and block.endswith("```"):
-        return BlockType.CODE.value # The block starts and ends with 3 backticks, representing code
-    elif all(line.startswith(">") for line in block.split("\n")):
-        return BlockType.QUOTE.value # All lines in the block start with >, representing a quote
-    elif all(line.lstrip().startswith("* ") for line in block.split("\n")):
-        return BlockType.UNORDERED_LIST.value # All lines in the block start with *, representing an unordered list
-    elif all(line.lstrip().startswith("- ") for line in block.split("\n")):
-        return BlockType.UNORDERED_LIST.value # All lines in the block start with -, representing an unordered list
-    elif all(line.lstrip().startswith("+ ") for line in block.split("\n")):
-        return BlockType.UNORDERED_LIST.value # All lines in the block start with +, representing an unordered list
-    elif all(re.match(r'^\d+\.\s', line.lstrip()) for line in block.split("\n")):
-        return BlockType.ORDERED_LIST.value # All lines in the block start with 1., 2., 3., etc., representing an ordered list
-    else:
-        return BlockType.PARAGRAPH.value # None of the above, return paragraph
+    return lines_to_blocktype(block.split("\n")).value
+
+def lines_to_blocktype(lines: list[str]) -> BlockType:
+    """
+    Determine the type of a block given as a list of lines
+    
+    Args:
+        lines (list): The lines of the block
+    
+    Returns:
+        block_type: The BlockType of the block
+    """
+    first_line = lines[0]
+    if first_line.startswith("#"):
+        return BlockType.HEADING # The block starts with 1 or more # characters, representing a heading
+    if first_line.startswith("```") and lines[-1].endswith("```"):
+        return BlockType.CODE # The block starts and ends with 3 backticks, representing code
+
+    # The first line decides which line-based block type is possible, so the lines are only walked once, to check the rest
+    first_item = first_line.lstrip()
+    if first_line.startswith(">"):
+        if all(line.startswith(">") for line in lines):
+            return BlockType.QUOTE # All lines in the block start with >, representing a quote
+    elif first_item.startswith(("* ", "- ", "+ ")):
+        marker = first_item[:2]
+        if all(line.lstrip().startswith(marker) for line in lines):
+            return BlockType.UNORDERED_LIST # All lines in the block start with the same *, - or + marker, representing an unordered list
+    elif ORDERED_ITEM_PATTERN.match(first_item):
+        if all(ORDERED_ITEM_PATTERN.match(line.lstrip()) for line in lines):
+            return BlockType.ORDERED_LIST # All lines in the block start with 1., 2., 3., etc., representing an ordered list
+
+    return BlockType.PARAGRAPH # None of the above, return paragraph
+
+def iter_blocks(lines):
+    """
+    Walk lines of markdown once, yielding each block with its type as soon as the block ends
+    
+    Args:
+        lines: An iterable of markdown lines, without line endings
+
+    Yields:
+        tuple of (block_type, block_lines)
+    """
+    for block_lines in split_block_lines(lines):
+        yield lines_to_blocktype(block_lines), block_lines
     
 def markdown_to_html_node(markdown: str) -> ParentNode:
     """
@@ -70,47 +145,79 @@ def markdown_to_html_node(markdown: str) -> ParentNode:
     Returns:
         node: A ParentNode representing the root of the HTML tree, with nested HTML nodes representing the markdown text
     """
-    blocks = markdown_to_blocks(markdown) # Convert markdown text to blocks
-
-    child_nodes = [] # Start an empty list of child nodes
-
-    for block in blocks:
-        block_type = block_to_blocktype(block) # Determine the type of block
-        match block_type:
-            case "paragraph":
-                tag = "p"
-                children = text_to_children(block) # Convert the block to a list of HTML nodes
-                child_nodes.append(ParentNode(tag, children, None))
-            case "heading":
-                header_level = get_header_level(block) # Get the level of the header
-                tag = f"h{header_level}"
-                children = text_to_children(clean_header_text(block)) # Convert the block to a list of HTML nodes
-                child_nodes.append(ParentNode(tag, children, None))
-            case "code":
-                inner_tag = "code"
-                text_node = LeafNode(None, clean_code_text(block), None) # Create a LeafNode object with the cleaned code text
-                inner_node = ParentNode(inner_tag, [text_node], None) # Create a parent node with the HTML node as a child
-                outer_tag = "pre"
-                child_nodes.append(ParentNode(outer_tag, [inner_node], None))
-            case "quote":
-                tag = "blockquote"
-                quote_text = clean_quote_text(block) # Clean the quote text
-                children = text_to_children(quote_text) # Convert the block to a list of HTML nodes
-                child_nodes.append(ParentNode(tag, children, None))
-            case "unordered_list":
-                list_items = block.split("\n") # Split the block into list items
-                processed_items = [process_unordered_list_item(item) for item in list_items] # Process each list item
-                root_node = build_list_structure(processed_items, "ul") # Build a nested list structure
-                child_nodes.append(root_node) # Append the root node to the list of HTML nodes
-
-            case "ordered_list":
-                list_items = block.split("\n")
-                processed_items = [process_ordered_list_item(item) for item in list_items] # Process each list item
-                root_node = build_list_structure(processed_items, "ol") # Build a nested list structure
-                child_nodes.append(root_node) # Append the root node to the list of HTML nodes
+    child_nodes = [block_to_html_node(block_type, block_lines) for block_type, block_lines in iter_blocks(markdown.split("\n"))]
 
     return ParentNode("div", child_nodes, None)
 
+def write_markdown_html(lines, fp):
+    """
+    Convert markdown to HTML one block at a time, streaming each block into a file-like object as soon as
+    it ends. The output is the same as markdown_to_html_node(markdown).write_html(fp), but only the lines
+    and nodes of the current block are held in memory, however long the markdown is.
+
+    Args:
+        lines: An iterable of markdown lines, without line endings, such as read_markdown_lines(md_file)
+        fp: A file-like object with a write method
+    """
+    write = fp.write
+    write("<div>")
+    for block_type, block_lines in iter_blocks(lines):
+        block_to_html_node(block_type, block_lines).write_html(fp)
+    write("</div>")
+
+def read_markdown_lines(md_file):
+    """
+    Read the lines of a markdown file one at a time, splitting them the way markdown_to_html_node splits
+    the whole text. Iterating the file reads it in buffered chunks, so the file is never read whole.
+
+    Args:
+        md_file: A markdown file opened in text mode
+
+    Yields:
+        str: The next line, without its line ending
+    """
+    for line in md_file:
+        yield line[:-1] if line.endswith("\n") else line
+
+def block_to_html_node(block_type: BlockType, lines: list[str]) -> ParentNode:
+    """
+    Convert one block to an HTML node
+    
+    Args:
+        block_type (BlockType): The type of the block
+        lines (list): The lines of the block
+
+    Returns:
+        node: A ParentNode representing the block
+    """
+    match block_type:
+        case BlockType.PARAGRAPH:
+            tag = "p"
+            children = text_to_children("\n".join(lines)) # Convert the block to a list of HTML nodes
+            return ParentNode(tag, children, None)
+        case BlockType.HEADING:
+            block = "\n".join(lines)
+            header_level = get_header_level(block) # Get the level of the header
+            tag = f"h{header_level}"
+            children = text_to_children(clean_header_text(block)) # Convert the block to a list of HTML nodes
+            return ParentNode(tag, children, None)
+        case BlockType.CODE:
+            text_node = TextNode(clean_code_text("\n".join(lines)), TextType.CODE) # Converted like inline code, so its text is collected with the page's
+            inner_node = text_node_to_html_node(text_node) # <code>, holding the text
+            outer_tag = "pre"
+            return ParentNode(outer_tag, [inner_node], None)
+        case BlockType.QUOTE:
+            tag = "blockquote"
+            quote_text = clean_quote_lines(lines) # Clean the quote text
+            children = text_to_children(quote_text) # Convert the block to a list of HTML nodes
+            return ParentNode(tag, children, None)
+        case BlockType.UNORDERED_LIST:
+            processed_items = [process_unordered_list_item(item) for item in lines] # Process each list item
+            return build_list_structure(processed_items, "ul") # Build a nested list structure
+        case BlockType.ORDERED_LIST:
+            processed_items = [process_ordered_list_item(item) for item in lines] # Process each list item
+            return build_list_structure(processed_items, "ol") # Build a nested list structure
+
 
 def text_to_children(text:str) -> list[HTMLNode]:
     """
@@ -124,7 +231,8 @@ def text_to_children(text:str) -> list[HTMLNode]:
     """
     nodes = [] # Start an empty list of nodes
 
-    text_nodes = text_to_textnodes(text) # Convert input text to a list of TextNode objects
+    with stage("inline"):
+        text_nodes = text_to_textnodes(text) # Convert input text to a list of TextNode objects
 
     for text_node in text_nodes:
         node = text_node_to_html_node(text_node) # Convert each TextNode object to an HTML node
@@ -198,7 +306,18 @@ def clean_quote_text(block: str) -> str:
     Returns:
         text: A string representing the cleaned quote text
     """
-    lines = block.split("\n") # Split the block into lines
+    return clean_quote_lines(block.split("\n"))
+
+def clean_quote_lines(lines: list[str]) -> str:
+    """
+    Remove leading '>' characters, and leading/trailing whitespace from the lines of a quote block
+    
+    Args:
+        lines (list): The lines of a quote block
+    
+    Returns:
+        text: A string representing the cleaned quote text
+    """
     cleaned_lines = []
     for line in lines:
         cleaned_line = line.lstrip(">").strip() # Remove leading '>' characters and leading/trailing whitespace
@@ -274,6 +393,12 @@ def build_list_structure(processed_items: list[tuple[str, int]], list_tag: str="
     """
     Build a nested list structure from a list of processed list items.
 
+    The items are walked once, keeping a stack of the lists that are still open, innermost last. An item
+    indented deeper than the innermost list opens a new list, which is nested in the last item of the list
+    around it once it closes. An item indented less closes lists until it fits. The outermost list is at
+    indent 0 whatever the indent of the first item, and an item that dedents to an indent between two open
+    lists opens a new list there, after the one that was closed.
+
     Args:
         processed_items (list): A list of tuples containing cleaned text and indent level
         list_tag (str): The tag to use for the outer list (default is 'ul')
@@ -284,54 +409,32 @@ def build_list_structure(processed_items: list[tuple[str, int]], list_tag: str="
     if not processed_items:
         return None
 
-    nodes_list = []
-    for text, indent_level in processed_items:
-        nodes_list.append((ParentNode("li", text_to_children(text), None), indent_level))
+    first_text, _ = processed_items[0]
+    stack = [(0, [ParentNode("li", text_to_children(first_text), None)])] # (indent, items) of each open list
 
-    root_node, _ = process_at_level(nodes_list, 0, 0, list_tag)
+    for text, indent_level in processed_items[1:]:
+        item = ParentNode("li", text_to_children(text), None)
+        while indent_level < stack[-1][0]:
+            close_list(stack, list_tag) # Less indentation, so the innermost list is complete
 
-    return root_node
+        current_indent, items = stack[-1]
+        if indent_level == current_indent:
+            items.append(item) # Same indentation, so the item belongs to the innermost list
+        else:
+            stack.append((indent_level, [item])) # More indentation, so the item starts a nested list
 
-def process_at_level(nodes_list: list[tuple[ParentNode, int]], start_index: int, current_indent: int, list_tag: str="ul") -> tuple[ParentNode, int]:
-    """
-    Recursively process a list of nodes at a given indentation level.
+    while len(stack) > 1:
+        close_list(stack, list_tag)
 
-    Args:
-        nodes_list (list): A list of tuples containing nodes and their indentation levels
-        start_index (int): The index to start processing from
-        current_indent (int): The current indentation level
-        list_tag (str): The tag to use for the outer list (default is 'ul')
+    return ParentNode(list_tag, stack[0][1], None)
 
-    Returns:
-        tuple of (parent_node, next_index)
+def close_list(stack: list[tuple[int, list[ParentNode]]], list_tag: str):
     """
-    # Base case
-    if start_index >= len(nodes_list):
-        return None, start_index
-    
-    # Also stop if we find a node with less indentation
-    current_node, indent = nodes_list[start_index]
-    if indent < current_indent:
-        return None, start_index
-
-    # Start collecting nodes at this level
-    nodes_at_level = [current_node]
-    next_index = start_index + 1
-
-    # Check next node
-    while next_index < len(nodes_list):
-        next_node, next_indent = nodes_list[next_index]
-        if next_indent == current_indent: # If the next node has the same indentation, add it to the list of nodes at the current level
-            nodes_at_level.append(next_node)
-            next_index += 1
-        elif next_indent > current_indent:
-            # Recurse to process the next level
-            nested_nodes, next_index = process_at_level(nodes_list, next_index, next_indent, list_tag)
-            if nested_nodes is not None:
-                last_node = nodes_at_level[-1]
-                last_node.children.append(nested_nodes)
-        else: # If the next node has less indentation, stop
-            break
+    Close the innermost open list, nesting it in the last item of the list around it.
 
-    parent_node = ParentNode(list_tag, nodes_at_level, None)
-    return parent_node, next_index
\ No newline at end of file
+    Args:
+        stack (list): The (indent, items) pairs of the open lists, innermost last
+        list_tag (str): The tag to use for the list
+    """
+    _, items = stack.pop()
+    stack[-1][1][-1].children.append(ParentNode(list_tag, items, None))
\ No newline at end of file
@@ -0,0 +1,201 @@
+import os
+import shutil
+from copy_files import copy_files, copy_all
+from compress import compress_outputs
+from fingerprint import fingerprint_assets, urls_digest
+from generate_page import generate_pages_recursive
+from link_check import has_links, update_links, find_broken_links, report_broken_links
+from manifest import MANIFEST_NAME, new_manifest, load_manifest, save_manifest
+from page_cache import PageCache, DEFAULT_MAX_BYTES
+from search_index import SEARCH_INDEX_NAME, SearchIndex, load_search_index, is_indexed, update_search_index, write_index
+from profiler import stage
+
+def build_site(static_dir, content_dir, template_path, public_dir, workers=None, full=False, cache_dir=None, cache_size=DEFAULT_MAX_BYTES, copy_strategy="auto", compress=(), block_cache=None, shard=None, fingerprint=False, search=False, check_links=False):
+    """
+    Build the site into the public directory.
+
+    The build is incremental: a manifest stored in the public directory records the content hash of every
+    markdown file, the template and every static file, and only outputs whose inputs changed are rebuilt.
+
+    Args:
+        static_dir (str): The directory containing the static files.
+        content_dir (str): The directory containing the markdown files.
+        template_path (str): The path to the template file.
+        public_dir (str): The directory to build the site into.
+        workers (int): The number of worker processes used to render pages.
+        full (bool): Discard the public directory and the manifest, and rebuild everything.
+        cache_dir (str): The directory of the rendered page cache, or None to parse every page that is built.
+        cache_size (int): The size in bytes the page cache is pruned to after the build.
+        copy_strategy (str): How static files are copied, one of "auto", "copy", "hardlink" and "reflink".
+        compress (tuple[str]): The encodings to write precompressed siblings of the text outputs in, from
+            "gzip" and "deflate". Empty writes none and removes those left by earlier builds.
+        block_cache (BlockCache): A cache of rendered markdown blocks, which watch mode keeps between builds.
+        shard (tuple[int, int]): Build only the pages and static files of this (index, count) shard, for a
+            build split across machines whose public directories are combined with merge_shards.
+        fingerprint (bool): Write a copy of every static file named after its content hash, such as
+            index.3f9a1c2b.css, and point the pages' links and images and the template's href and src
+            attributes at the copies. False removes the copies left by earlier builds.
+        search (bool): Write a full-text search index of the pages, see SearchIndex. False removes the index
+            left by earlier builds.
+        check_links (bool): Collect the links of every page and report those to paths the site does not
+            serve. A sharded build only collects them, merge_shards checks them across the whole site.
+
+    Returns:
+        manifest: The manifest of the finished build
+    """
+    manifest_path = os.path.join(public_dir, MANIFEST_NAME)
+
+    with stage("load manifest"):
+        if full:
+            if os.path.exists(public_dir):
+                shutil.rmtree(public_dir)
+            manifest = new_manifest()
+        else:
+            manifest = load_manifest(manifest_path)
+
+    os.makedirs(public_dir, exist_ok=True)
+
+    with stage("copy static"):
+        copy_files(static_dir, public_dir, manifest=manifest, strategy=copy_strategy, shard=shard)
+    with stage("fingerprint"):
+        asset_urls = fingerprint_assets(static_dir, public_dir, manifest, fingerprint, shard)
+
+    with stage("search index"):
+        search_index = load_search_index(public_dir, manifest, search)
+
+    cache = PageCache(cache_dir, cache_size, urls_digest(asset_urls)) if cache_dir is not None else None
+    # The words and links of the pages that are not indexed or checked yet are recorded while they are rendered
+    collect = None
+    if search or check_links:
+        collect = lambda rel_path: (search and not is_indexed(manifest, rel_path)) or (check_links and not has_links(manifest, rel_path))
+    page_texts = {}
+    generate_pages_recursive(content_dir, template_path, public_dir, workers=workers, manifest=manifest, cache=cache, block_cache=block_cache, shard=shard, asset_urls=asset_urls, collect=collect, page_texts=page_texts)
+    with stage("check links"):
+        update_links(manifest, page_texts, check_links)
+        if check_links and shard is None:
+            report_broken_links(find_broken_links(manifest))
+    with stage("search index"):
+        update_search_index(search_index, public_dir, manifest, page_texts)
+    with stage("compress"):
+        compress_outputs(public_dir, manifest, compress, workers)
+
+    manifest["shard"] = list(shard) if shard is not None else None
+    with stage("save manifest"):
+        save_manifest(manifest, manifest_path) # Only written once the whole build succeeded
+    if cache is not None:
+        with stage("prune cache"):
+            cache.prune()
+    return manifest
+
+def merge_shards(shard_dirs: list[str], public_dir: str, copy_strategy="auto") -> dict:
+    """
+    Combine the public directories of a sharded build into one site.
+
+    Every shard of one split must be given exactly once, and the shards must have been built with the
+    same parser, template and static files. The merge fails without touching the public directory if any
+    record or output file appears in more than one shard, which happens when shards were built from
+    different checkouts or a page and a static file map to the same output. Otherwise the public directory
+    is replaced by the union of the shards' outputs, and their manifests are combined into the manifest of
+    an unsharded build, so later incremental builds into the public directory work as usual. The shards'
+    search indexes are combined into one.
+
+    Args:
+        shard_dirs (list[str]): The public directories the shards were built into.
+        public_dir (str): The directory to merge the site into.
+        copy_strategy (str): How the outputs are copied, see copy_file.
+
+    Returns:
+        manifest: The merged manifest
+    """
+    if not shard_dirs:
+        raise ValueError("No shards to merge")
+
+    problems = []
+    manifests = []
+    for shard_dir in shard_dirs:
+        manifest_path = os.path.join(shard_dir, MANIFEST_NAME)
+        if not os.path.exists(manifest_path):
+            raise ValueError(f"{shard_dir} has no build manifest")
+        manifest = load_manifest(manifest_path)
+        if manifest.get("shard") is None:
+            raise ValueError(f"{shard_dir} was not built as a shard")
+        manifests.append((shard_dir, manifest))
+
+    counts = sorted({manifest["shard"][1] for _, manifest in manifests})
+    if len(counts) > 1:
+        problems.append(f"the shards come from splits into {', '.join(map(str, counts))} shards")
+    else:
+        indexes = [manifest["shard"][0] for _, manifest in manifests]
+        for index in range(1, counts[0] + 1):
+            if indexes.count(index) == 0:
+                problems.append(f"shard {index}/{counts[0]} is missing")
+            elif indexes.count(index) > 1:
+                problems.append(f"shard {index}/{counts[0]} is given {indexes.count(index)} times")
+
+    merged = new_manifest()
+    first_dir, first = manifests[0]
+    merged["parser"] = first["parser"]
+    merged["template"] = first["template"]
+    owners = {} # (section, relative path) -> the shard directory it came from
+    for shard_dir, manifest in manifests:
+        if manifest["parser"] != first["parser"]:
+            problems.append(f"{shard_dir} was built with parser version {manifest['parser']}, {first_dir} with {first['parser']}")
+        if (manifest["template"] or {}).get("hash") != (first["template"] or {}).get("hash"):
+            problems.append(f"{shard_dir} was built with a different template than {first_dir}")
+        for section in ("pages", "static", "compressed", "search", "links"):
+            for rel_path, record in manifest.get(section, {}).items():
+                owner = owners.setdefault((section, rel_path), shard_dir)
+                if owner != shard_dir:
+                    problems.append(f"{section} record {rel_path} is in both {owner} and {shard_dir}")
+                merged[section][rel_path] = record
+        # Every shard maps every static file, so the maps must agree rather than be disjoint
+        assets = {rel_path: record["path"] for rel_path, record in manifest.get("assets", {}).items()}
+        if assets != {rel_path: record["path"] for rel_path, record in first.get("assets", {}).items()}:
+            problems.append(f"{shard_dir} was built with different fingerprinted assets than {first_dir}")
+        merged["assets"].update(manifest.get("assets", {}))
+
+    # Combine the search indexes, which every shard with pages has one of
+    search_index = None
+    for shard_dir, manifest in manifests:
+        index_path = os.path.join(shard_dir, SEARCH_INDEX_NAME)
+        if not manifest.get("search") and not os.path.exists(index_path):
+            continue
+        try:
+            with open(index_path, "rb") as index_file:
+                index = SearchIndex.decode(index_file.read())
+        except (OSError, ValueError) as e:
+            problems.append(f"{shard_dir} has no readable search index: {e}")
+            continue
+        if search_index is None:
+            search_index = index
+        else:
+            search_index.merge(index)
+
+    # Collect the output files, which must not overlap either
+    pending = [] # (source, destination) pairs to copy
+    files = {} # Relative path -> the shard directory it came from
+    for shard_dir, _ in manifests:
+        prefix_length = len(os.path.join(shard_dir, ""))
+        for root, dirs, names in os.walk(shard_dir):
+            for name in names:
+                path = os.path.join(root, name)
+                rel_path = path[prefix_length:]
+                if rel_path in (MANIFEST_NAME, SEARCH_INDEX_NAME) or name.endswith(".tmp"):
+                    continue
+                owner = files.setdefault(rel_path, shard_dir)
+                if owner != shard_dir:
+                    problems.append(f"output {rel_path} is in both {owner} and {shard_dir}")
+                pending.append((path, os.path.join(public_dir, rel_path)))
+
+    if problems:
+        raise ValueError("Cannot merge shards:\n  " + "\n  ".join(problems))
+
+    if os.path.exists(public_dir):
+        shutil.rmtree(public_dir)
+    for dest_dir in {os.path.dirname(dest_path) for _, dest_path in pending} | {public_dir}:
+        os.makedirs(dest_dir, exist_ok=True)
+    copy_all(pending, copy_strategy)
+    if search_index is not None:
+        write_index(search_index, os.path.join(public_dir, SEARCH_INDEX_NAME))
+    save_manifest(merged, os.path.join(public_dir, MANIFEST_NAME))
+    return merged
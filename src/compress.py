@@ -0,0 +1,166 @@
+import os
+import gzip
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from manifest import file_record, remove_output
+
+ENCODINGS = {"gzip": ".gz", "deflate": ".zz"} # Content-Encoding -> suffix of the precompressed sibling file
+COMPRESSIBLE_EXTENSIONS = (".html", ".css", ".js", ".mjs", ".json", ".svg", ".xml", ".txt")
+MIN_SIZE = 256 # Smaller files gain too little from compression to be worth a second request path
+
+def compress_data(data: bytes, encoding: str) -> bytes:
+    """
+    Compress data for a Content-Encoding, at the highest level, since precompression happens once per build.
+
+    The gzip header's timestamp is left at zero, so the same input always produces the same bytes.
+
+    Args:
+        data (bytes): The data to compress
+        encoding (str): "gzip", or "deflate" for the zlib format HTTP uses under that name
+
+    Returns:
+        bytes: The compressed data
+    """
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    if encoding == "deflate":
+        return zlib.compress(data, 9)
+    raise ValueError(f"unknown encoding {encoding}, expected one of {', '.join(ENCODINGS)}")
+
+def is_compressible(path: str) -> bool:
+    return path.endswith(COMPRESSIBLE_EXTENSIONS)
+
+def compress_file(path: str, encodings: list[str]) -> str:
+    """
+    Write a precompressed sibling of a file for each encoding, such as index.html.gz next to index.html.
+
+    Each sibling is written to a temporary file and moved into place, and gets the modification time of
+    the original, which is how the server tells a current sibling from one left behind by an older build.
+
+    Args:
+        path (str): The file to compress
+        encodings (list[str]): The encodings to write, keys of ENCODINGS
+
+    Returns:
+        str: The path of the file
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    mtime_ns = os.stat(path).st_mtime_ns
+
+    for encoding in encodings:
+        variant_path = path + ENCODINGS[encoding]
+        tmp_path = variant_path + ".tmp"
+        try:
+            with open(tmp_path, "wb") as variant_file:
+                variant_file.write(compress_data(data, encoding))
+            os.utime(tmp_path, ns=(mtime_ns, mtime_ns))
+            os.replace(tmp_path, variant_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    return path
+
+def variants_current(path: str, encodings: list[str]) -> bool:
+    """
+    Check that every sibling of a file exists, lining up the siblings' modification times with the
+    original's. A build that rewrites an output with the same content gives it a new modification time
+    without changing what the siblings hold.
+    """
+    mtime_ns = os.stat(path).st_mtime_ns
+    for encoding in encodings:
+        variant_path = path + ENCODINGS[encoding]
+        try:
+            variant_mtime_ns = os.stat(variant_path).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if variant_mtime_ns != mtime_ns:
+            os.utime(variant_path, ns=(mtime_ns, mtime_ns))
+    return True
+
+def remove_variants(path: str, encodings: list[str], root: str):
+    """
+    Remove the precompressed siblings of a file for the given encodings, along with any parent directories
+    they leave empty below the root.
+    """
+    for encoding in encodings:
+        remove_output(path + ENCODINGS[encoding], root)
+
+def compress_outputs(public_dir: str, manifest: dict, encodings=(), workers=None) -> list[str]:
+    """
+    Write precompressed siblings of the built site's text files, so a web server or CDN origin can send
+    them as they are instead of compressing on every request.
+
+    The outputs are the pages, static files and fingerprinted copies of static files in the manifest.
+    Outputs whose content hash is unchanged since the last build and whose siblings still exist are
+    skipped. Siblings that are no longer wanted, because their output was removed, shrank below MIN_SIZE,
+    or its encoding was turned off, are removed. The manifest's "compressed" records are updated in place.
+
+    Args:
+        public_dir (str): The public directory.
+        manifest (dict): The build manifest, with the "pages", "static" and "assets" records of this build.
+        encodings (tuple[str]): The encodings to write, keys of ENCODINGS. Empty turns precompression off,
+            and removes every sibling written by earlier builds.
+        workers (int): The number of worker processes compressing files. Defaults to the number of CPUs.
+
+    Returns:
+        list[str]: The paths of the files that were compressed.
+    """
+    for encoding in encodings:
+        if encoding not in ENCODINGS:
+            raise ValueError(f"unknown encoding {encoding}, expected one of {', '.join(ENCODINGS)}")
+    encodings = sorted(set(encodings))
+
+    static = manifest.get("static", {})
+    outputs = []
+    if encodings: # Otherwise only the siblings of earlier builds are removed, without looking at the outputs
+        outputs = [rel_path[:-len(".md")] + ".html" for rel_path in manifest.get("pages", {})]
+        outputs += [rel_path for rel_path in static if is_compressible(rel_path)]
+        outputs += [record["path"] for rel_path, record in manifest.get("assets", {}).items() if is_compressible(rel_path)]
+
+    previous = manifest.get("compressed", {})
+    current = {}
+    pending = []
+    for rel_path in outputs:
+        path = os.path.join(public_dir, rel_path)
+        old_record = previous.get(rel_path)
+        try:
+            record = file_record(path, old_record)
+        except FileNotFoundError:
+            continue
+        # A sibling name taken by a static file, like an archive shipped next to its source, is left to that file
+        wanted = [encoding for encoding in encodings if rel_path + ENCODINGS[encoding] not in static] if record["size"] >= MIN_SIZE else []
+        record["encodings"] = wanted
+        current[rel_path] = record
+
+        if old_record is not None:
+            unwanted = [encoding for encoding in old_record["encodings"] if encoding not in wanted and rel_path + ENCODINGS[encoding] not in static]
+            remove_variants(path, unwanted, public_dir)
+        if not wanted:
+            continue
+        if old_record is not None and old_record["hash"] == record["hash"] and old_record["encodings"] == wanted and variants_current(path, wanted):
+            continue # Unchanged since the last build
+        pending.append((path, wanted))
+
+    # Remove the siblings of outputs that are gone
+    for rel_path, old_record in previous.items():
+        if rel_path not in current:
+            unwanted = [encoding for encoding in old_record["encodings"] if rel_path + ENCODINGS[encoding] not in static]
+            remove_variants(os.path.join(public_dir, rel_path), unwanted, public_dir)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    paths = [path for path, _ in pending]
+    if workers <= 1 or len(pending) <= 4:
+        for path, wanted in pending:
+            compress_file(path, wanted)
+    else:
+        chunksize = max(1, len(pending) // (workers * 8))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for _ in executor.map(compress_file, paths, [wanted for _, wanted in pending], chunksize=chunksize):
+                pass # Consume the results so errors in the workers are raised here
+
+    manifest["compressed"] = current
+    return paths
@@ -1,48 +1,324 @@
 import os
+import stat
+import errno
 import shutil
+from concurrent.futures import ThreadPoolExecutor
+from manifest import file_record, hash_file, remove_output
+from shard import in_shard
 
-def copy_files(src_dir, dest_dir):
+try:
+    import fcntl
+except ImportError: # Not available on Windows
+    fcntl = None
+
+COPY_STRATEGIES = ("auto", "copy", "hardlink", "reflink")
+FICLONE = 0x40049409 # Linux ioctl that shares the source's extents with the destination (btrfs, xfs)
+
+_no_reflink_devices = set() # Filesystems where FICLONE already failed, so later files skip straight to copying
+
+def copy_files(src_dir, dest_dir, manifest=None, checksum=False, strategy="auto", workers=None, shard=None):
     """
     Copy files from source directory to destination directory.
 
+    Only new and changed files are copied. Without a manifest the destination directory is synced to be an
+    exact copy of the source directory, see mirror_files. With a manifest, files whose content hash changed
+    since the last build are copied, and only the files the manifest recorded are ever removed, so other
+    files in the destination, such as generated pages, are left alone. The manifest's "static" records are
+    updated in place.
+
     Args:
         src_dir (str): Source directory.
         dest_dir (str): Destination directory.
+        manifest (dict): The build manifest from the previous build, or None to mirror the source directory.
+        checksum (bool): Without a manifest, compare file contents instead of sizes and modification times.
+        strategy (str): How files are copied, see copy_file.
+        workers (int): The number of threads copying files. Defaults to the ThreadPoolExecutor default.
+        shard (tuple[int, int]): With a manifest, copy only the files in this (index, count) shard, see shard_of.
 
     Returns:
-        None
+        list[str]: The destination paths that were copied.
     """
+    if strategy not in COPY_STRATEGIES:
+        raise ValueError(f"unknown copy strategy {strategy}, expected one of {', '.join(COPY_STRATEGIES)}")
+
+    if manifest is not None:
+        return sync_files(src_dir, dest_dir, manifest, strategy, workers, shard)
+
     # First, check if destination directory exists
     if not os.path.exists(dest_dir):
         try:
             os.makedirs(dest_dir)
         except OSError as e:
             print(f"Error: {e}")
-            return
-    elif len(os.listdir(dest_dir)) > 0:
-        # Delete all files in destination directory
-        try:
-            shutil.rmtree(dest_dir)
-            os.makedirs(dest_dir)
-        except Exception as e:
-            print(f"Error: {e}")
-            return
+            return []
 
-    # Copy files from source directory to destination directory
+    # Copy new and changed files from source directory to destination directory, and prune the rest
     try:
-        for root, dirs, files in os.walk(src_dir):
-            # Create corresponding directories in destination
-            for dir in dirs:
-                dest_path = os.path.join(dest_dir, os.path.relpath(os.path.join(root, dir), src_dir))
-                if not os.path.exists(dest_path):
-                    os.makedirs(dest_path)
-            # Copy files
-            for file in files:
-                src_file_path = os.path.join(root, file)
-                dest_file_path = os.path.join(dest_dir, os.path.relpath(src_file_path, src_dir))
-                #print(f"Copying {src_file_path} to {dest_file_path}")
-                shutil.copy2(src_file_path, dest_file_path)
+        return mirror_files(src_dir, dest_dir, checksum, strategy, workers)
     except Exception as e:
         print(f"Error: {e}")
+        return []
+
+def mirror_files(src_dir, dest_dir, checksum=False, strategy="auto", workers=None):
+    """
+    Make the destination directory an exact copy of the source directory, copying only the files that
+    differ and removing files and directories that are not in the source.
+
+    A file is unchanged when the destination has the same size and modification time as the source, which
+    is what shutil.copy2 leaves behind. With checksum, files of the same size are compared by content hash
+    instead, which also catches edits that kept the modification time.
+
+    Args:
+        src_dir (str): Source directory.
+        dest_dir (str): Destination directory.
+        checksum (bool): Compare file contents instead of modification times.
+        strategy (str): How files are copied, see copy_file.
+        workers (int): The number of threads copying files.
+
+    Returns:
+        list[str]: The destination paths that were copied.
+    """
+    pending = [] # (source, destination) pairs that need copying
+    wanted_dirs = set()
+    wanted_files = set()
+
+    for root, dirs, files in os.walk(src_dir):
+        # Create corresponding directories in destination
+        for dir in dirs:
+            dest_path = os.path.join(dest_dir, os.path.relpath(os.path.join(root, dir), src_dir))
+            wanted_dirs.add(dest_path)
+            if os.path.isfile(dest_path) or os.path.islink(dest_path):
+                os.remove(dest_path) # A file is in the way of the directory
+            if not os.path.exists(dest_path):
+                os.makedirs(dest_path)
+        # Copy files
+        for file in files:
+            src_file_path = os.path.join(root, file)
+            dest_file_path = os.path.join(dest_dir, os.path.relpath(src_file_path, src_dir))
+            wanted_files.add(dest_file_path)
+            if is_unchanged(src_file_path, dest_file_path, checksum):
+                continue
+            if os.path.isdir(dest_file_path) and not os.path.islink(dest_file_path):
+                shutil.rmtree(dest_file_path) # A directory is in the way of the file
+            pending.append((src_file_path, dest_file_path))
+
+    copied = copy_all(pending, strategy, workers)
+
+    # Prune what is no longer in the source directory, deepest paths first
+    for root, dirs, files in os.walk(dest_dir, topdown=False):
+        for file in files:
+            dest_file_path = os.path.join(root, file)
+            if dest_file_path not in wanted_files:
+                os.remove(dest_file_path)
+        for dir in dirs:
+            dest_path = os.path.join(root, dir)
+            if dest_path not in wanted_dirs:
+                if os.path.islink(dest_path):
+                    os.remove(dest_path)
+                else:
+                    shutil.rmtree(dest_path)
+
+    return copied
+
+def is_unchanged(src_path, dest_path, checksum=False) -> bool:
+    """
+    Check whether the destination file already matches the source file.
+
+    Args:
+        src_path (str): Source file.
+        dest_path (str): Destination file.
+        checksum (bool): Compare file contents instead of modification times.
+
+    Returns:
+        bool: True if the destination file does not need to be copied again.
+    """
+    try:
+        dest_stat = os.stat(dest_path)
+    except FileNotFoundError:
+        return False
+    if not stat.S_ISREG(dest_stat.st_mode):
+        return False
+
+    src_stat = os.stat(src_path)
+    if src_stat.st_size != dest_stat.st_size:
+        return False
+    if not checksum:
+        return src_stat.st_mtime_ns == dest_stat.st_mtime_ns
+    if hash_file(src_path) != hash_file(dest_path):
+        return False
+
+    shutil.copystat(src_path, dest_path) # Same contents, so line the times up for the next mtime comparison
+    return True
+
+def sync_files(src_dir, dest_dir, manifest, strategy="auto", workers=None, shard=None):
+    """
+    Copy only the files that changed since the build recorded in the manifest, and remove the files
+    whose source no longer exists.
+
+    Args:
+        src_dir (str): Source directory.
+        dest_dir (str): Destination directory.
+        manifest (dict): The build manifest. Its "static" records are updated in place.
+        strategy (str): How files are copied, see copy_file.
+        workers (int): The number of threads copying files.
+        shard (tuple[int, int]): Copy only the files in this (index, count) shard, or None for every file.
+            Files of other shards are left out of the manifest, like files that do not exist.
+
+    Returns:
+        list[str]: The destination paths that were copied.
+    """
+    previous = manifest.get("static", {})
+    current = {}
+    pending = [] # (source, destination) pairs that need copying
+    prefix_length = len(os.path.join(src_dir, "")) # Slicing off the prefix is much cheaper than os.path.relpath
+
+    for root, dirs, files in os.walk(src_dir):
+        for file in files:
+            src_file_path = os.path.join(root, file)
+            rel_path = src_file_path[prefix_length:]
+            if not in_shard(rel_path, shard):
+                continue
+            dest_file_path = os.path.join(dest_dir, rel_path)
+
+            record = file_record(src_file_path, previous.get(rel_path))
+            current[rel_path] = record
+
+            old_record = previous.get(rel_path)
+            if old_record is not None and old_record["hash"] == record["hash"] and dest_matches_record(dest_file_path, record):
+                continue # Unchanged since the last build
+
+            os.makedirs(os.path.dirname(dest_file_path), exist_ok=True)
+            pending.append((src_file_path, dest_file_path))
+
+    copied = copy_all(pending, strategy, workers)
+
+    # Remove the files whose source was deleted since the last build
+    for rel_path in previous:
+        if rel_path not in current:
+            remove_output(os.path.join(dest_dir, rel_path), dest_dir)
+
+    manifest["static"] = current
+    return copied
+
+def dest_matches_record(dest_path, record) -> bool:
+    """
+    Check that a copied file still has the size and modification time of its source, which shutil.copy2
+    preserves. This catches copies that were deleted or edited in the destination directory.
+
+    Args:
+        dest_path (str): Destination file.
+        record (dict): The manifest record of the source file.
+
+    Returns:
+        bool: True if the destination file still matches its source.
+    """
+    try:
+        dest_stat = os.stat(dest_path)
+    except FileNotFoundError:
+        return False
+    return dest_stat.st_size == record["size"] and dest_stat.st_mtime_ns == record["mtime"]
+
+def copy_all(pending, strategy="auto", workers=None) -> list[str]:
+    """
+    Copy a batch of files. Batches of more than a few files are copied by a thread pool, since the copies
+    spend their time in system calls that release the GIL.
+
+    Args:
+        pending (list[tuple[str, str]]): (source, destination) pairs.
+        strategy (str): How files are copied, see copy_file.
+        workers (int): The number of threads copying files.
+
+    Returns:
+        list[str]: The destination paths that were copied.
+    """
+    if workers == 1 or len(pending) <= 4:
+        for src_path, dest_path in pending:
+            copy_file(src_path, dest_path, strategy)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for _ in executor.map(lambda job: copy_file(job[0], job[1], strategy), pending):
+                pass # Consume the results so errors in the threads are raised here
+
+    return [dest_path for _, dest_path in pending]
+
+def copy_file(src_path, dest_path, strategy="auto"):
+    """
+    Copy one file, keeping its modification time.
+
+    Strategies:
+        copy: copy the data in the kernel with os.copy_file_range where available, else shutil.copyfile.
+        hardlink: link the destination to the source. Both names then share one file, so an edit to the
+            copy also edits the source. Falls back to copy across filesystems.
+        reflink: clone the file on filesystems with copy-on-write extents. Falls back to copy.
+        auto: reflink, falling back to copy. Never hardlinks.
+
+    Any existing destination is unlinked first, so a copy never writes through an old hardlink into the source.
+
+    Args:
+        src_path (str): Source file.
+        dest_path (str): Destination file.
+        strategy (str): One of "auto", "copy", "hardlink" and "reflink".
+    """
+    if os.path.lexists(dest_path):
+        os.remove(dest_path)
+
+    if strategy == "hardlink":
+        try:
+            os.link(src_path, dest_path)
+            return
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP):
+                raise # Only fall back when the filesystem cannot link these files
+
+    if strategy in ("auto", "reflink") and reflink_file(src_path, dest_path):
+        shutil.copystat(src_path, dest_path)
         return
-        
\ No newline at end of file
+
+    kernel_copy_file(src_path, dest_path)
+    shutil.copystat(src_path, dest_path)
+
+def reflink_file(src_path, dest_path) -> bool:
+    """
+    Clone a file with the FICLONE ioctl, so the destination shares the source's data blocks until either is written.
+
+    Returns:
+        bool: True if the clone worked, False if the platform or filesystem does not support it.
+    """
+    if fcntl is None:
+        return False
+
+    device = os.stat(src_path).st_dev
+    if device in _no_reflink_devices:
+        return False
+
+    with open(src_path, "rb") as src_file, open(dest_path, "wb") as dest_file:
+        try:
+            fcntl.ioctl(dest_file.fileno(), FICLONE, src_file.fileno())
+            return True
+        except OSError:
+            _no_reflink_devices.add(device)
+
+    os.remove(dest_path) # Leave nothing behind for the fallback copy
+    return False
+
+def kernel_copy_file(src_path, dest_path):
+    """
+    Copy the data of a file without moving it through Python, using os.copy_file_range where available.
+    Falls back to shutil.copyfile, which uses sendfile on Linux.
+    """
+    if hasattr(os, "copy_file_range"):
+        with open(src_path, "rb") as src_file, open(dest_path, "wb") as dest_file:
+            try:
+                size = os.fstat(src_file.fileno()).st_size
+                copied = 0
+                while copied < size:
+                    sent = os.copy_file_range(src_file.fileno(), dest_file.fileno(), size - copied)
+                    if sent == 0:
+                        break # The file shrank while copying
+                    copied += sent
+                return
+            except OSError as e:
+                if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP):
+                    raise # Only fall back when the kernel or filesystem cannot do the copy
+
+    shutil.copyfile(src_path, dest_path)
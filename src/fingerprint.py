@@ -0,0 +1,90 @@
+import os
+import json
+import hashlib
+from copy_files import copy_file
+from manifest import file_record, remove_output
+from shard import in_shard
+
+HASH_LENGTH = 8 # Hex digits of the content hash put in fingerprinted names
+
+def fingerprinted_path(rel_path: str, file_hash: str) -> str:
+    """
+    Name the content-addressed copy of a file, with the start of its content hash before the extension.
+
+    Args:
+        rel_path (str): The path of the file, such as "images/logo.png"
+        file_hash (str): The hex sha256 digest of the file contents
+
+    Returns:
+        str: The fingerprinted path, such as "images/logo.3f9a1c2b.png"
+    """
+    root, extension = os.path.splitext(rel_path)
+    return f"{root}.{file_hash[:HASH_LENGTH]}{extension}"
+
+def fingerprint_assets(static_dir: str, public_dir: str, manifest: dict, enabled: bool=True, shard=None) -> dict:
+    """
+    Write a content-addressed copy of every static file next to it in the public directory, such as
+    index.3f9a1c2b.css next to index.css, so the copies can be served with long cache lifetimes. The
+    originals stay in place for URLs that are not rewritten. Static HTML files keep their names only.
+
+    Copies are hardlinks to the file in the public directory where the filesystem allows. Hashes come from
+    the manifest's "static" records, which reuse the previous build's hash for files whose size and
+    modification time are unchanged, and from the manifest's "assets" records for files outside the shard.
+    The map covers every static file even in a sharded build, since any page may link to any asset, but
+    copies are only written for the shard's own files. Copies whose file changed or was removed are
+    deleted. The manifest's "assets" records are updated in place.
+
+    Args:
+        static_dir (str): The directory containing the static files.
+        public_dir (str): The public directory the static files were copied into.
+        manifest (dict): The build manifest, with the "static" records of this build.
+        enabled (bool): False removes the copies of earlier builds and writes none.
+        shard (tuple[int, int]): The (index, count) shard being built, or None.
+
+    Returns:
+        dict: The URL of each static file mapped to the URL of its copy, such as {"/index.css": "/index.3f9a1c2b.css"}
+    """
+    static = manifest.get("static", {})
+    previous = manifest.get("assets", {})
+    current = {}
+    if enabled:
+        prefix_length = len(os.path.join(static_dir, ""))
+        for root, dirs, files in os.walk(static_dir):
+            for file in files:
+                if file.endswith(".html"):
+                    continue
+                src_path = os.path.join(root, file)
+                rel_path = src_path[prefix_length:]
+                record = static.get(rel_path) # Recorded by this build's copy stage when the file is in the shard
+                if record is None:
+                    record = file_record(src_path, previous.get(rel_path))
+                current[rel_path] = dict(record, path=fingerprinted_path(rel_path, record["hash"]))
+
+    for rel_path, old_record in previous.items():
+        record = current.get(rel_path)
+        if record is None or record["path"] != old_record["path"]:
+            remove_output(os.path.join(public_dir, old_record["path"]), public_dir)
+
+    for rel_path, record in current.items():
+        if not in_shard(rel_path, shard):
+            continue
+        dest_path = os.path.join(public_dir, record["path"])
+        old_record = previous.get(rel_path)
+        if old_record is not None and old_record["path"] == record["path"] and os.path.exists(dest_path):
+            continue # Unchanged since the last build
+        copy_file(os.path.join(public_dir, rel_path), dest_path, "hardlink") # Falls back to a copy
+
+    manifest["assets"] = current
+    return {"/" + rel_path.replace(os.sep, "/"): "/" + record["path"].replace(os.sep, "/") for rel_path, record in current.items()}
+
+def urls_digest(urls: dict) -> str:
+    """
+    Hash a URL map, for the records and cache keys of pages rendered with it.
+
+    Returns:
+        str: The hex sha256 digest of the map, or "" for an empty map, so builds without fingerprinting
+            keep the records and cache keys they had before
+    """
+    if not urls:
+        return ""
+    return hashlib.sha256(json.dumps(urls, sort_keys=True).encode()).hexdigest()
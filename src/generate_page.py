@@ -1,4 +1,24 @@
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from block_markdown import PARSER_VERSION, markdown_to_html_node, write_markdown_html, read_markdown_lines
+from markdown import extract_title
+from manifest import file_record, remove_output
+from page_cache import copy_entry
+from template import Template, compile_template, load_template, rewrite_urls
+from textnode_to_htmlnode import using_asset_urls, collecting_page_text, record_title
+from search_index import tokenize
+from fingerprint import urls_digest
+from profiler import stage
+from shard import in_shard
+import profiler
 
+_worker_template = None # Template compiled once per worker process
+_worker_cache = None # PageCache shared by the pages rendered in a worker process
+_worker_block_cache = None # BlockCache of the build, set in the main process before any workers start
+_worker_asset_urls = None # URL map of the fingerprinted static files, see fingerprint_assets
+
+STREAM_THRESHOLD = 8 * 1024 * 1024 # Markdown files larger than this are streamed block by block instead of read whole
 
 def generate_page(from_path, template_path, dest_path):
     """
@@ -14,5 +34,382 @@ def generate_page(from_path, template_path, dest_path):
     """
     print(f"Generating page from {from_path} to {dest_path} using {template_path}")
 
-    with open(from_path, "r") as md_file:
-        content = md_file.read() # Read in the markdown content
\ No newline at end of file
+    template = load_template(template_path) # Compose and compile the template
+
+    dest_dir = os.path.dirname(dest_path)
+    if dest_dir != "":
+        os.makedirs(dest_dir, exist_ok=True)
+
+    write_page_file(from_path, template, dest_path)
+
+def render_page(markdown: str, template) -> str:
+    """
+    Renders a markdown string into the template.
+
+    Args:
+        markdown (str): The markdown content of the page.
+        template (Template | str): The template, or template text containing {{ Title }} and {{ Content }} placeholders.
+
+    Returns:
+        str: The full HTML page.
+    """
+    buffer = io.StringIO()
+    write_page_html(markdown, template, buffer)
+    return buffer.getvalue()
+
+def write_page_html(markdown: str, template, fp, cache=None, block_cache=None):
+    """
+    Renders a markdown string into the template, streaming the HTML into a file-like object.
+
+    The template's static chunks are written as is, and the page body is streamed into each
+    {{ Content }} slot, so the body never has to exist as one string.
+
+    Args:
+        markdown (str): The markdown content of the page.
+        template (Template | str): The template, or template text containing {{ Title }} and {{ Content }}
+            placeholders. Template text is compiled on first use and reused after that.
+        fp: A file-like object with a write method.
+        cache (PageCache): A cache of rendered page bodies. On a hit the body is copied from the cache
+            instead of parsing the markdown again.
+        block_cache (BlockCache): A cache of rendered blocks. Bodies that are rendered only parse the
+            blocks that are not in it.
+
+    Returns:
+        None
+    """
+    if cache is None and block_cache is not None:
+        with stage("parse"):
+            title = extract_title(markdown)
+        def write_body(out):
+            with stage("render"): # Parsing only the blocks that are not cached
+                block_cache.write_html(markdown, out)
+    elif cache is None:
+        with stage("parse"):
+            title = extract_title(markdown) # Pull the h1 title out of the markdown
+            node = markdown_to_html_node(markdown) # Convert the markdown to a tree of HTML nodes
+        def write_body(out):
+            with stage("render"):
+                node.write_html(out)
+    else:
+        with stage("cache"):
+            title = extract_title(markdown)
+            body_path = cache.get_or_render(markdown, lambda body_file: render_body(markdown, body_file, block_cache))
+        def write_body(out):
+            with stage("render"):
+                copy_entry(body_path, out)
+
+    record_title(title)
+    if not isinstance(template, Template):
+        template = compile_template(template)
+    with stage("template"):
+        template.write(fp, {"Title": title, "Content": write_body})
+
+def render_body(markdown: str, fp, block_cache=None):
+    """
+    Renders the body of a page, without the template, into a file-like object.
+    """
+    if block_cache is not None:
+        with stage("render"):
+            block_cache.write_html(markdown, fp)
+        return
+    with stage("parse"):
+        node = markdown_to_html_node(markdown)
+    with stage("render"):
+        node.write_html(fp)
+
+def stream_page_html(md_file, template, fp):
+    """
+    Renders a markdown file into the template without reading the whole file, streaming the HTML into a
+    file-like object. The title is read from the first line, and the body is parsed and written one block
+    at a time, so memory use is bounded by the largest block rather than by the size of the page.
+
+    Args:
+        md_file: The markdown file, opened in text mode. It is read from the start for every {{ Content }} slot.
+        template (Template | str): The template, or template text containing {{ Title }} and {{ Content }} placeholders.
+        fp: A file-like object with a write method.
+
+    Returns:
+        None
+    """
+    with stage("parse"):
+        md_file.seek(0)
+        title = extract_title(md_file.readline())
+    record_title(title)
+    def write_body(out):
+        md_file.seek(0)
+        with stage("render"): # Parsing and rendering are interleaved, block by block
+            write_markdown_html(read_markdown_lines(md_file), out)
+
+    if not isinstance(template, Template):
+        template = compile_template(template)
+    with stage("template"):
+        template.write(fp, {"Title": title, "Content": write_body})
+
+def write_page(markdown: str, template, dest_path: str, cache=None, block_cache=None):
+    """
+    Renders a markdown string into the template and writes it to the destination path.
+
+    The page is streamed into a temporary file that replaces the destination once it is complete, so a
+    failed render never leaves a half-written page behind.
+
+    Args:
+        markdown (str): The markdown content of the page.
+        template (Template | str): The template, or template text containing {{ Title }} and {{ Content }} placeholders.
+        dest_path (str): The path to the destination file.
+        cache (PageCache): A cache of rendered page bodies, or None.
+        block_cache (BlockCache): A cache of rendered blocks, or None.
+
+    Returns:
+        None
+    """
+    write_output(dest_path, lambda html_file: write_page_html(markdown, template, html_file, cache, block_cache))
+
+def write_page_file(from_path: str, template, dest_path: str, cache=None, block_cache=None):
+    """
+    Renders a markdown file into the template and writes it to the destination path.
+
+    Files up to STREAM_THRESHOLD bytes are read whole and rendered with write_page. Larger files, such as
+    generated reference pages, are streamed with stream_page_html, so they build in bounded memory. Streamed
+    pages skip the page cache and the block cache, whose entries would crowd out every other page.
+
+    Args:
+        from_path (str): The path to the markdown file.
+        template (Template | str): The template, or template text containing {{ Title }} and {{ Content }} placeholders.
+        dest_path (str): The path to the destination file.
+        cache (PageCache): A cache of rendered page bodies, or None.
+        block_cache (BlockCache): A cache of rendered blocks, or None.
+
+    Returns:
+        None
+    """
+    if os.path.getsize(from_path) > STREAM_THRESHOLD:
+        with open(from_path, "r") as md_file:
+            write_output(dest_path, lambda html_file: stream_page_html(md_file, template, html_file))
+        return
+
+    with stage("read"):
+        with open(from_path, "r") as md_file:
+            content = md_file.read()
+    write_page(content, template, dest_path, cache, block_cache)
+
+def write_output(dest_path: str, write_html):
+    """
+    Writes a page through a temporary file that replaces the destination once it is complete, so a failed
+    render never leaves a half-written page behind.
+
+    Args:
+        dest_path (str): The path to the destination file.
+        write_html: A callable that writes the page into the file object it is given.
+
+    Returns:
+        None
+    """
+    tmp_path = dest_path + ".tmp"
+    try:
+        with stage("write"): # Opening, flushing and replacing the file. The page's writes are streamed in the nested stages
+            with open(tmp_path, "w") as html_file:
+                write_html(html_file)
+            os.replace(tmp_path, dest_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def generate_pages_recursive(content_dir, template_path, dest_dir, workers=None, manifest=None, cache=None, block_cache=None, shard=None, asset_urls=None, collect=None, page_texts=None):
+    """
+    Generates a HTML page for every markdown file under the content directory. Pages are written to the
+    destination directory with the same directory layout, replacing the '.md' extension with '.html'.
+
+    Pages are rendered in a process pool, since the markdown parser is CPU-bound.
+
+    Args:
+        content_dir (str): The directory containing the markdown files.
+        template_path (str): The path to the template file.
+        dest_dir (str): The directory to write the HTML pages to.
+        workers (int): The number of worker processes to use. Defaults to the number of CPUs.
+            A value of 1 renders every page in the current process.
+        manifest (dict): The build manifest from the previous build. When given, only pages whose markdown
+            or template changed are rendered, and pages whose markdown was deleted are removed.
+        cache (PageCache): A cache of rendered page bodies. Pages whose markdown is in the cache are only
+            wrapped in the template, without parsing the markdown again.
+        block_cache (BlockCache): A cache of rendered blocks, kept across builds by watch mode. Pages rendered
+            in this process add to it. Forked worker processes see it as it was when the pool started, and
+            what they add is lost with them.
+        shard (tuple[int, int]): Generate only the pages in this (index, count) shard, see shard_of. Pages of
+            other shards are left out of the manifest, like pages that do not exist.
+        asset_urls (dict): URLs to rewrite in the links and images of the pages and in the href and src
+            attributes of the template, see fingerprint_assets. Every page is rendered again when the map
+            changes. The page cache must be keyed by the same map, see PageCache.
+        collect: A function of the path of a page relative to the content directory, True for the pages
+            whose title, words and links are to be recorded while they are rendered, see PageText. Those
+            pages are rendered even if they did not change. They skip the page cache, whose entries hold
+            only the HTML, and take the text of their blocks from the block cache with the HTML.
+        page_texts (dict): Filled with the PageText of each page collect selected, by relative path.
+
+    Returns:
+        list[str]: The paths of the generated pages.
+    """
+    global _worker_block_cache
+    _worker_block_cache = block_cache # Before the pool starts, so forked workers inherit it
+    assets_key = urls_digest(asset_urls)
+    if block_cache is not None:
+        block_cache.use_variant(assets_key)
+
+    with stage("select pages"):
+        template = load_template(template_path) # Compiled once for the whole build, and reused while its files are unchanged
+        template = rewrite_urls(template, asset_urls)
+
+        prefix_length = len(os.path.join(content_dir, ""))
+        all_jobs = find_pages(content_dir, dest_dir)
+        if shard is not None:
+            all_jobs = [job for job in all_jobs if in_shard(job[0][prefix_length:], shard)]
+        jobs = all_jobs
+        if manifest is not None:
+            jobs = select_changed_pages(all_jobs, content_dir, dest_dir, template, manifest, assets_key)
+        collected = set()
+        if collect is not None:
+            collected = {job for job in all_jobs if collect(job[0][prefix_length:])} # After select_changed_pages, which updates the manifest's records
+            jobs = sorted(collected.union(jobs))
+
+    # Create the destination directories up front, so the workers only have to write files
+    for dest_subdir in {os.path.dirname(dest_path) for _, dest_path in jobs}:
+        os.makedirs(dest_subdir, exist_ok=True)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    from_paths = [from_path for from_path, _ in jobs]
+    dest_paths = [dest_path for _, dest_path in jobs]
+    collects = [job in collected for job in jobs]
+
+    if workers <= 1 or len(jobs) <= 1:
+        _init_worker(template, cache, asset_urls=asset_urls)
+        for from_path, dest_path, collect_page in zip(from_paths, dest_paths, collects):
+            page_text = _generate_page_worker(from_path, dest_path, collect_page)
+            if page_text is not None:
+                page_texts[from_path[prefix_length:]] = page_text
+    else:
+        # Hand out pages in chunks, to keep the per-task overhead low on sites with many small pages
+        chunksize = max(1, len(jobs) // (workers * 8))
+        profile = profiler.is_enabled()
+        worker = _profile_page_worker if profile else _generate_page_worker
+        with stage("wait for workers"), ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(template, cache, profile, asset_urls)) as executor:
+            for from_path, result in zip(from_paths, executor.map(worker, from_paths, dest_paths, collects, chunksize=chunksize)):
+                if profile:
+                    result, events = result
+                    profiler.record(events) # The page's stage timings, recorded in the worker
+                if result is not None:
+                    page_texts[from_path[prefix_length:]] = result
+
+    print(f"Generated {len(jobs)} pages from {content_dir} to {dest_dir}")
+    return dest_paths
+
+def find_pages(content_dir, dest_dir) -> list[tuple[str, str]]:
+    """
+    Finds every markdown file under the content directory and pairs it with its destination path.
+
+    Args:
+        content_dir (str): The directory containing the markdown files.
+        dest_dir (str): The directory the HTML pages will be written to.
+
+    Returns:
+        list[tuple[str, str]]: A sorted list of (markdown_path, html_path) tuples.
+    """
+    jobs = []
+    prefix_length = len(os.path.join(content_dir, "")) # Slicing off the prefix is much cheaper than os.path.relpath
+    for root, dirs, files in os.walk(content_dir):
+        for file in files:
+            if not file.endswith(".md"):
+                continue
+            from_path = os.path.join(root, file)
+            rel_path = from_path[prefix_length:]
+            dest_path = os.path.join(dest_dir, rel_path[:-len(".md")] + ".html")
+            jobs.append((from_path, dest_path))
+
+    jobs.sort()
+    return jobs
+
+def select_changed_pages(jobs, content_dir, dest_dir, template, manifest, assets_key="") -> list[tuple[str, str]]:
+    """
+    Filters the page jobs down to the pages that have to be rendered again, and removes the pages whose
+    markdown file was deleted. The manifest's "template" and "pages" records are updated in place.
+
+    Args:
+        jobs (list[tuple[str, str]]): Every (markdown_path, html_path) tuple in the content directory.
+        content_dir (str): The directory containing the markdown files.
+        dest_dir (str): The directory the HTML pages are written to.
+        template (Template): The page template. Pages are rebuilt when the template or any file it was
+            composed from changed in a way that changes the composed template.
+        manifest (dict): The build manifest from the previous build.
+        assets_key (str): The digest of the asset URL map the pages are rendered with, see urls_digest.
+            Pages are rebuilt when it changed.
+
+    Returns:
+        list[tuple[str, str]]: The (markdown_path, html_path) tuples that need to be rendered.
+    """
+    previous_template = manifest.get("template")
+    template_record = {"hash": template.digest(), "files": sorted(template.dependencies)}
+    if assets_key:
+        template_record["assets"] = assets_key
+    template_changed = previous_template is None or previous_template.get("hash") != template_record["hash"]
+    template_changed = template_changed or previous_template.get("assets") != template_record.get("assets")
+    template_changed = template_changed or manifest.get("parser") != PARSER_VERSION # A parser change affects every page
+
+    previous = manifest.get("pages", {})
+    current = {}
+    changed = []
+    prefix_length = len(os.path.join(content_dir, ""))
+
+    for from_path, dest_path in jobs:
+        rel_path = from_path[prefix_length:] # The jobs come from find_pages, so every path starts with content_dir
+        old_record = previous.get(rel_path)
+        record = file_record(from_path, old_record)
+        current[rel_path] = record
+
+        if template_changed or old_record is None or old_record["hash"] != record["hash"] or not os.path.exists(dest_path):
+            changed.append((from_path, dest_path))
+
+    # Remove the pages whose markdown was deleted since the last build
+    for rel_path in previous:
+        if rel_path not in current:
+            remove_output(os.path.join(dest_dir, rel_path[:-len(".md")] + ".html"), dest_dir)
+
+    manifest["template"] = template_record
+    manifest["parser"] = PARSER_VERSION
+    manifest["pages"] = current
+    return changed
+
+def _init_worker(template: Template, cache=None, profile=False, asset_urls=None):
+    """
+    Stores the compiled template, the page cache and the asset URL map in the worker process, so each
+    worker gets them once per build rather than once per page. With profile, the worker records the
+    stages of each page in a fresh profiler, rather than one inherited from the main process by fork.
+    """
+    global _worker_template, _worker_cache, _worker_asset_urls
+    _worker_template = template
+    _worker_cache = cache
+    _worker_asset_urls = asset_urls
+    if profile:
+        profiler.disable()
+        profiler.enable()
+
+def _generate_page_worker(from_path: str, dest_path: str, collect: bool=False):
+    """
+    Renders one markdown file with the worker's template and writes it to the destination path. With
+    collect, the page is rendered without the page cache and its PageText is returned, otherwise None.
+    """
+    with stage(from_path, cat="page"), using_asset_urls(_worker_asset_urls):
+        if not collect:
+            write_page_file(from_path, _worker_template, dest_path, _worker_cache, _worker_block_cache)
+            return None
+        with collecting_page_text(tokenize) as page_text:
+            write_page_file(from_path, _worker_template, dest_path, None, _worker_block_cache)
+    return page_text
+
+def _profile_page_worker(from_path: str, dest_path: str, collect: bool=False) -> tuple:
+    """
+    Renders one page in a worker process and returns its PageText, if collected, and the profiler events
+    it recorded.
+    """
+    page_text = _generate_page_worker(from_path, dest_path, collect)
+    return page_text, profiler.drain()
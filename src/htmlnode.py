@@ -1,4 +1,6 @@
 class HTMLNode:
+    __slots__ = ("tag", "value", "children", "props") # No per-instance __dict__, pages create hundreds of thousands of nodes
+
     def __init__(self, tag: str=None, value: str=None, children: list=None, props: dict=None):
         self.tag = tag
         self.value = value
@@ -14,15 +16,41 @@ class HTMLNode:
             NotImplementedError: If the method is not implemented by a subclass.
         """
         raise NotImplementedError()
+
+    def write_fragments(self, write):
+        """
+        Pass the HTML of the node to the write callable, one fragment at a time.
+
+        Parent nodes override this to write their children into the same buffer, so a whole tree is
+        rendered into one list and joined once at the root. By default the node writes its to_html() output.
+
+        Args:
+            write: A callable taking a string, such as list.append
+        """
+        write(self.to_html())
+
+    def write_html(self, fp):
+        """
+        Stream the HTML of the node into a file-like object, without building the whole string first.
+
+        Args:
+            fp: A file-like object with a write method
+        """
+        self.write_fragments(fp.write)
+
+    def iter_html(self):
+        """
+        Yield the HTML of the node one fragment at a time.
+
+        Yields:
+            str: The next fragment of HTML
+        """
+        yield self.to_html()
     
     def props_to_html(self):
-        props_string = ""
-        if self.props is None:
-            return props_string
-        for key in self.props:
-            value = self.props[key]
-            props_string += f" {key}=\"{value}\""
-        return props_string
+        if not self.props: # None or an empty dict
+            return ""
+        return "".join([f" {key}=\"{value}\"" for key, value in self.props.items()])
 
     def __repr__(self):
         return f"tag= {self.tag}, value= {self.value}, children= {self.children}, props= {self.props}"
\ No newline at end of file
@@ -1,6 +1,21 @@
 import re
 from textnode import TextNode, TextType
 
+IMAGE_PATTERN = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+LINK_PATTERN = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+
+# One pattern for every inline element, used by text_to_textnodes to scan the text in a single pass.
+# At any position the alternatives are tried in order, so '**' is read as bold before '*' is read as italic.
+# Link and image text cannot contain '*' or '`', so emphasis and code spans are never cut in half by a link.
+INLINE_PATTERN = re.compile(
+    r"!\[(?P<image_text>[^\[\]*`]*)\]\((?P<image_url>[^\(\)*`]*)\)"
+    r"|(?<!!)\[(?P<link_text>[^\[\]*`]*)\]\((?P<link_url>[^\(\)*`]*)\)"
+    r"|\*\*(?P<bold>.*?)\*\*"
+    r"|\*(?P<italic>[^*]+)\*"
+    r"|`(?P<code>[^`]*)`",
+    re.DOTALL
+)
+
 def split_nodes_delimiter(old_nodes: list[TextNode], delimiter, text_type) -> list[TextNode]:
     """
     Splits the given list of TextNode objects by the specified delimiter.
@@ -48,25 +63,20 @@ def split_nodes_image(old_nodes: list[TextNode]) -> list[TextNode]:
             raise ValueError(f"node text type {node.text_type} is not an instance of TextType")
         
         if node.text_type == TextType.TEXT:
-            image_text = extract_markdown_images(node.text)
             node_text = node.text
-            
-            if len(image_text) > 0: # At least 1 image was found in the node
-                for alt_text, image_url in image_text:
-                    split_text = node_text.split(f"![{alt_text}]({image_url})", maxsplit=1)
-                    
-                    if split_text[0] != "": # There is text before the image
-                        new_nodes.append(TextNode(split_text[0], TextType.TEXT))
-                    
-                    new_nodes.append(TextNode(alt_text, TextType.IMAGE, image_url))
-                    
-                    node_text = split_text[1] if len(split_text) > 1 else ""
-                
-                if node_text != "": # There is text after the last image
-                    new_nodes.append(TextNode(node_text, TextType.TEXT))
-
-            else: # No image was found in the node
+            position = 0 # End of the last image found in the node
+
+            for match in IMAGE_PATTERN.finditer(node_text):
+                if match.start() > position: # There is text before the image
+                    new_nodes.append(TextNode(node_text[position:match.start()], TextType.TEXT))
+
+                new_nodes.append(TextNode(match.group(1), TextType.IMAGE, match.group(2)))
+                position = match.end()
+
+            if position == 0: # No image was found in the node
                 new_nodes.append(node)
+            elif position < len(node_text): # There is text after the last image
+                new_nodes.append(TextNode(node_text[position:], TextType.TEXT))
         
         else: # The node is not text
             new_nodes.append(node)
@@ -89,25 +99,20 @@ def split_nodes_link(old_nodes: list[TextNode]) -> list[TextNode]:
             raise ValueError(f"node text type {node.text_type} is not an instance of TextType")
         
         if node.text_type == TextType.TEXT:
-            link_text = extract_markdown_links(node.text)
             node_text = node.text
-            
-            if len(link_text) > 0: # At least 1 link was found in the node
-                for link_words, link_url in link_text:
-                    split_text = node_text.split(f"[{link_words}]({link_url})", maxsplit=1)
-                    
-                    if split_text[0] != "": # There is text before the link
-                        new_nodes.append(TextNode(split_text[0], TextType.TEXT))
-
-                    new_nodes.append(TextNode(link_words, TextType.LINK, link_url))
+            position = 0 # End of the last link found in the node
 
-                    node_text = split_text[1] if len(split_text) > 1 else ""
+            for match in LINK_PATTERN.finditer(node_text):
+                if match.start() > position: # There is text before the link
+                    new_nodes.append(TextNode(node_text[position:match.start()], TextType.TEXT))
 
-                if node_text != "": # There is text after the last link
-                    new_nodes.append(TextNode(node_text, TextType.TEXT))
+                new_nodes.append(TextNode(match.group(1), TextType.LINK, match.group(2)))
+                position = match.end()
 
-            else: # No link was found in the node
+            if position == 0: # No link was found in the node
                 new_nodes.append(node)
+            elif position < len(node_text): # There is text after the last link
+                new_nodes.append(TextNode(node_text[position:], TextType.TEXT))
 
         else: # The node is not text
             new_nodes.append(node)
@@ -124,9 +129,7 @@ def extract_markdown_images(text: str) -> list[tuple]:
     Returns:
         list[tuple]: A list of tuples containing the image URLs and their alt text.
     """
-    pattern = r"!\[([^\[\]]*)\]\(([^\(\)]*)\)"
-    matches = re.findall(pattern, text)
-    return matches
+    return IMAGE_PATTERN.findall(text)
 
 def extract_markdown_links(text: str) -> list[tuple]:
     """
@@ -138,9 +141,7 @@ def extract_markdown_links(text: str) -> list[tuple]:
     Returns:
         list[tuple]: A list of tuples containing the link URLs and their link text.
     """
-    pattern = r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)"
-    matches = re.findall(pattern, text)
-    return matches
+    return LINK_PATTERN.findall(text)
 
 def text_to_textnodes(text: str) -> list[TextNode]:
     """
@@ -157,33 +158,51 @@ def text_to_textnodes(text: str) -> list[TextNode]:
     
     # Check if this is a list-like paragraph
     lines = text.split('\n')
-    has_list_items = any(line.lstrip().startswith(('*', '1.')) for line in lines)
+    has_list_items = any(line.lstrip().startswith(('* ', '- ', '1. ')) for line in lines) # Not "**bold**" or "1.5"
     
     if has_list_items:
         # If it's list-like, just treat it as plain text
         return [TextNode(text, TextType.TEXT)]
 
-    nodes = [TextNode(text, TextType.TEXT)] # Initialize with everything as a single node of type TEXT
-
-    types = [
-        TextType.BOLD,
-        TextType.ITALIC,
-        TextType.CODE,
-        TextType.LINK,
-        TextType.IMAGE
-    ]
-
-    for text_type in types:
-        match text_type:
-            case TextType.BOLD:
-                nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-            case TextType.ITALIC:
-                nodes = split_nodes_delimiter(nodes, "*", TextType.ITALIC)
-            case TextType.CODE:
-                nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-            case TextType.LINK:
-                nodes = split_nodes_link(nodes)
-            case TextType.IMAGE:
-                nodes = split_nodes_image(nodes)
-    
-    return nodes
\ No newline at end of file
+    # Splitting on the pattern gives the plain text before each element, followed by the element's seven
+    # groups (image text, image url, link text, link url, bold, italic, code), and the trailing plain text last
+    parts = INLINE_PATTERN.split(text)
+    nodes = []
+
+    for i in range(0, len(parts) - 1, 8):
+        if parts[i] != "": # There is plain text before the element
+            nodes.append(plain_text_node(parts[i]))
+
+        image_text, image_url, link_text, link_url, bold, italic, code = parts[i + 1:i + 8]
+        if image_url is not None:
+            nodes.append(TextNode(image_text, TextType.IMAGE, image_url))
+        elif link_url is not None:
+            nodes.append(TextNode(link_text, TextType.LINK, link_url))
+        elif bold is not None:
+            nodes.append(TextNode(bold, TextType.BOLD))
+        elif italic is not None:
+            nodes.append(TextNode(italic, TextType.ITALIC))
+        else:
+            nodes.append(TextNode(code, TextType.CODE))
+
+    if parts[-1] != "": # There is plain text after the last element
+        nodes.append(plain_text_node(parts[-1]))
+
+    return nodes
+
+def plain_text_node(text: str) -> TextNode:
+    """
+    Creates a TEXT node for the text between inline elements.
+
+    Args:
+        text (str): The plain text.
+
+    Returns:
+        TextNode: A TextNode of type TEXT.
+
+    Raises:
+        ValueError: If the text still contains a '*' or '`' delimiter, which means it was never closed.
+    """
+    if "*" in text or "`" in text:
+        raise ValueError(f"unmatched delimiter in text {text}")
+    return TextNode(text, TextType.TEXT)
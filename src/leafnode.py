@@ -1,6 +1,8 @@
 from htmlnode import HTMLNode
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag: str, value: str, props: dict):
         if value is None:
             raise ValueError("value cannot be None")
@@ -0,0 +1,118 @@
+import os
+import posixpath
+import urllib.parse
+from search_index import page_url
+
+def has_links(manifest: dict, rel_path: str) -> bool:
+    """
+    Check whether the manifest's "links" records hold the links of a page as it is in its "pages" and
+    "template" records, that is collected from the same markdown with the same asset URL map.
+    """
+    record = manifest.get("links", {}).get(rel_path)
+    assets_key = (manifest.get("template") or {}).get("assets", "")
+    return record is not None and record["hash"] == manifest["pages"][rel_path]["hash"] and record["assets"] == assets_key
+
+def update_links(manifest: dict, page_texts: dict, enabled: bool=True) -> list[str]:
+    """
+    Bring the manifest's "links" records, the URLs each page links to, up to date with the pages of the
+    build. The links of the pages are recorded while they are rendered, see PageText. Only the records of
+    pages whose markdown changed since their links were collected, or which were rendered with a
+    different asset URL map, are replaced.
+
+    Args:
+        manifest (dict): The build manifest, with the "pages" and "template" records of this build.
+        page_texts (dict): The PageText of every page without up to date links, see has_links, by
+            relative path.
+        enabled (bool): False drops the records.
+
+    Returns:
+        list[str]: The relative paths of the pages whose records were replaced
+    """
+    if not enabled:
+        manifest["links"] = {}
+        return []
+
+    assets_key = (manifest.get("template") or {}).get("assets", "")
+    previous = manifest.get("links", {})
+    current = {}
+    changed = []
+    for rel_path, record in sorted(manifest.get("pages", {}).items()):
+        if has_links(manifest, rel_path):
+            current[rel_path] = previous[rel_path]
+        else:
+            current[rel_path] = {"hash": record["hash"], "assets": assets_key, "links": sorted(page_texts[rel_path].links)}
+            changed.append(rel_path)
+    manifest["links"] = current
+    return changed
+
+def output_urls(manifest: dict) -> set[str]:
+    """
+    Build the set of URL paths a build serves, from the pages, static files and fingerprinted copies in
+    its manifest, such as "/blog/post.html" and "/images/logo.png".
+    """
+    urls = {page_url(rel_path) for rel_path in manifest.get("pages", {})}
+    urls.update("/" + rel_path.replace(os.sep, "/") for rel_path in manifest.get("static", {}))
+    urls.update("/" + record["path"].replace(os.sep, "/") for record in manifest.get("assets", {}).values())
+    return urls
+
+def resolve_link(base_url: str, url: str) -> str:
+    """
+    Work out the URL path a link on a page points to on the site.
+
+    Args:
+        base_url (str): The URL of the page, such as "/blog/post.html"
+        url (str): The link, such as "../images/logo.png#top"
+
+    Returns:
+        str: The decoded URL path, such as "/images/logo.png", or None for links that are not to a path
+            on the site: links with a scheme or a host, and links to a fragment or query of the same page
+    """
+    parts = urllib.parse.urlsplit(url)
+    if parts.scheme or parts.netloc or not parts.path:
+        return None
+    path = urllib.parse.unquote(parts.path)
+    if not path.startswith("/"):
+        path = posixpath.join(posixpath.dirname(base_url), path)
+    resolved = posixpath.normpath(path)
+    if path.endswith("/") and resolved != "/":
+        resolved += "/" # normpath drops the trailing slash, which selects the directory's index page
+    return resolved
+
+def is_served(path: str, outputs: set[str]) -> bool:
+    """
+    Check whether a URL path resolves to an output the way the site is served: a path ending in a slash,
+    or naming a directory, is served by that directory's index.html.
+    """
+    if path.endswith("/"):
+        return path + "index.html" in outputs
+    return path in outputs or path + "/index.html" in outputs
+
+def find_broken_links(manifest: dict) -> list[tuple[str, str]]:
+    """
+    Check every link recorded in the manifest against the outputs of the build. Each check is a set
+    lookup, so the time is linear in the number of links and outputs.
+
+    Args:
+        manifest (dict): The build manifest, with the "links" records, see update_links
+
+    Returns:
+        list[tuple[str, str]]: The (markdown path, link) of every link to a path that is not served, sorted
+    """
+    outputs = output_urls(manifest)
+    broken = []
+    for rel_path, record in sorted(manifest.get("links", {}).items()):
+        base_url = page_url(rel_path)
+        for url in record["links"]:
+            path = resolve_link(base_url, url)
+            if path is not None and not is_served(path, outputs):
+                broken.append((rel_path, url))
+    return broken
+
+def report_broken_links(broken: list[tuple[str, str]]):
+    """
+    Print the broken links found by find_broken_links.
+    """
+    for rel_path, url in broken:
+        print(f"Broken link in {rel_path}: {url}")
+    if broken:
+        print(f"Found {len(broken)} broken links")
@@ -1,20 +1,96 @@
 import os
-from copy_files import copy_files
-from markdown import extract_title
+import sys
+import argparse
+from build import build_site, merge_shards
+from watch import watch
+from serve import serve
+import profiler
+from page_cache import CACHE_DIR_NAME
+from copy_files import COPY_STRATEGIES
+from compress import ENCODINGS
+from shard import parse_shard
+from search_index import SEARCH_INDEX_NAME
+from link_check import find_broken_links, report_broken_links
 
 dir_path = os.path.dirname(os.path.realpath(__file__))
 
 static_path = os.path.join(os.path.dirname(dir_path), "static")
 public_path = os.path.join(os.path.dirname(dir_path), "public")
+content_path = os.path.join(os.path.dirname(dir_path), "content")
+template_path = os.path.join(dir_path, "template.html")
+cache_path = os.path.join(os.path.dirname(dir_path), CACHE_DIR_NAME)
+trace_path = os.path.join(os.path.dirname(dir_path), "ssg-trace.json")
+
+def shard_argument(text: str) -> tuple[int, int]:
+    try:
+        return parse_shard(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
 
 def main():
     #print(f"Working Directory: {dir_path}")
     #print(f"Static Path: {static_path}")
     #print(f"Public Path: {public_path}")
-    copy_files(static_path, public_path)
+    parser = argparse.ArgumentParser(description="Build the static site into the public directory")
+    parser.add_argument("command", nargs="?", choices=("build", "serve", "merge"), default="build", help="build the site, build it and serve it from memory, or merge the public directories of a sharded build (default: build)")
+    parser.add_argument("shard_dirs", nargs="*", metavar="SHARD_DIR", help="with merge: the public directories the shards were built into")
+    parser.add_argument("--public-dir", default=public_path, help="directory to build or merge the site into (default: public)")
+    parser.add_argument("--shard", type=shard_argument, metavar="I/N", help="build only the I-th of N slices of the content and static files, for merging later")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes used to render pages (default: number of CPUs)")
+    parser.add_argument("--full", action="store_true", help="ignore the build manifest and rebuild everything")
+    parser.add_argument("--no-cache", action="store_true", help="parse every rebuilt page instead of reusing cached page bodies")
+    parser.add_argument("--cache-size", type=int, default=256, help="size limit of the page cache in MB (default: 256)")
+    parser.add_argument("--copy-strategy", choices=COPY_STRATEGIES, default="auto", help="how static files are copied into the public directory (default: auto)")
+    parser.add_argument("--compress", action="append", choices=ENCODINGS, default=[], help="write a precompressed copy of every HTML, CSS and JS output in this encoding, repeat for several (default: none)")
+    parser.add_argument("--fingerprint", action="store_true", help="write a copy of every static file named after its content hash, and point the pages and template at the copies")
+    parser.add_argument("--search", action="store_true", help=f"write a full-text search index of the pages to {SEARCH_INDEX_NAME}")
+    parser.add_argument("--check-links", action="store_true", help="report links and images to paths the site does not serve, and exit with status 1 if there are any")
+    parser.add_argument("--watch", action="store_true", help="serve the site, rebuild on every change and reload open browsers")
+    parser.add_argument("--port", type=int, default=8888, help="port to serve the site on (default: 8888)")
+    parser.add_argument("--profile", action="store_true", help="time every build stage and page, print a report and write a Chrome trace")
+    parser.add_argument("--profile-trace", default=trace_path, help="where --profile writes the trace-event JSON (default: ssg-trace.json)")
+    parser.add_argument("--profile-top", type=int, default=10, help="number of slowest pages --profile reports (default: 10)")
+    args = parser.parse_args()
+    if args.shard_dirs and args.command != "merge":
+        parser.error("shard directories are only accepted by merge")
+    if args.shard is not None and args.watch:
+        parser.error("--shard cannot be used with --watch")
 
+    if args.command == "merge":
+        if not args.shard_dirs:
+            parser.error("merge needs the public directory of every shard")
+        try:
+            manifest = merge_shards(args.shard_dirs, args.public_dir, args.copy_strategy)
+        except ValueError as e:
+            sys.exit(f"Error: {e}")
+        print(f"Merged {len(args.shard_dirs)} shards with {len(manifest['pages'])} pages and {len(manifest['static'])} static files into {args.public_dir}")
+        broken = find_broken_links(manifest) # Only shards built with --check-links recorded their links
+        report_broken_links(broken)
+        if broken:
+            sys.exit(1)
+        return
 
+    cache_dir = None if args.no_cache else cache_path
+    build_options = dict(workers=args.workers, cache_dir=cache_dir, cache_size=args.cache_size * 1024 * 1024, copy_strategy=args.copy_strategy, compress=tuple(args.compress), fingerprint=args.fingerprint, search=args.search, check_links=args.check_links)
+    if args.watch:
+        if args.full:
+            build_site(static_path, content_path, template_path, args.public_dir, full=True, **build_options)
+        watch(static_path, content_path, template_path, args.public_dir, port=args.port, **build_options)
+        return
 
+    if args.profile:
+        profiler.enable()
+    manifest = build_site(static_path, content_path, template_path, args.public_dir, full=args.full, shard=args.shard, **build_options)
+    if args.profile:
+        build_profile = profiler.disable()
+        print(build_profile.report(args.profile_top))
+        build_profile.write_trace(args.profile_trace)
+        print(f"Wrote trace to {args.profile_trace}")
+    if args.command == "serve":
+        serve(args.public_dir, port=args.port)
+    elif args.check_links and args.shard is None and find_broken_links(manifest):
+        sys.exit(1) # The broken links were reported by the build
 
 
-main()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
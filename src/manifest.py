@@ -0,0 +1,115 @@
+import os
+import json
+import hashlib
+
+MANIFEST_NAME = ".ssg-manifest.json"
+MANIFEST_VERSION = 1
+
+def new_manifest() -> dict:
+    """
+    Create an empty build manifest.
+
+    Returns:
+        manifest: A dict with an empty record for the parser version, the template, the pages, the static files,
+            the precompressed outputs, the fingerprinted assets, the pages in the search index, the links of
+            each page and the shard the build covered
+    """
+    return {"version": MANIFEST_VERSION, "parser": None, "template": None, "pages": {}, "static": {}, "compressed": {}, "assets": {}, "search": {}, "links": {}, "shard": None}
+
+def load_manifest(path: str) -> dict:
+    """
+    Load the build manifest from disk. A missing, unreadable or outdated manifest is treated as empty,
+    which makes the next build a full build.
+
+    Args:
+        path (str): The path to the manifest file
+
+    Returns:
+        manifest: The manifest dict
+    """
+    try:
+        with open(path, "r") as manifest_file:
+            manifest = json.load(manifest_file)
+    except (OSError, ValueError):
+        return new_manifest()
+
+    if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+        return new_manifest()
+
+    return manifest
+
+def save_manifest(manifest: dict, path: str):
+    """
+    Write the build manifest to disk. The file is replaced atomically, so an interrupted build never
+    leaves a half-written manifest behind. It is written without indentation, which lets json use its
+    C encoder, since watch mode saves it after every edit.
+
+    Args:
+        manifest (dict): The manifest dict
+        path (str): The path to the manifest file
+
+    Returns:
+        None
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as manifest_file:
+        manifest_file.write(json.dumps(manifest, separators=(",", ":"), sort_keys=True))
+    os.replace(tmp_path, path)
+
+def hash_file(path: str) -> str:
+    """
+    Hash the contents of a file.
+
+    Args:
+        path (str): The path to the file
+
+    Returns:
+        digest: The hex sha256 digest of the file contents
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def file_record(path: str, previous: dict=None) -> dict:
+    """
+    Build the manifest record for a file. When the size and modification time match the previous
+    record, its hash is reused instead of reading the file again.
+
+    Args:
+        path (str): The path to the file
+        previous (dict): The record of the file from the previous build, if any
+
+    Returns:
+        record: A dict with the hash, size and mtime of the file
+    """
+    stat = os.stat(path)
+    if previous is not None and previous.get("size") == stat.st_size and previous.get("mtime") == stat.st_mtime_ns:
+        file_hash = previous["hash"]
+    else:
+        file_hash = hash_file(path)
+    return {"hash": file_hash, "size": stat.st_size, "mtime": stat.st_mtime_ns}
+
+def remove_output(path: str, root: str):
+    """
+    Remove a generated file, along with any parent directories it leaves empty below the root.
+
+    Args:
+        path (str): The path to the generated file
+        root (str): The output root directory, which is never removed
+
+    Returns:
+        None
+    """
+    if os.path.exists(path):
+        os.remove(path)
+
+    root = os.path.abspath(root)
+    parent = os.path.dirname(os.path.abspath(path))
+    while parent != root and parent.startswith(root + os.sep):
+        try:
+            os.rmdir(parent) # Only succeeds if the directory is empty
+        except OSError:
+            break
+        parent = os.path.dirname(parent)
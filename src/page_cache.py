@@ -0,0 +1,153 @@
+import os
+import shutil
+import hashlib
+from block_markdown import PARSER_VERSION
+
+CACHE_DIR_NAME = ".ssg-cache"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+class PageCache:
+    """
+    An on-disk cache of rendered page bodies, keyed by a hash of the markdown and the parser version,
+    and of the variant, such as the asset URL map, the bodies are rendered with.
+
+    Each entry is the HTML of one page body, stored in its own file. Reading an entry refreshes its mtime,
+    so prune() can evict the least recently used entries once the cache grows past max_bytes.
+    """
+    def __init__(self, cache_dir: str, max_bytes: int=DEFAULT_MAX_BYTES, variant: str=""):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.variant = variant
+
+    def key(self, markdown: str) -> str:
+        """
+        Compute the cache key of a markdown string.
+
+        Args:
+            markdown (str): The markdown content of a page
+
+        Returns:
+            key: The hex sha256 digest of the parser version, the variant and the markdown
+        """
+        digest = hashlib.sha256(PARSER_VERSION.encode())
+        digest.update(b"\0")
+        if self.variant:
+            digest.update(self.variant.encode())
+            digest.update(b"\0")
+        digest.update(markdown.encode())
+        return digest.hexdigest()
+
+    def entry_path(self, key: str) -> str:
+        """
+        Get the path of the cache entry for a key. Entries are spread over subdirectories named after the
+        first two characters of the key, to keep directories small.
+        """
+        return os.path.join(self.cache_dir, key[:2], key + ".html")
+
+    def get(self, key: str) -> str:
+        """
+        Look up a cache entry, marking it as recently used.
+
+        Args:
+            key (str): The cache key
+
+        Returns:
+            path: The path of the entry, or None on a miss
+        """
+        path = self.entry_path(key)
+        try:
+            os.utime(path) # Refresh the mtime, which is what the LRU eviction orders by
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, key: str, write_body) -> str:
+        """
+        Store a cache entry. The entry is written to a temporary file first and moved into place, so
+        concurrent builds never see a partial entry.
+
+        Args:
+            key (str): The cache key
+            write_body: A callable that writes the page body into the file object it is given
+
+        Returns:
+            path: The path of the new entry
+        """
+        path = self.entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w") as entry_file:
+                write_body(entry_file)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return path
+
+    def get_or_render(self, markdown: str, write_body) -> str:
+        """
+        Get the cache entry for a markdown string, rendering and storing it on a miss.
+
+        Args:
+            markdown (str): The markdown content of a page
+            write_body: A callable that writes the page body into the file object it is given
+
+        Returns:
+            path: The path of the entry
+        """
+        key = self.key(markdown)
+        path = self.get(key)
+        if path is None:
+            path = self.put(key, write_body)
+        return path
+
+    def prune(self) -> int:
+        """
+        Evict the least recently used entries until the cache fits in max_bytes. Only the entry
+        subdirectories are counted, so files kept at the top of the cache directory, such as the block
+        cache watch mode saves there, neither take up the budget nor get evicted.
+
+        Returns:
+            int: The number of entries removed
+        """
+        entries = []
+        total = 0
+        for root, dirs, files in os.walk(self.cache_dir):
+            if root == self.cache_dir:
+                continue # Entries are always in a subdirectory, see entry_path
+            for file in files:
+                path = os.path.join(root, file)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, path))
+                total += stat.st_size
+
+        removed = 0
+        entries.sort() # Oldest first
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+
+        return removed
+
+def copy_entry(path: str, fp):
+    """
+    Copy a cache entry into a file-like object, in chunks.
+
+    Args:
+        path (str): The path of the entry
+        fp: A file-like object with a write method
+    """
+    with open(path, "r") as entry_file:
+        shutil.copyfileobj(entry_file, fp)
@@ -1,6 +1,9 @@
 from htmlnode import HTMLNode
+from leafnode import LeafNode
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children: list[HTMLNode], props: dict=None):
         if props is None:
             props = {}
@@ -15,10 +18,72 @@ class ParentNode(HTMLNode):
         super().__init__(tag, None, children, props)
 
     def to_html(self):
-        output_string = ""
-        for child in self.children:
-            if not isinstance(child, HTMLNode):
-                raise ValueError(f"child {child} is not an instance of HTMLNode")
-            output_string += child.to_html()
+        fragments = [] # Every node in the tree appends to this one list
+        self.write_fragments(fragments.append)
+        return "".join(fragments)
+
+    def write_fragments(self, write):
+        # Walk the tree with an explicit stack instead of recursing, so deep trees cannot hit the
+        # recursion limit. Each entry holds the iterator over a parent's remaining children and the
+        # parent's closing tag. Children were validated by the constructor, so they are only dispatched
+        # on their exact class here, and anything unexpected takes the slow path.
+        stack = []
+        write(f"<{self.tag}{self.props_to_html()}>")
+        children = iter(self.children)
+        closing = f"</{self.tag}>"
+        while True:
+            for child in children:
+                cls = child.__class__
+                if cls is LeafNode:
+                    write(child.value if child.tag is None else child.to_html()) # Plain text needs no formatting
+                elif cls is ParentNode:
+                    stack.append((children, closing))
+                    tag = child.tag
+                    write(f"<{tag}{child.props_to_html()}>")
+                    children = iter(child.children)
+                    closing = f"</{tag}>"
+                    break # Carry on with the child's children
+                else:
+                    write_other_child(child, write)
+            else:
+                write(closing)
+                if not stack:
+                    return
+                children, closing = stack.pop()
+
+    def iter_html(self):
+        # The same walk as write_fragments, yielding the fragments instead
+        stack = []
+        yield f"<{self.tag}{self.props_to_html()}>"
+        children = iter(self.children)
+        closing = f"</{self.tag}>"
+        while True:
+            for child in children:
+                cls = child.__class__
+                if cls is LeafNode:
+                    yield child.value if child.tag is None else child.to_html()
+                elif cls is ParentNode:
+                    stack.append((children, closing))
+                    tag = child.tag
+                    yield f"<{tag}{child.props_to_html()}>"
+                    children = iter(child.children)
+                    closing = f"</{tag}>"
+                    break
+                else:
+                    if not isinstance(child, HTMLNode):
+                        raise ValueError(f"child {child} is not an instance of HTMLNode")
+                    yield from child.iter_html()
+            else:
+                yield closing
+                if not stack:
+                    return
+                children, closing = stack.pop()
 
-        return f"<{self.tag}{self.props_to_html()}>{output_string}</{self.tag}>"
+def write_other_child(child, write):
+    """
+    Render a child that is neither a plain LeafNode nor a plain ParentNode, such as a subclass with its
+    own rendering, or a non-node that was added to the children after the parent was built.
+    """
+    if not isinstance(child, HTMLNode):
+        raise ValueError(f"child {child} is not an instance of HTMLNode")
+    child.write_fragments(write)
@@ -0,0 +1,185 @@
+import os
+import json
+import time
+import threading
+import contextlib
+
+_active = None # The Profiler recording in this process, or None when profiling is off
+_null_stage = contextlib.nullcontext()
+
+class Profiler:
+    """
+    Records the wall and CPU time of build stages as Chrome trace events.
+
+    Stages nest: each event records its own total time and its self time, the part not spent in the
+    stages nested inside it, so the summary can attribute every millisecond to exactly one stage.
+    """
+    def __init__(self):
+        self.events = []
+        self.stack = [] # The open stages, innermost last. Stages are only timed on the thread running the build
+
+    def drain(self) -> list[dict]:
+        """
+        Take the events recorded so far, leaving the profiler empty. Worker processes use this to send
+        the events of each page back to the main process.
+        """
+        events = self.events
+        self.events = []
+        return events
+
+    def stage_totals(self) -> list[tuple[str, int, float, float]]:
+        """
+        Sum the self time of every stage.
+
+        Returns:
+            list[tuple[str, int, float, float]]: (stage, calls, wall ms, cpu ms) tuples, slowest first
+        """
+        totals = {}
+        for event in self.events:
+            if event["cat"] != "stage":
+                continue
+            total = totals.setdefault(event["name"], [0, 0.0, 0.0])
+            total[0] += 1
+            total[1] += event["args"]["self_ms"]
+            total[2] += event["args"]["self_cpu_ms"]
+        return sorted(((name, calls, wall, cpu) for name, (calls, wall, cpu) in totals.items()), key=lambda total: -total[2])
+
+    def slowest_pages(self, top: int) -> list[tuple[str, float, float]]:
+        """
+        Find the pages that took longest to generate.
+
+        Returns:
+            list[tuple[str, float, float]]: (markdown path, wall ms, cpu ms) tuples, slowest first
+        """
+        pages = [(event["name"], event["dur"] / 1000, event["args"]["cpu_ms"]) for event in self.events if event["cat"] == "page"]
+        pages.sort(key=lambda page: -page[1])
+        return pages[:top]
+
+    def report(self, top: int=10) -> str:
+        """
+        Format the stage totals and the slowest pages as a table.
+        """
+        totals = self.stage_totals()
+        wall_total = sum(wall for _, _, wall, _ in totals) or 1.0
+        lines = [f"{'stage':<16} {'calls':>8} {'wall ms':>10} {'cpu ms':>10} {'wall %':>7}"]
+        for name, calls, wall, cpu in totals:
+            lines.append(f"{name:<16} {calls:>8} {wall:>10.1f} {cpu:>10.1f} {wall / wall_total * 100:>6.1f}%")
+
+        pages = self.slowest_pages(top)
+        if pages:
+            lines.append("")
+            lines.append(f"{'slowest pages':<60} {'wall ms':>10} {'cpu ms':>10}")
+            for path, wall, cpu in pages:
+                lines.append(f"{path:<60} {wall:>10.1f} {cpu:>10.1f}")
+        return "\n".join(lines)
+
+    def write_trace(self, path: str):
+        """
+        Write the events as a Chrome trace-event JSON file, which chrome://tracing and Perfetto can open.
+        """
+        with open(path, "w") as trace_file:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, trace_file)
+
+class Stage:
+    """
+    Times one stage of the build. Use through stage().
+    """
+    __slots__ = ("profiler", "name", "cat", "args", "start", "cpu_start", "child_ns", "child_cpu_ns")
+
+    def __init__(self, profiler: Profiler, name: str, cat: str, args: dict):
+        self.profiler = profiler
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.child_ns = 0
+        self.child_cpu_ns = 0
+
+    def __enter__(self):
+        self.profiler.stack.append(self)
+        self.cpu_start = time.thread_time_ns()
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        wall_ns = time.perf_counter_ns() - self.start
+        cpu_ns = time.thread_time_ns() - self.cpu_start
+        stack = self.profiler.stack
+        stack.pop()
+        if stack:
+            stack[-1].child_ns += wall_ns
+            stack[-1].child_cpu_ns += cpu_ns
+
+        args = self.args
+        args["cpu_ms"] = cpu_ns / 1e6
+        args["self_ms"] = (wall_ns - self.child_ns) / 1e6
+        args["self_cpu_ms"] = (cpu_ns - self.child_cpu_ns) / 1e6
+        self.profiler.events.append({
+            "name": self.name,
+            "cat": self.cat,
+            "ph": "X", # A complete event, with a start and a duration
+            "ts": self.start / 1000, # perf_counter is system-wide on Linux, so workers line up in the trace
+            "dur": wall_ns / 1000,
+            "pid": os.getpid(),
+            "tid": threading.get_native_id(),
+            "args": args,
+        })
+        return False
+
+def stage(name: str, cat: str="stage", **args):
+    """
+    Time a block of code as a build stage, when profiling is on.
+
+        with stage("parse"):
+            node = markdown_to_html_node(markdown)
+
+    When profiling is off this returns a shared no-op context manager, so instrumented code pays one
+    global lookup per stage.
+
+    Args:
+        name (str): The stage name, or the page path for page events
+        cat (str): "stage" for build stages, "page" for whole pages
+        args: Extra values stored with the trace event
+    """
+    if _active is None:
+        return _null_stage
+    return Stage(_active, name, cat, args)
+
+def enable() -> Profiler:
+    """
+    Start profiling in this process.
+
+    Returns:
+        Profiler: The profiler that records the stages
+    """
+    global _active
+    if _active is None:
+        _active = Profiler()
+    return _active
+
+def disable() -> Profiler:
+    """
+    Stop profiling in this process.
+
+    Returns:
+        Profiler: The profiler that recorded the stages, or None if profiling was off
+    """
+    global _active
+    profiler = _active
+    _active = None
+    return profiler
+
+def is_enabled() -> bool:
+    return _active is not None
+
+def drain() -> list[dict]:
+    """
+    Take the events recorded in this process so far.
+    """
+    return _active.drain() if _active is not None else []
+
+def record(events: list[dict]):
+    """
+    Add events recorded by another process, such as a page rendered by a worker.
+    """
+    if _active is not None:
+        _active.events.extend(events)
@@ -0,0 +1,445 @@
+import os
+import re
+import math
+import array
+import operator
+import itertools
+from manifest import remove_output
+
+SEARCH_INDEX_NAME = "search-index.bin" # The file the index is written to in the public directory
+INDEX_MAGIC = b"SSGS"
+INDEX_VERSION = 1
+TOKEN_PATTERN = re.compile(r"\w+")
+MAX_WORD_LENGTH = 40 # Longer tokens are hashes, URLs and the like, which nobody searches for
+COMPACT_RATIO = 0.25 # Removed documents may take up this share of the ids before the index is compacted
+
+class SearchIndex:
+    """
+    An inverted index of the words on a site's pages, written at build time for searching in the browser.
+
+    Every page is a document, numbered in the order it was added. The postings of a word are the ids of
+    the documents it appears in, ascending, and how often it appears in each, held in two arrays of 32-bit
+    integers rather than lists of Python ints.
+
+    Updates never renumber: removing a page only blanks its document, and a changed page is added again
+    at the end with a new id, so an update appends to the postings of the added page's words and leaves
+    every other word alone. The postings of a word read from a file are decoded the first time the word is
+    looked up or appended to, and words never touched are written back byte for byte. compact drops the
+    removed documents once they take up COMPACT_RATIO of the ids.
+
+    The file format, with every integer an unsigned LEB128 varint and every string a varint byte length
+    followed by UTF-8:
+
+        "SSGS" and a version byte
+        the document count, then per document its URL and title, both empty for a removed page
+        the word count, then per word in sorted order: the word, its posting count, the byte length of its
+            postings, the document ids as differences from the previous id (the first from 0), then the
+            number of times the word appears in each document
+    """
+    def __init__(self):
+        self.docs = [] # (url, title) of each document id, ("", "") for a removed page
+        self.ids = {} # URL -> document id of every page in the index
+        self.removed = 0 # Number of removed documents
+        self.postings = {} # Word -> (document ids, counts) arrays
+        self.encoded = {} # Word -> (posting count, encoded postings) of the words not decoded yet
+
+    def get_postings(self, word: str):
+        """
+        Look up the postings of a word, decoding them if they were read from a file.
+
+        Returns:
+            tuple[array, array]: The document ids and counts, or None if no page has the word
+        """
+        postings = self.postings.get(word)
+        if postings is None:
+            encoded = self.encoded.pop(word, None)
+            if encoded is None:
+                return None
+            postings = self.postings[word] = decode_postings(*encoded)
+        return postings
+
+    def add_page(self, url: str, title: str, counts: dict):
+        """
+        Add a page, replacing the page at the same URL if there is one.
+
+        Args:
+            url (str): The URL of the page
+            title (str): The title of the page
+            counts (dict): How often each word appears on the page, see PageText
+        """
+        self.remove_page(url)
+        doc_id = len(self.docs)
+        self.docs.append((url, title))
+        self.ids[url] = doc_id
+        for word, count in counts.items():
+            postings = self.get_postings(word)
+            if postings is None:
+                postings = self.postings[word] = (array.array("I"), array.array("I"))
+            postings[0].append(doc_id)
+            postings[1].append(count)
+
+    def remove_page(self, url: str) -> bool:
+        """
+        Remove a page. Its postings stay behind, unused, until compact.
+
+        Returns:
+            bool: True if the page was in the index
+        """
+        doc_id = self.ids.pop(url, None)
+        if doc_id is None:
+            return False
+        self.docs[doc_id] = ("", "")
+        self.removed += 1
+        return True
+
+    def compact(self):
+        """
+        Number the pages from 0 again without the removed documents, and drop their postings. Every word
+        is decoded.
+        """
+        remap = array.array("i") # Old document id -> new id, or -1 for a removed document
+        docs = []
+        for url, title in self.docs:
+            if url:
+                remap.append(len(docs))
+                docs.append((url, title))
+            else:
+                remap.append(-1)
+
+        for word in list(self.encoded):
+            self.get_postings(word)
+        postings = {}
+        for word, (ids, counts) in self.postings.items():
+            new_ids = array.array("I")
+            new_counts = array.array("I")
+            for doc_id, count in zip(ids, counts):
+                new_id = remap[doc_id]
+                if new_id >= 0:
+                    new_ids.append(new_id)
+                    new_counts.append(count)
+            if new_ids:
+                postings[word] = (new_ids, new_counts)
+
+        self.docs = docs
+        self.ids = {url: doc_id for doc_id, (url, _) in enumerate(docs)}
+        self.removed = 0
+        self.postings = postings
+
+    def merge(self, other: "SearchIndex"):
+        """
+        Add every page of another index, such as the index of another shard, after the pages of this one.
+        Pages already in this index are replaced.
+        """
+        offset = len(self.docs)
+        for url, title in other.docs:
+            if url:
+                self.remove_page(url)
+                self.ids[url] = len(self.docs)
+            else:
+                self.removed += 1
+            self.docs.append((url, title))
+
+        for word in list(other.encoded) + list(other.postings):
+            other_ids, other_counts = other.get_postings(word)
+            postings = self.get_postings(word)
+            if postings is None:
+                postings = self.postings[word] = (array.array("I"), array.array("I"))
+            postings[0].extend(doc_id + offset for doc_id in other_ids)
+            postings[1].extend(other_counts)
+
+    def search(self, query: str, limit: int=10) -> list[tuple[str, str]]:
+        """
+        Find the pages that have every word of a query, ranked by the tf-idf score of the words, the
+        number of times each appears on the page weighted by how rare it is across the site.
+
+        Args:
+            query (str): The words to look for
+            limit (int): The maximum number of pages returned
+
+        Returns:
+            list[tuple[str, str]]: The (url, title) of each page found, best match first
+        """
+        words = set(tokenize(query))
+        if not words:
+            return []
+        live = len(self.docs) - self.removed
+        scores = None
+        for word in words:
+            postings = self.get_postings(word)
+            if postings is None:
+                return []
+            ids, counts = postings
+            weight = math.log(1 + live / len(ids))
+            word_scores = {doc_id: count * weight for doc_id, count in zip(ids, counts) if self.docs[doc_id][0]}
+            if scores is None:
+                scores = word_scores
+            else:
+                scores = {doc_id: score + word_scores[doc_id] for doc_id, score in scores.items() if doc_id in word_scores}
+        ranked = sorted(scores, key=lambda doc_id: (-scores[doc_id], self.docs[doc_id][0]))
+        return [self.docs[doc_id] for doc_id in ranked[:limit]]
+
+    def encode(self) -> bytes:
+        """
+        Write the index in its file format, see the class docstring.
+
+        Returns:
+            bytes: The encoded index
+        """
+        buffer = bytearray(INDEX_MAGIC)
+        buffer.append(INDEX_VERSION)
+        write_varint(buffer, len(self.docs))
+        for url, title in self.docs:
+            write_string(buffer, url)
+            write_string(buffer, title)
+
+        words = sorted(self.postings.keys() | self.encoded.keys())
+        write_varint(buffer, len(words))
+        for word in words:
+            write_string(buffer, word)
+            encoded = self.encoded.get(word)
+            if encoded is None:
+                encoded = encode_postings(*self.postings[word])
+            count, data = encoded
+            write_varint(buffer, count)
+            write_varint(buffer, len(data))
+            buffer += data
+        return bytes(buffer)
+
+    @classmethod
+    def decode(cls, data: bytes) -> "SearchIndex":
+        """
+        Read an index written by encode. Only the documents and the word list are parsed, the postings of
+        each word are decoded when it is first used.
+
+        Args:
+            data (bytes): The encoded index
+
+        Returns:
+            SearchIndex: The index
+        """
+        if data[:len(INDEX_MAGIC)] != INDEX_MAGIC or len(data) <= len(INDEX_MAGIC) or data[len(INDEX_MAGIC)] != INDEX_VERSION:
+            raise ValueError(f"not a version {INDEX_VERSION} search index")
+        index = cls()
+        try:
+            pos = len(INDEX_MAGIC) + 1
+            doc_count, pos = read_varint(data, pos)
+            for doc_id in range(doc_count):
+                url, pos = read_string(data, pos)
+                title, pos = read_string(data, pos)
+                index.docs.append((url, title))
+                if url:
+                    index.ids[url] = doc_id
+                else:
+                    index.removed += 1
+
+            word_count, pos = read_varint(data, pos)
+            for _ in range(word_count):
+                word, pos = read_string(data, pos)
+                count, pos = read_varint(data, pos)
+                length, pos = read_varint(data, pos)
+                index.encoded[word] = (count, data[pos:pos + length])
+                pos += length
+        except (IndexError, UnicodeDecodeError):
+            raise ValueError("corrupt search index") from None
+        if pos != len(data):
+            raise ValueError("corrupt search index")
+        return index
+
+def tokenize(text: str) -> list[str]:
+    """
+    Split text into the lowercase words the index is keyed by.
+    """
+    return [word for word in TOKEN_PATTERN.findall(text.lower()) if len(word) <= MAX_WORD_LENGTH]
+
+def page_url(rel_path: str) -> str:
+    """
+    Get the URL of the page built from a markdown file, such as "/blog/post.html" for blog/post.md.
+    """
+    return "/" + rel_path[:-len(".md")].replace(os.sep, "/") + ".html"
+
+def load_search_index(public_dir: str, manifest: dict, enabled: bool=True):
+    """
+    Read the search index of the previous build, for update_search_index to update. A missing or
+    unreadable index file gives an empty index, and the manifest's "search" records are dropped, so every
+    page is indexed again.
+
+    Args:
+        public_dir (str): The public directory.
+        manifest (dict): The build manifest from the previous build.
+        enabled (bool): False reads nothing.
+
+    Returns:
+        SearchIndex: The index, or None when disabled
+    """
+    if not enabled:
+        return None
+    if manifest.get("search"):
+        try:
+            with open(os.path.join(public_dir, SEARCH_INDEX_NAME), "rb") as index_file:
+                return SearchIndex.decode(index_file.read())
+        except (OSError, ValueError):
+            pass
+    manifest["search"] = {}
+    return SearchIndex()
+
+def is_indexed(manifest: dict, rel_path: str) -> bool:
+    """
+    Check whether the search index holds a page as it is in the manifest's "pages" records.
+    """
+    return manifest.get("search", {}).get(rel_path) == manifest["pages"][rel_path]["hash"]
+
+def update_search_index(index: SearchIndex, public_dir: str, manifest: dict, page_texts: dict):
+    """
+    Bring the search index in the public directory up to date with the pages of the build.
+
+    The words of the pages are recorded while they are rendered, see PageText. Only the pages whose
+    markdown changed since they were indexed are added again, and the index file is only rewritten when a
+    page changed. The manifest's "search" records, the content hash each page was indexed at, are updated
+    in place.
+
+    Args:
+        index (SearchIndex): The index of the previous build, see load_search_index. None removes the
+            index of earlier builds and writes none.
+        public_dir (str): The public directory.
+        manifest (dict): The build manifest, with the "pages" records of this build.
+        page_texts (dict): The PageText of every page that is not indexed, see is_indexed, by relative path.
+
+    Returns:
+        SearchIndex: The index, or None when disabled
+    """
+    index_path = os.path.join(public_dir, SEARCH_INDEX_NAME)
+    previous = manifest.get("search", {})
+    if index is None:
+        if previous:
+            remove_output(index_path, public_dir)
+        manifest["search"] = {}
+        return None
+
+    pages = manifest.get("pages", {})
+    changed = [rel_path for rel_path in sorted(pages) if not is_indexed(manifest, rel_path)]
+    removed = [rel_path for rel_path in previous if rel_path not in pages]
+    if previous and not changed and not removed:
+        return index
+
+    for rel_path in removed:
+        index.remove_page(page_url(rel_path))
+    for rel_path in changed:
+        page_text = page_texts[rel_path]
+        index.add_page(page_url(rel_path), page_text.title, page_text.words)
+
+    if index.removed > len(index.docs) * COMPACT_RATIO:
+        index.compact()
+    write_index(index, index_path)
+    manifest["search"] = {rel_path: record["hash"] for rel_path, record in pages.items()}
+    return index
+
+def write_index(index: SearchIndex, path: str):
+    """
+    Write an index to a file, replacing it atomically.
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as index_file:
+        index_file.write(index.encode())
+    os.replace(tmp_path, path)
+
+def encode_postings(ids: array.array, counts: array.array) -> tuple[int, bytes]:
+    """
+    Encode the postings of a word, the ids as differences from the previous id.
+
+    Returns:
+        tuple[int, bytes]: The posting count and the encoded postings
+    """
+    buffer = bytearray()
+    write_varints(buffer, array.array("I", map(operator.sub, ids, itertools.chain((0,), ids))))
+    write_varints(buffer, counts)
+    return len(ids), bytes(buffer)
+
+def decode_postings(count: int, data: bytes) -> tuple[array.array, array.array]:
+    """
+    Decode the postings of a word written by encode_postings.
+
+    Returns:
+        tuple[array, array]: The document ids and counts
+    """
+    deltas, pos = read_varints(data, 0, count)
+    counts, pos = read_varints(data, pos, count)
+    return array.array("I", itertools.accumulate(deltas)), counts
+
+def write_varint(buffer: bytearray, value: int):
+    """
+    Append an unsigned integer to a buffer as a LEB128 varint, 7 bits per byte, low bits first.
+    """
+    while value >= 0x80:
+        buffer.append(value & 0x7F | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+def write_varints(buffer: bytearray, values):
+    """
+    Append a run of varints to a buffer. Most runs only hold values below 0x80, which are copied in one
+    step rather than a byte at a time.
+    """
+    if not values or max(values) < 0x80:
+        buffer += array.array("B", values)
+        return
+    append = buffer.append
+    for value in values:
+        while value >= 0x80:
+            append(value & 0x7F | 0x80)
+            value >>= 7
+        append(value)
+
+def read_varint(data: bytes, pos: int) -> tuple[int, int]:
+    """
+    Read a varint written by write_varint.
+
+    Returns:
+        tuple[int, int]: The value and the position after it
+    """
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+def read_varints(data: bytes, pos: int, count: int) -> tuple[array.array, int]:
+    """
+    Read a run of count varints. A run whose first count bytes are all below 0x80 is one byte per value,
+    and is copied in one step.
+
+    Returns:
+        tuple[array, int]: The values and the position after them
+    """
+    chunk = data[pos:pos + count]
+    if len(chunk) == count and (not chunk or max(chunk) < 0x80):
+        return array.array("I", array.array("B", chunk)), pos + count # Converted from bytes, which array("I") would read as raw 4-byte ints
+    values = array.array("I")
+    for _ in range(count):
+        value, pos = read_varint(data, pos)
+        values.append(value)
+    return values, pos
+
+def write_string(buffer: bytearray, text: str):
+    """
+    Append a string to a buffer as its varint byte length and UTF-8 bytes.
+    """
+    data = text.encode()
+    write_varint(buffer, len(data))
+    buffer += data
+
+def read_string(data: bytes, pos: int) -> tuple[str, int]:
+    """
+    Read a string written by write_string.
+
+    Returns:
+        tuple[str, int]: The string and the position after it
+    """
+    length, pos = read_varint(data, pos)
+    end = pos + length
+    if end > len(data):
+        raise IndexError("string past the end of the data")
+    return data[pos:end].decode(), end
@@ -0,0 +1,373 @@
+import os
+import shutil
+import hashlib
+import threading
+import mimetypes
+import urllib.parse
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from compress import ENCODINGS
+from manifest import MANIFEST_NAME, load_manifest
+
+MAX_MEMORY_FILE_SIZE = 8 * 1024 * 1024 # Larger files are streamed from disk instead of held in memory
+
+class SiteEntry:
+    """
+    One file of the built site, or one precompressed variant of it, ready to be sent.
+    """
+    __slots__ = ("path", "stat_key", "body", "size", "mtime", "content_type", "etag", "last_modified", "encoding", "variants")
+
+    def __init__(self, path: str, stat_key: tuple, body: bytes, size: int, mtime: float, content_type: str, etag: str, encoding: str=None):
+        self.path = path
+        self.stat_key = stat_key # (mtime_ns, size) of the file on disk, and of its variants, to spot changes
+        self.body = body # None for large files, which are read from path on every request
+        self.size = size
+        self.mtime = mtime
+        self.content_type = content_type
+        self.etag = etag
+        self.last_modified = formatdate(mtime, usegmt=True)
+        self.encoding = encoding # The Content-Encoding of a precompressed variant, None for the file itself
+        self.variants = {} # Content-Encoding -> SiteEntry of the precompressed siblings written by the build
+
+def entry_stat_key(stat, variants) -> tuple:
+    """
+    Build the key that tells whether a file or any of its current variants changed since it was loaded.
+    """
+    return (stat.st_mtime_ns, stat.st_size, tuple((encoding, variant_stat.st_size) for encoding, _, variant_stat in variants))
+
+class SiteStore:
+    """
+    An in-memory copy of the public directory, keyed by URL path.
+
+    sync() rereads only the files whose size or modification time changed, and swaps in a new map in one
+    assignment, so request threads can read the store without locking while a build updates it.
+
+    Precompressed siblings written by the build, such as index.html.gz, are loaded as variants of their
+    file rather than as files of their own. Only the siblings the build manifest's "compressed" records
+    list count, so a static file with a sibling's name, such as notes.txt.gz shipped next to notes.txt, is
+    served as a file. A sibling only counts while its modification time matches the file's, which the
+    build guarantees for siblings of the current content. HTML pages changed by transform_html get no
+    variants, since the siblings hold the untransformed page.
+    """
+    def __init__(self, public_dir: str, transform_html=None):
+        self.public_dir = public_dir
+        self.transform_html = transform_html # Applied to every HTML page as it is loaded, if given
+        self.entries = {}
+        self.lock = threading.Lock() # Serializes concurrent syncs, never held by readers
+
+    def sync(self) -> int:
+        """
+        Bring the store up to date with the public directory.
+
+        Returns:
+            int: The number of files that were loaded or removed
+        """
+        with self.lock:
+            old_entries = self.entries
+            entries = {}
+            changed = 0
+            generated = generated_variants(load_manifest(os.path.join(self.public_dir, MANIFEST_NAME)))
+            prefix_length = len(os.path.join(self.public_dir, "")) - 1 # Keep the separator as the leading slash
+            for root, dirs, files in os.walk(self.public_dir):
+                for file in files:
+                    if file.startswith(".") or file.endswith(".tmp"):
+                        continue # The build manifest, or a page still being written by a build
+                    path = os.path.join(root, file)
+                    rel_path = path[prefix_length + 1:]
+                    if rel_path in generated:
+                        continue # Loaded along with its file
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    variants = self.find_variants(path, stat, rel_path, generated)
+                    stat_key = entry_stat_key(stat, variants)
+                    url_path = path[prefix_length:].replace(os.sep, "/")
+                    entry = old_entries.get(url_path)
+                    if entry is None or entry.stat_key != stat_key:
+                        entry = self.load(path, stat, variants)
+                        changed += 1
+                    entries[url_path] = entry
+            changed += sum(1 for url_path in old_entries if url_path not in entries)
+            self.entries = entries
+            return changed
+
+    def find_variants(self, path: str, stat, rel_path: str, generated: set) -> list:
+        """
+        Find the current precompressed siblings of a file.
+
+        Args:
+            path (str): The file
+            stat: The file's os.stat result
+            rel_path (str): The path of the file relative to the public directory
+            generated (set): The relative paths of the siblings written by the build, see generated_variants
+
+        Returns:
+            list: (encoding, path, stat) tuples of the siblings whose modification time matches the file's
+        """
+        if self.transform_html is not None and path.endswith(".html"):
+            return []
+        variants = []
+        for encoding, suffix in ENCODINGS.items():
+            if rel_path + suffix not in generated:
+                continue
+            try:
+                variant_stat = os.stat(path + suffix)
+            except FileNotFoundError:
+                continue
+            if variant_stat.st_mtime_ns == stat.st_mtime_ns: # Otherwise left over from an older build of the file
+                variants.append((encoding, path + suffix, variant_stat))
+        return variants
+
+    def load(self, path: str, stat, variants=()) -> SiteEntry:
+        """
+        Read a file and its precompressed variants, and work out the headers they are served with.
+
+        Args:
+            path (str): The file
+            stat: The file's os.stat result
+            variants (list): (encoding, path, stat) tuples of its precompressed siblings, see find_variants
+        """
+        stat_key = entry_stat_key(stat, variants)
+        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        if content_type.startswith("text/"):
+            content_type += "; charset=utf-8"
+
+        if stat.st_size > MAX_MEMORY_FILE_SIZE:
+            # Derive the ETag from the file's identity rather than reading the whole file
+            etag = f'"{stat.st_ino:x}-{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+            entry = SiteEntry(path, stat_key, None, stat.st_size, stat.st_mtime, content_type, etag)
+        else:
+            with open(path, "rb") as f:
+                body = f.read()
+            if self.transform_html is not None and path.endswith(".html"):
+                body = self.transform_html(body)
+            etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+            entry = SiteEntry(path, stat_key, body, len(body), stat.st_mtime, content_type, etag)
+
+        for encoding, variant_path, variant_stat in variants:
+            body = None
+            if variant_stat.st_size <= MAX_MEMORY_FILE_SIZE:
+                with open(variant_path, "rb") as f:
+                    body = f.read()
+            # Each encoding is a different representation, so it needs an ETag of its own
+            variant_etag = f'{entry.etag[:-1]}-{encoding}"'
+            entry.variants[encoding] = SiteEntry(variant_path, stat_key, body, variant_stat.st_size, stat.st_mtime, content_type, variant_etag, encoding)
+        return entry
+
+    def get(self, url_path: str) -> SiteEntry:
+        """
+        Look up the entry for a URL path. Directory paths ending in a slash are served by their index.html.
+
+        Returns:
+            SiteEntry: The entry, or None if there is no such file
+        """
+        if url_path.endswith("/"):
+            url_path += "index.html"
+        return self.entries.get(url_path)
+
+    def is_directory(self, url_path: str) -> bool:
+        """
+        Check whether a URL path without a trailing slash names a directory with an index page.
+        """
+        return url_path + "/index.html" in self.entries
+
+def generated_variants(manifest: dict) -> set[str]:
+    """
+    List the precompressed siblings a build wrote, from its manifest's "compressed" records. Files in its
+    "static" records are never among them, whatever their name.
+
+    Returns:
+        set[str]: The paths of the siblings relative to the public directory, such as "index.html.gz"
+    """
+    static = manifest.get("static", {})
+    generated = set()
+    for rel_path, record in manifest.get("compressed", {}).items():
+        for encoding in record["encodings"]:
+            variant = rel_path + ENCODINGS[encoding]
+            if variant not in static:
+                generated.add(variant)
+    return generated
+
+def choose_encoding(accept_encoding: str, available) -> str:
+    """
+    Pick the content coding to send, following a request's Accept-Encoding header.
+
+    The coding with the highest q-value wins, and codings the client weighs equally are picked in the
+    order given. A coding the header does not list takes the weight of "*", if any. An explicit identity
+    weight higher than every available coding's means the file is sent uncompressed.
+
+    Args:
+        accept_encoding (str): The Accept-Encoding header, or None
+        available: The codings there is a variant for, in order of preference
+
+    Returns:
+        str: The coding to send, or None to send the file as it is
+    """
+    if not accept_encoding:
+        return None
+
+    weights = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        weight = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[coding.strip().lower()] = weight
+
+    chosen = None
+    chosen_weight = 0.0
+    for coding in available:
+        weight = weights.get(coding, weights.get("*", 0.0))
+        if weight > chosen_weight:
+            chosen = coding
+            chosen_weight = weight
+    if chosen is not None and weights.get("identity", 0.0) > chosen_weight:
+        return None
+    return chosen
+
+class SiteRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serves the site from a SiteStore, with ETag and Last-Modified validators and 304 responses to
+    conditional requests. Files with precompressed variants are sent in the coding the client prefers, as
+    negotiated by choose_encoding. Connections are kept alive between requests.
+    """
+    protocol_version = "HTTP/1.1"
+    server_version = "SSG"
+    # The headers and the body go out as two writes. With Nagle's algorithm on, the body waits for the ACK
+    # of the headers, which the client delays by about 40 ms on a kept-alive connection
+    disable_nagle_algorithm = True
+
+    def __init__(self, *args, store=None, **kwargs):
+        self.store = store
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        self.send_entry(head=False)
+
+    def do_HEAD(self):
+        self.send_entry(head=True)
+
+    def send_entry(self, head: bool):
+        url_path = urllib.parse.unquote(urllib.parse.urlsplit(self.path).path)
+        entry = self.store.get(url_path)
+
+        if entry is None:
+            if self.store.is_directory(url_path):
+                self.send_response(301)
+                self.send_header("Location", url_path + "/")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_error(404, "File not found")
+            return
+
+        negotiated = bool(entry.variants)
+        if negotiated:
+            encoding = choose_encoding(self.headers.get("Accept-Encoding"), entry.variants)
+            if encoding is not None:
+                entry = entry.variants[encoding]
+
+        if self.not_modified(entry):
+            self.send_response(304)
+            self.send_header("ETag", entry.etag)
+            self.send_header("Last-Modified", entry.last_modified)
+            if negotiated:
+                self.send_header("Vary", "Accept-Encoding")
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", entry.content_type)
+        self.send_header("Content-Length", str(entry.size))
+        if entry.encoding is not None:
+            self.send_header("Content-Encoding", entry.encoding)
+        if negotiated:
+            self.send_header("Vary", "Accept-Encoding") # Caches must keep the encodings apart
+        self.send_header("ETag", entry.etag)
+        self.send_header("Last-Modified", entry.last_modified)
+        self.send_header("Cache-Control", "no-cache") # Revalidate every time, which is cheap with the validators
+        self.end_headers()
+        if head:
+            return
+
+        if entry.body is not None:
+            self.wfile.write(entry.body)
+        else:
+            with open(entry.path, "rb") as f:
+                shutil.copyfileobj(f, self.wfile)
+
+    def not_modified(self, entry: SiteEntry) -> bool:
+        """
+        Check the request's validators against an entry. If-None-Match takes precedence over
+        If-Modified-Since, as RFC 9110 requires.
+        """
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            if if_none_match.strip() == "*":
+                return True
+            tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+            return entry.etag in tags
+
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError, IndexError, OverflowError):
+                return False
+            return int(entry.mtime) <= since
+        return False
+
+    def log_message(self, format, *args):
+        pass # Keep the console for build output
+
+class SiteServer(ThreadingHTTPServer):
+    """
+    A threaded HTTP server with a listen backlog large enough for hundreds of concurrent connections.
+    """
+    daemon_threads = True
+    request_queue_size = 1024
+
+def start_server(store: SiteStore, port: int, handler_class=SiteRequestHandler, **handler_options) -> SiteServer:
+    """
+    Start serving a SiteStore in a background thread.
+
+    Args:
+        store (SiteStore): The site to serve
+        port (int): The port to listen on, or 0 to pick a free one
+        handler_class: The request handler, SiteRequestHandler or a subclass
+        handler_options: Extra keyword arguments for the request handler
+
+    Returns:
+        SiteServer: The running server
+    """
+    def handler(*args, **kwargs):
+        return handler_class(*args, store=store, **handler_options, **kwargs)
+
+    server = SiteServer(("", port), handler)
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.1}, daemon=True).start() # Short poll, so shutdown() returns quickly
+    return server
+
+def serve(public_dir: str, port: int=8888):
+    """
+    Serve the public directory from memory until interrupted.
+
+    Args:
+        public_dir (str): The built site
+        port (int): The port to listen on
+    """
+    store = SiteStore(public_dir)
+    store.sync()
+    server = start_server(store, port)
+    print(f"Serving {public_dir} on http://localhost:{port}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
@@ -0,0 +1,46 @@
+import os
+import hashlib
+
+def parse_shard(text: str) -> tuple[int, int]:
+    """
+    Parse a shard given as "i/N", the i-th of N shards, counting from 1.
+
+    Args:
+        text (str): The shard, such as "2/4"
+
+    Returns:
+        tuple[int, int]: (index, count)
+    """
+    index, separator, count = text.partition("/")
+    try:
+        index = int(index)
+        count = int(count)
+    except ValueError:
+        raise ValueError(f"invalid shard {text}, expected i/N such as 1/4") from None
+    if not separator or count < 1 or not 1 <= index <= count:
+        raise ValueError(f"invalid shard {text}, expected i/N with 1 <= i <= N")
+    return index, count
+
+def shard_of(rel_path: str, count: int) -> int:
+    """
+    Work out which of count shards a source file belongs to.
+
+    The shard comes from a hash of the path relative to its source directory, with forward slashes, so
+    every machine puts every file in the same shard whatever the directory walk order or platform, and
+    adding a file never moves any other file to another shard.
+
+    Args:
+        rel_path (str): The path of the file relative to the content or static directory
+        count (int): The number of shards
+
+    Returns:
+        int: The shard index, from 1 to count
+    """
+    digest = hashlib.sha256(rel_path.replace(os.sep, "/").encode()).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+def in_shard(rel_path: str, shard: tuple[int, int]) -> bool:
+    """
+    Check whether a source file belongs to a shard. Every file belongs to the shard None, an unsharded build.
+    """
+    return shard is None or shard_of(rel_path, shard[1]) == shard[0]
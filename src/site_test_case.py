@@ -0,0 +1,40 @@
+import os
+import tempfile
+import unittest
+from build import build_site
+
+class SiteTestCase(unittest.TestCase):
+    """
+    Base for the tests that build a site in a temporary directory, laid out as static/, content/ and
+    template.html, with the outputs written to public/ or another directory next to them.
+    """
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        os.makedirs(self.path("static"))
+        os.makedirs(self.path("content"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, *parts):
+        return os.path.join(self.tmp.name, *parts)
+
+    def write(self, rel_path, text, mtime_ns=None):
+        path = self.path(rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        previous = os.stat(path).st_mtime_ns if os.path.exists(path) else 0
+        with open(path, "w") as f:
+            f.write(text)
+        stat = os.stat(path)
+        if mtime_ns is None:
+            # Move the mtime a second past the clock and the previous write, so every write is seen as a change
+            mtime_ns = max(stat.st_mtime_ns, previous) + 1_000_000_000
+        os.utime(path, ns=(stat.st_atime_ns, mtime_ns))
+        return path
+
+    def read(self, *parts):
+        with open(self.path(*parts)) as f:
+            return f.read()
+
+    def build(self, public="public", workers=1, **kwargs):
+        return build_site(self.path("static"), self.path("content"), self.path("template.html"), self.path(public), workers=workers, **kwargs)
@@ -0,0 +1,192 @@
+import os
+import re
+import hashlib
+import functools
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+INCLUDE_PATTERN = re.compile(r'\{%\s*include\s+"([^"]+)"\s*%\}')
+EXTENDS_PATTERN = re.compile(r'\s*\{%\s*extends\s+"([^"]+)"\s*%\}')
+BLOCK_PATTERN = re.compile(r"\{%\s*block\s+(\w+)\s*%\}(.*?)\{%\s*endblock\s*%\}", re.DOTALL)
+URL_ATTRIBUTE_PATTERN = re.compile(r"""\b(href|src)=(["'])(.*?)\2""")
+
+_template_cache = {} # Absolute template path -> compiled Template, see load_template
+
+class Template:
+    """
+    A page template compiled into static chunks with a named slot between each pair of chunks.
+
+    "<title>{{ Title }}</title>{{ Content }}" compiles to the chunks ["<title>", "</title>", ""] and the
+    slots ["Title", "Content"]. Rendering interleaves the two lists, so the template text is only ever
+    scanned once.
+    """
+    __slots__ = ("source", "dependencies", "chunks", "slots", "placeholders", "parts")
+
+    def __init__(self, source: str, dependencies: dict=None):
+        self.source = source
+        self.dependencies = dependencies or {} # Path -> (mtime_ns, size) of every file the template was composed from
+        self.chunks = []
+        self.slots = []
+        self.placeholders = [] # The original text of each slot, kept for slots that get no value
+        position = 0
+        for match in PLACEHOLDER_PATTERN.finditer(source):
+            self.chunks.append(source[position:match.start()])
+            self.slots.append(match.group(1))
+            self.placeholders.append(match.group(0))
+            position = match.end()
+        self.chunks.append(source[position:])
+        self.parts = tuple(zip(self.slots, self.placeholders, self.chunks[1:])) # Precomputed for the render loops
+
+    def digest(self) -> str:
+        """
+        Hash the composed template text. Two templates with the same digest render pages identically.
+
+        Returns:
+            str: The hex sha256 digest
+        """
+        return hashlib.sha256(self.source.encode()).hexdigest()
+
+    def is_current(self) -> bool:
+        """
+        Check that none of the files the template was composed from changed since it was loaded.
+        """
+        for path, stat_key in self.dependencies.items():
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                return False
+            if (stat.st_mtime_ns, stat.st_size) != stat_key:
+                return False
+        return True
+
+    def render(self, values: dict) -> str:
+        """
+        Render the template into a string.
+
+        Args:
+            values (dict): The text of each slot. Slots without a value keep their placeholder.
+
+        Returns:
+            str: The rendered text
+        """
+        parts = [self.chunks[0]]
+        for slot, placeholder, chunk in self.parts:
+            parts.append(values.get(slot, placeholder))
+            parts.append(chunk)
+        return "".join(parts)
+
+    def write(self, fp, values: dict):
+        """
+        Render the template into a file-like object.
+
+        Args:
+            fp: A file-like object with a write method
+            values (dict): The value of each slot, either a string or a callable that writes the slot's
+                content into the file object it is given. Slots without a value keep their placeholder.
+        """
+        write = fp.write
+        write(self.chunks[0])
+        for slot, placeholder, chunk in self.parts:
+            value = values.get(slot, placeholder)
+            if callable(value):
+                value(fp)
+            else:
+                write(value)
+            write(chunk)
+
+@functools.lru_cache(maxsize=32)
+def compile_template(source: str) -> Template:
+    """
+    Compile template text, reusing the compiled form for text that was compiled before.
+
+    Args:
+        source (str): The template text
+
+    Returns:
+        Template: The compiled template
+    """
+    return Template(source)
+
+def load_template(path: str) -> Template:
+    """
+    Load and compile a template file, resolving its extends, include and block tags.
+
+    Compiled templates are cached in the process by path. A cached template is reused for as long as
+    every file in its chain, the template itself, the templates it extends and the partials it includes,
+    keeps its modification time and size. Editing any of them recompiles only the templates that use it.
+
+    Args:
+        path (str): The path to the template file
+
+    Returns:
+        Template: The compiled template
+    """
+    path = os.path.abspath(path)
+    template = _template_cache.get(path)
+    if template is not None and template.is_current():
+        return template
+
+    dependencies = {}
+    source = resolve_template(path, dependencies, ())
+    source = BLOCK_PATTERN.sub(lambda match: match.group(2), source) # Only the outermost template's blocks are left
+    template = Template(source, dependencies)
+    _template_cache[path] = template
+    return template
+
+def resolve_template(path: str, dependencies: dict, chain: tuple) -> str:
+    """
+    Compose a template file into flat template text. Blocks are left in place, so a template extending
+    this one can still replace them.
+
+    {% include "file" %} is replaced by the text of the file. {% extends "file" %} must come first in a
+    template, and makes it the named parent template with each {% block name %}...{% endblock %} replaced
+    by the block of the same name in this template. Text outside the blocks of an extending template is
+    ignored. Paths are relative to the directory of the template that names them. Blocks cannot be nested.
+
+    Args:
+        path (str): The absolute path to the template file
+        dependencies (dict): Collects the (mtime_ns, size) of every file read
+        chain (tuple): The templates that led to this one, to catch cycles
+
+    Returns:
+        str: The composed template text
+    """
+    if path in chain:
+        raise ValueError(f"Template cycle: {' -> '.join(chain + (path,))}")
+    chain = chain + (path,)
+
+    stat = os.stat(path) # Taken before reading, so an edit during the read is seen as a change next time
+    dependencies[path] = (stat.st_mtime_ns, stat.st_size)
+    with open(path, "r") as template_file:
+        source = template_file.read()
+
+    directory = os.path.dirname(path)
+    source = INCLUDE_PATTERN.sub(lambda match: resolve_template(os.path.join(directory, match.group(1)), dependencies, chain), source)
+
+    extends = EXTENDS_PATTERN.match(source)
+    if extends is None:
+        return source
+
+    blocks = {match.group(1): match.group(0) for match in BLOCK_PATTERN.finditer(source)}
+    parent = resolve_template(os.path.join(directory, extends.group(1)), dependencies, chain)
+    # Swap in this template's blocks whole, so a template extending this one can replace them in turn
+    return BLOCK_PATTERN.sub(lambda match: blocks.get(match.group(1), match.group(0)), parent)
+
+def rewrite_urls(template: Template, urls: dict) -> Template:
+    """
+    Replace the values of the href and src attributes of a template that are keys of urls, such as the
+    stylesheet link "/index.css", with their values, such as "/index.3f9a1c2b.css".
+
+    Args:
+        template (Template): The compiled template
+        urls (dict): The URL map, see fingerprint_assets
+
+    Returns:
+        Template: The rewritten template, or the template itself if none of its URLs are in the map
+    """
+    if not urls:
+        return template
+    rewrite = lambda match: f"{match.group(1)}={match.group(2)}{urls.get(match.group(3), match.group(3))}{match.group(2)}"
+    source = URL_ATTRIBUTE_PATTERN.sub(rewrite, template.source)
+    if source == template.source:
+        return template
+    return Template(source, template.dependencies)
@@ -0,0 +1,97 @@
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+import block_cache
+from block_cache import BlockCache
+from block_markdown import markdown_to_html_node
+from search_index import tokenize
+from textnode_to_htmlnode import collecting_page_text
+
+MARKDOWN = "# Title\n\nSome *text*\nover lines\n\n\n* a\n  * b\n\n```\ncode\n```\n\n> quote\n   \n1. one\n"
+
+class TestBlockCache(unittest.TestCase):
+    def render(self, cache, markdown):
+        fp = io.StringIO()
+        cache.write_html(markdown, fp)
+        return fp.getvalue()
+
+    def test_matches_tree(self):
+        cache = BlockCache()
+        for markdown in (MARKDOWN, "\nlead\n", "  \n\npadded  \n\n\n", "one\n  \ntwo"):
+            self.assertEqual(self.render(cache, markdown), markdown_to_html_node(markdown).to_html())
+            self.assertEqual(self.render(cache, markdown), markdown_to_html_node(markdown).to_html()) # From the cache
+
+    def test_empty(self):
+        self.assertEqual(self.render(BlockCache(), "\n\n  \n\n"), "<div></div>")
+
+    def test_only_changed_blocks_are_parsed(self):
+        cache = BlockCache()
+        self.render(cache, MARKDOWN)
+        edited = MARKDOWN.replace("Some *text*", "Other *text*")
+        with mock.patch("block_cache.block_to_html_node", wraps=block_cache.block_to_html_node) as parse:
+            html = self.render(cache, edited)
+        self.assertEqual(parse.call_count, 1)
+        self.assertEqual(html, markdown_to_html_node(edited).to_html())
+
+    def collect(self, cache, markdown):
+        with collecting_page_text(tokenize) as page_text:
+            html = self.render(cache, markdown) if cache is not None else markdown_to_html_node(markdown).to_html()
+        return html, page_text.words, page_text.links
+
+    def test_collected_page_text(self):
+        cache = BlockCache()
+        markdown = MARKDOWN + "\n\nSee [the text](/text.html) and ![text](/text.png)"
+        self.render(cache, markdown) # Cached without the text, which the first collected render adds
+        self.assertEqual(self.collect(cache, markdown), self.collect(None, markdown))
+        edited = markdown.replace("Some *text*", "Other *text*")
+        with mock.patch("block_cache.block_to_html_node", wraps=block_cache.block_to_html_node) as parse:
+            collected = self.collect(cache, edited)
+        self.assertEqual(parse.call_count, 1)
+        self.assertEqual(collected, self.collect(None, edited))
+        self.assertEqual(collected[1]["text"], 3)
+        self.assertEqual(collected[2], {"/text.html", "/text.png"})
+
+    def test_failed_block_is_not_cached(self):
+        cache = BlockCache()
+        with self.assertRaises(ValueError):
+            self.render(cache, "ok\n\n####### too deep")
+        self.assertEqual(list(cache.entries), ["ok"])
+
+    def test_prune_evicts_oldest(self):
+        cache = BlockCache(max_bytes=400)
+        for i in range(20):
+            self.render(cache, f"paragraph number {i}")
+        self.assertLessEqual(cache.size, 400)
+        self.assertIn("paragraph number 19", cache.entries)
+        self.assertNotIn("paragraph number 0", cache.entries)
+        self.assertEqual(cache.size, sum(len(chunk) + len(html) for chunk, html in cache.entries.items()))
+
+        for i in range(20):
+            self.collect(cache, f"[link number {i}](/{i}.html)")
+        self.assertLessEqual(cache.size, 400)
+        self.assertLessEqual(cache.texts.keys(), cache.entries.keys())
+        self.assertEqual(cache.size, sum(len(chunk) + len(html) + block_cache.text_size(cache.texts.get(chunk)) for chunk, html in cache.entries.items()))
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache", "blocks.json")
+            cache = BlockCache()
+            self.render(cache, MARKDOWN)
+            self.collect(cache, "[link](/a.html)")
+            cache.save(path)
+
+            loaded = BlockCache()
+            self.assertEqual(loaded.load(path), len(cache.entries))
+            self.assertEqual(loaded.entries, cache.entries)
+            self.assertEqual(loaded.texts, {"[link](/a.html)": ["link", ["/a.html"]]})
+            self.assertEqual(loaded.size, cache.size)
+
+            with mock.patch("block_cache.PARSER_VERSION", "other"):
+                self.assertEqual(BlockCache().load(path), 0)
+            self.assertEqual(BlockCache().load(os.path.join(tmp, "missing.json")), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
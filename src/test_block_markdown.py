@@ -1,5 +1,6 @@
+import io
 import unittest
-from block_markdown import markdown_to_blocks, block_to_blocktype, markdown_to_html_node
+from block_markdown import BlockType, markdown_to_blocks, block_to_blocktype, markdown_to_html_node, iter_blocks, lines_to_blocktype, build_list_structure, write_markdown_html, read_markdown_lines
 
 class TestBlockMarkdown(unittest.TestCase):
     def test_markdown_to_blocks_basic(self):
@@ -42,6 +43,43 @@ class TestBlockMarkdown(unittest.TestCase):
         expected = []
         self.assertEqual(markdown_to_blocks(markdown), expected)
 
+    def test_markdown_to_blocks_whitespace_only_block(self):
+        markdown = "Block 1.\n\n   \n\nBlock 2."
+        expected = ["Block 1.", "Block 2."]
+        self.assertEqual(markdown_to_blocks(markdown), expected)
+
+    def test_markdown_to_blocks_keeps_whitespace_lines_inside_block(self):
+        markdown = "  Line 1.\n \nLine 2.  \n\n"
+        expected = ["Line 1.\n \nLine 2."]
+        self.assertEqual(markdown_to_blocks(markdown), expected)
+
+    def test_iter_blocks(self):
+        lines = ["# Title", "", "Some text", "more text", "", "", "* one", "  * two", "", "```", "code", "```"]
+        expected = [
+            (BlockType.HEADING, ["# Title"]),
+            (BlockType.PARAGRAPH, ["Some text", "more text"]),
+            (BlockType.UNORDERED_LIST, ["* one", "  * two"]),
+            (BlockType.CODE, ["```", "code", "```"]),
+        ]
+        self.assertEqual(list(iter_blocks(lines)), expected)
+
+    def test_iter_blocks_is_lazy(self):
+        def lines():
+            yield "First block"
+            yield ""
+            raise AssertionError("read past the first block")
+        blocks = iter_blocks(lines())
+        self.assertEqual(next(blocks), (BlockType.PARAGRAPH, ["First block"]))
+
+    def test_lines_to_blocktype_mixed_markers(self):
+        self.assertEqual(lines_to_blocktype(["* one", "- two"]), BlockType.PARAGRAPH)
+        self.assertEqual(lines_to_blocktype(["> quote", "not quote"]), BlockType.PARAGRAPH)
+
+    def test_block_to_blocktype_unordered_list_plus(self):
+        block = "+ This is an unordered list item\n  + This is a nested item"
+        expected = "unordered_list"
+        self.assertEqual(block_to_blocktype(block), expected)
+
     def test_block_to_blocktype_paragraph(self):
         block = "This is a paragraph."
         expected = "paragraph"
@@ -222,5 +260,44 @@ class TestBlockMarkdown(unittest.TestCase):
         expected = "<div><ol><li>First item<ol><li>First nested item</li><li>Second nested item</li></ol></li><li>Second item</li></ol></div>"
         self.assertEqual(markdown_to_html_node(markdown).to_html(), expected)
 
+    def test_build_list_structure_dedent_between_levels(self):
+        items = [("a", 0), ("b", 2), ("c", 1), ("d", 0)]
+        expected = "<ul><li>a<ul><li>b</li></ul><ul><li>c</li></ul></li><li>d</li></ul>"
+        self.assertEqual(build_list_structure(items).to_html(), expected)
+
+    def test_build_list_structure_indented_first_item(self):
+        items = [("a", 2), ("b", 2), ("c", 0)]
+        expected = "<ol><li>a<ol><li>b</li></ol></li><li>c</li></ol>"
+        self.assertEqual(build_list_structure(items, "ol").to_html(), expected)
+
+    def test_build_list_structure_deep_nesting(self):
+        depth = 5000 # Far past the recursion limit
+        root = build_list_structure([(f"item {i}", i) for i in range(depth)])
+        levels = 0
+        node = root
+        while node is not None:
+            levels += 1
+            item = node.children[-1]
+            node = item.children[-1] if item.children[-1].tag == "ul" else None
+        self.assertEqual(levels, depth)
+
+    def test_build_list_structure_empty(self):
+        self.assertIsNone(build_list_structure([]))
+
+    def test_write_markdown_html_matches_tree(self):
+        markdown = "# Title\n\nSome *text*\nover lines\n\n\n* a\n  * b\n\n```\ncode\nmore\n```\n\n> quote\n   \n1. one\n"
+        fp = io.StringIO()
+        write_markdown_html(read_markdown_lines(io.StringIO(markdown)), fp)
+        self.assertEqual(fp.getvalue(), markdown_to_html_node(markdown).to_html())
+
+    def test_write_markdown_html_empty(self):
+        fp = io.StringIO()
+        write_markdown_html(read_markdown_lines(io.StringIO("")), fp)
+        self.assertEqual(fp.getvalue(), "<div></div>")
+
+    def test_read_markdown_lines(self):
+        self.assertEqual(list(read_markdown_lines(io.StringIO("a\n\nb"))), ["a", "", "b"])
+        self.assertEqual(list(read_markdown_lines(io.StringIO("a\n"))), ["a"])
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
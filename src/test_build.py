@@ -0,0 +1,124 @@
+import os
+import unittest
+from unittest import mock
+from copy_files import copy_file
+from generate_page import write_page
+from manifest import MANIFEST_NAME, load_manifest
+from site_test_case import SiteTestCase
+
+TEMPLATE = "<title>{{ Title }}</title>{{ Content }}"
+
+class TestBuildSite(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("template.html", TEMPLATE)
+        self.write("static/index.css", "body {}")
+        self.write("static/images/logo.png", "png")
+        self.write("content/index.md", "# Home")
+        self.write("content/blog/post.md", "# Post")
+
+    def build_recording_writes(self, **kwargs):
+        # Build while recording which outputs get copied or rendered
+        with mock.patch("copy_files.copy_file", wraps=copy_file) as copy, mock.patch("generate_page.write_page", wraps=write_page) as write:
+            self.build(**kwargs)
+        written = [call.args[1] for call in copy.call_args_list] + [call.args[2] for call in write.call_args_list]
+        return sorted(os.path.relpath(path, self.path("public")) for path in written)
+
+    def test_full_build(self):
+        manifest = self.build()
+        self.assertEqual(self.read("public", "index.html"), "<title>Home</title><div><h1>Home</h1></div>")
+        self.assertEqual(self.read("public", "blog", "post.html"), "<title>Post</title><div><h1>Post</h1></div>")
+        self.assertEqual(self.read("public", "images", "logo.png"), "png")
+        self.assertEqual(sorted(manifest["pages"]), ["blog/post.md", "index.md"])
+        self.assertEqual(sorted(manifest["static"]), ["images/logo.png", "index.css"])
+        self.assertEqual(load_manifest(self.path("public", MANIFEST_NAME)), manifest)
+
+    def test_unchanged_build_writes_nothing(self):
+        self.build()
+        self.assertEqual(self.build_recording_writes(), [])
+
+    def test_changed_page_is_rebuilt_alone(self):
+        self.build()
+        self.write("content/index.md", "# New Home")
+        self.assertEqual(self.build_recording_writes(), ["index.html"])
+        self.assertEqual(self.read("public", "index.html"), "<title>New Home</title><div><h1>New Home</h1></div>")
+
+    def test_template_change_rebuilds_every_page(self):
+        self.build()
+        self.write("template.html", "<h6>{{ Title }}</h6>{{ Content }}")
+        self.build()
+        self.assertEqual(self.read("public", "index.html"), "<h6>Home</h6><div><h1>Home</h1></div>")
+        self.assertEqual(self.read("public", "blog", "post.html"), "<h6>Post</h6><div><h1>Post</h1></div>")
+
+    def test_changed_static_file_is_recopied(self):
+        self.build()
+        self.write("static/index.css", "body { color: red; }")
+        self.build()
+        self.assertEqual(self.read("public", "index.css"), "body { color: red; }")
+
+    def test_deleted_sources_are_removed(self):
+        self.build()
+        os.remove(self.path("content", "blog", "post.md"))
+        os.remove(self.path("static", "images", "logo.png"))
+        manifest = self.build()
+        self.assertFalse(os.path.exists(self.path("public", "blog")))
+        self.assertFalse(os.path.exists(self.path("public", "images")))
+        self.assertEqual(sorted(manifest["pages"]), ["index.md"])
+        self.assertEqual(sorted(manifest["static"]), ["index.css"])
+
+    def test_compressed_build(self):
+        self.write("content/blog/post.md", "# Post\n\n" + "Long text. " * 50)
+        self.build(compress=("gzip",))
+        self.assertTrue(os.path.exists(self.path("public", "blog", "post.html.gz")))
+        self.assertFalse(os.path.exists(self.path("public", "index.html.gz"))) # Too small to be worth it
+        os.remove(self.path("content", "blog", "post.md"))
+        self.build(compress=("gzip",))
+        self.assertFalse(os.path.exists(self.path("public", "blog")))
+
+    def test_edited_static_copy_is_recopied(self):
+        self.build()
+        with open(self.path("public", "index.css"), "w") as f:
+            f.write("edited in public")
+        self.assertEqual(self.build_recording_writes(), ["index.css"])
+        self.assertEqual(self.read("public", "index.css"), "body {}")
+
+    def test_missing_output_is_rebuilt(self):
+        self.build()
+        os.remove(self.path("public", "index.html"))
+        os.remove(self.path("public", "index.css"))
+        self.build()
+        self.assertTrue(os.path.exists(self.path("public", "index.html")))
+        self.assertTrue(os.path.exists(self.path("public", "index.css")))
+
+    def test_partial_change_rebuilds_every_page(self):
+        self.write("template.html", "{% include \"footer.html\" %}{{ Content }}")
+        self.write("footer.html", "v1")
+        self.build()
+        self.assertEqual(self.build_recording_writes(), [])
+        self.write("footer.html", "v2")
+        self.assertEqual(self.build_recording_writes(), ["blog/post.html", "index.html"])
+        self.assertEqual(self.read("public", "index.html"), "v2<div><h1>Home</h1></div>")
+
+    def test_template_change_reuses_cached_bodies(self):
+        cache_dir = self.path("cache")
+        self.build(cache_dir=cache_dir)
+        self.write("template.html", "<h6>{{ Title }}</h6>{{ Content }}")
+        with mock.patch("generate_page.markdown_to_html_node") as parse:
+            self.build(cache_dir=cache_dir)
+        parse.assert_not_called()
+        self.assertEqual(self.read("public", "index.html"), "<h6>Home</h6><div><h1>Home</h1></div>")
+
+    def test_parser_version_change_rebuilds_every_page(self):
+        self.build()
+        with mock.patch("generate_page.PARSER_VERSION", "other"):
+            self.assertEqual(self.build_recording_writes(), ["blog/post.html", "index.html"])
+
+    def test_full_build_discards_stale_outputs(self):
+        self.build()
+        self.write("public/stray.html", "stray")
+        self.build(full=True)
+        self.assertFalse(os.path.exists(self.path("public", "stray.html")))
+        self.assertTrue(os.path.exists(self.path("public", "index.html")))
+
+if __name__ == "__main__":
+    unittest.main()
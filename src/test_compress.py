@@ -0,0 +1,100 @@
+import os
+import gzip
+import zlib
+import unittest
+from compress import compress_outputs, compress_data, compress_file
+from manifest import new_manifest
+from site_test_case import SiteTestCase
+
+PAGE = "<p>" + "compressible text " * 50 + "</p>"
+
+class TestCompress(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.public_dir = self.path()
+        self.manifest = new_manifest()
+        self.write("index.html", PAGE)
+        self.write("blog/post.html", PAGE)
+        self.write("index.css", "body {}" * 100)
+        self.write("small.css", "p {}")
+        self.write("logo.png", "png" * 100)
+        self.manifest["pages"] = {"index.md": {}, "blog/post.md": {}}
+        self.manifest["static"] = {"index.css": {}, "small.css": {}, "logo.png": {}}
+
+    def compress(self, encodings=("gzip",)):
+        compressed = compress_outputs(self.public_dir, self.manifest, encodings, workers=1)
+        return sorted(os.path.relpath(path, self.public_dir) for path in compressed)
+
+    def test_compress_data(self):
+        data = PAGE.encode()
+        self.assertEqual(gzip.decompress(compress_data(data, "gzip")), data)
+        self.assertEqual(zlib.decompress(compress_data(data, "deflate")), data)
+        self.assertEqual(compress_data(data, "gzip"), compress_data(data, "gzip")) # No timestamp in the header
+        with self.assertRaises(ValueError):
+            compress_data(data, "br")
+
+    def test_compress_file_matches_mtime(self):
+        compress_file(self.path("index.html"), ["gzip", "deflate"])
+        with open(self.path("index.html.gz"), "rb") as f:
+            self.assertEqual(gzip.decompress(f.read()).decode(), PAGE)
+        self.assertEqual(os.stat(self.path("index.html.zz")).st_mtime_ns, os.stat(self.path("index.html")).st_mtime_ns)
+
+    def test_compresses_text_outputs(self):
+        self.assertEqual(self.compress(("gzip", "deflate")), ["blog/post.html", "index.css", "index.html"])
+        self.assertTrue(os.path.exists(self.path("blog", "post.html.zz")))
+        self.assertFalse(os.path.exists(self.path("small.css.gz"))) # Below MIN_SIZE
+        self.assertFalse(os.path.exists(self.path("logo.png.gz")))
+        self.assertEqual(self.manifest["compressed"]["index.html"]["encodings"], ["deflate", "gzip"])
+
+    def test_unchanged_outputs_are_skipped(self):
+        self.compress()
+        self.assertEqual(self.compress(), [])
+
+        self.write("index.html", PAGE) # Rewritten with the same content
+        self.assertEqual(self.compress(), [])
+        self.assertEqual(os.stat(self.path("index.html.gz")).st_mtime_ns, os.stat(self.path("index.html")).st_mtime_ns)
+
+        self.write("index.html", PAGE + "<p>more</p>")
+        os.remove(self.path("index.css.gz"))
+        self.assertEqual(self.compress(), ["index.css", "index.html"])
+
+    def test_stale_variants_are_removed(self):
+        self.compress(("gzip", "deflate"))
+        del self.manifest["pages"]["blog/post.md"]
+        os.remove(self.path("blog", "post.html"))
+        self.write("index.css", "p {}") # Shrinks below MIN_SIZE
+        self.compress(("gzip",))
+        self.assertFalse(os.path.exists(self.path("blog"))) # The emptied directory goes too
+        self.assertFalse(os.path.exists(self.path("index.css.gz")))
+        self.assertFalse(os.path.exists(self.path("index.html.zz")))
+        self.assertTrue(os.path.exists(self.path("index.html.gz")))
+
+        self.compress(())
+        self.assertFalse(os.path.exists(self.path("index.html.gz")))
+        self.assertEqual(self.manifest["compressed"], {})
+
+    def test_static_sibling_is_left_alone(self):
+        self.write("index.css.gz", "shipped")
+        self.manifest["static"]["index.css.gz"] = {}
+        self.compress()
+        with open(self.path("index.css.gz")) as f:
+            self.assertEqual(f.read(), "shipped")
+        self.compress(())
+        self.assertTrue(os.path.exists(self.path("index.css.gz")))
+
+    def test_process_pool(self):
+        for i in range(10):
+            self.write(f"pages/page{i}.html", PAGE * (i + 1))
+            self.manifest["pages"][f"pages/page{i}.md"] = {}
+        compress_outputs(self.public_dir, self.manifest, ("gzip",), workers=2)
+        for i in range(10):
+            with open(self.path("pages", f"page{i}.html.gz"), "rb") as f:
+                self.assertEqual(gzip.decompress(f.read()).decode(), PAGE * (i + 1))
+
+    def test_unknown_encoding(self):
+        with self.assertRaises(ValueError):
+            self.compress(("br",))
+
+
+if __name__ == "__main__":
+    unittest.main()
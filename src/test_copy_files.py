@@ -0,0 +1,114 @@
+import os
+import unittest
+from copy_files import copy_files, copy_file
+from site_test_case import SiteTestCase
+
+class TestCopyFiles(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.src_dir = self.path("static")
+        self.dest_dir = self.path("public")
+        self.write("static/index.css", "body {}")
+        self.write("static/images/logo.png", "png")
+
+    def dest_files(self):
+        files = []
+        for root, dirs, names in os.walk(self.dest_dir):
+            files.extend(os.path.relpath(os.path.join(root, name), self.dest_dir) for name in names)
+        return sorted(files)
+
+    def copied(self, **kwargs):
+        return sorted(os.path.relpath(path, self.dest_dir) for path in copy_files(self.src_dir, self.dest_dir, **kwargs))
+
+    def test_copies_everything_first(self):
+        self.assertEqual(self.copied(), ["images/logo.png", "index.css"])
+        self.assertEqual(self.read("public", "images", "logo.png"), "png")
+
+    def test_skips_unchanged_files(self):
+        self.copied()
+        self.assertEqual(self.copied(), [])
+
+    def test_copies_changed_files(self):
+        self.copied()
+        self.write("static/index.css", "body { color: red; }")
+        self.assertEqual(self.copied(), ["index.css"])
+        self.assertEqual(self.read("public", "index.css"), "body { color: red; }")
+
+    def test_copies_new_files(self):
+        self.copied()
+        self.write("static/fonts/font.woff", "font")
+        self.assertEqual(self.copied(), ["fonts/font.woff"])
+
+    def test_prunes_stale_files_and_directories(self):
+        self.copied()
+        self.write("public/stale.html", "stale")
+        self.write("public/old/deep/file.txt", "stale")
+        os.remove(self.path("static", "images", "logo.png"))
+        os.rmdir(self.path("static", "images"))
+        self.copied()
+        self.assertEqual(self.dest_files(), ["index.css"])
+        self.assertFalse(os.path.exists(self.path("public", "images")))
+
+    def test_mtime_only_change_is_copied(self):
+        self.copied()
+        self.write("static/index.css", "body {}", mtime_ns=10**18)
+        self.assertEqual(self.copied(), ["index.css"])
+
+    def test_checksum_skips_touched_files(self):
+        self.copied()
+        self.write("static/index.css", "body {}", mtime_ns=10**18)
+        self.assertEqual(self.copied(checksum=True), [])
+        self.assertEqual(self.copied(), []) # The times were lined up, so the mtime check agrees again
+
+    def test_checksum_catches_same_size_same_mtime_edit(self):
+        self.copied()
+        mtime_ns = os.stat(self.path("static", "index.css")).st_mtime_ns
+        self.write("static/index.css", "body []", mtime_ns=mtime_ns)
+        self.assertEqual(self.copied(), [])
+        self.assertEqual(self.copied(checksum=True), ["index.css"])
+        self.assertEqual(self.read("public", "index.css"), "body []")
+
+    def test_file_replaced_by_directory(self):
+        self.copied()
+        os.remove(self.path("static", "index.css"))
+        self.write("static/index.css/main.css", "main")
+        self.copied()
+        self.assertEqual(self.dest_files(), ["images/logo.png", "index.css/main.css"])
+
+    def test_hardlink_strategy(self):
+        self.copied(strategy="hardlink")
+        src_stat = os.stat(self.path("static", "index.css"))
+        dest_stat = os.stat(self.path("public", "index.css"))
+        self.assertEqual(src_stat.st_ino, dest_stat.st_ino)
+        self.assertEqual(self.copied(strategy="hardlink"), [])
+
+    def test_copy_over_hardlink_keeps_source(self):
+        self.copied(strategy="hardlink")
+        self.write("other.css", "p {}")
+        copy_file(self.path("other.css"), self.path("public", "index.css"), "copy")
+        self.assertEqual(self.read("public", "index.css"), "p {}")
+        self.assertEqual(self.read("static", "index.css"), "body {}")
+
+    def test_copy_and_reflink_strategies(self):
+        for strategy in ("copy", "reflink", "auto"):
+            dest_path = self.path(f"out-{strategy}.css")
+            copy_file(self.path("static", "index.css"), dest_path, strategy)
+            with open(dest_path) as f:
+                self.assertEqual(f.read(), "body {}")
+            self.assertNotEqual(os.stat(dest_path).st_ino, os.stat(self.path("static", "index.css")).st_ino)
+            self.assertEqual(os.stat(dest_path).st_mtime_ns, os.stat(self.path("static", "index.css")).st_mtime_ns)
+
+    def test_unknown_strategy(self):
+        with self.assertRaises(ValueError):
+            copy_files(self.src_dir, self.dest_dir, strategy="teleport")
+
+    def test_many_files_in_thread_pool(self):
+        for i in range(50):
+            self.write(f"static/many/file{i}.txt", f"file {i}")
+        self.assertEqual(len(self.copied(workers=4)), 52)
+        for i in range(50):
+            self.assertEqual(self.read("public", "many", f"file{i}.txt"), f"file {i}")
+
+
+if __name__ == "__main__":
+    unittest.main()
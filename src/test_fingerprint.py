@@ -0,0 +1,94 @@
+import os
+import unittest
+from unittest import mock
+from block_cache import BlockCache
+from fingerprint import fingerprinted_path, urls_digest
+from generate_page import write_page
+from manifest import hash_file
+from site_test_case import SiteTestCase
+
+TEMPLATE = '<link href="/index.css" rel="stylesheet"><title>{{ Title }}</title>{{ Content }}'
+
+class TestFingerprint(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("template.html", TEMPLATE)
+        self.write("static/index.css", "body {}")
+        self.write("static/images/logo.png", "png")
+        self.write("static/about.html", "<p>static page</p>")
+        self.write("content/index.md", "# Home\n\n![Logo](/images/logo.png) and [elsewhere](/images/other.png)")
+        self.write("content/blog/post.md", "# Post")
+
+    def copy_of(self, rel_path):
+        return fingerprinted_path(rel_path, hash_file(self.path("static", rel_path)))
+
+    def test_fingerprinted_path(self):
+        self.assertEqual(fingerprinted_path("index.css", "3f9a1c2b" + "0" * 56), "index.3f9a1c2b.css")
+        self.assertEqual(fingerprinted_path(os.path.join("images", "logo.png"), "ab" * 32), os.path.join("images", "logo.abababab.png"))
+        self.assertEqual(fingerprinted_path("LICENSE", "cd" * 32), "LICENSE.cdcdcdcd")
+
+    def test_urls_digest(self):
+        self.assertEqual(urls_digest({}), "")
+        self.assertEqual(urls_digest(None), "")
+        self.assertEqual(urls_digest({"/a": "/b", "/c": "/d"}), urls_digest({"/c": "/d", "/a": "/b"}))
+
+    def test_build_rewrites_urls(self):
+        manifest = self.build(fingerprint=True)
+        css = self.copy_of("index.css")
+        logo = self.copy_of(os.path.join("images", "logo.png"))
+        self.assertEqual(self.read("public", css), "body {}")
+        self.assertEqual(self.read("public", "index.css"), "body {}") # The original stays for other URLs
+        self.assertFalse(os.path.exists(self.path("public", self.copy_of("about.html")))) # Static pages keep their names only
+        self.assertEqual(manifest["assets"]["index.css"]["path"], css)
+
+        html = self.read("public", "index.html")
+        self.assertIn(f'<link href="/{css}" rel="stylesheet">', html)
+        self.assertIn(f'<img src="/{logo.replace(os.sep, "/")}" alt="Logo">', html)
+        self.assertIn('<a href="/images/other.png">', html) # Not a static file
+        self.assertIn(f'href="/{css}"', self.read("public", "blog", "post.html"))
+
+    def test_unchanged_assets_are_not_hashed_again(self):
+        self.build(fingerprint=True)
+        with mock.patch("manifest.hash_file") as hash_file, mock.patch("generate_page.write_page", wraps=write_page) as write:
+            self.build(fingerprint=True)
+        hash_file.assert_not_called()
+        write.assert_not_called()
+
+    def test_changed_asset_rebuilds_pages(self):
+        self.build(fingerprint=True)
+        old_css = self.copy_of("index.css")
+        self.write("static/index.css", "body { color: red; }")
+        self.build(fingerprint=True)
+        new_css = self.copy_of("index.css")
+        self.assertNotEqual(old_css, new_css)
+        self.assertFalse(os.path.exists(self.path("public", old_css)))
+        self.assertEqual(self.read("public", new_css), "body { color: red; }")
+        self.assertIn(f'href="/{new_css}"', self.read("public", "blog", "post.html"))
+
+        os.remove(self.path("static", "index.css"))
+        self.build(fingerprint=True)
+        self.assertFalse(os.path.exists(self.path("public", new_css)))
+        self.assertIn('href="/index.css"', self.read("public", "blog", "post.html"))
+
+    def test_turning_fingerprinting_off(self):
+        self.build(fingerprint=True)
+        manifest = self.build()
+        self.assertEqual(manifest["assets"], {})
+        self.assertFalse(os.path.exists(self.path("public", self.copy_of("index.css"))))
+        self.assertIn('href="/index.css"', self.read("public", "index.html"))
+        self.assertIn('src="/images/logo.png"', self.read("public", "index.html"))
+
+    def test_caches_follow_the_url_map(self):
+        cache_dir = self.path("cache")
+        block_cache = BlockCache()
+        self.build(cache_dir=cache_dir, block_cache=block_cache)
+        self.build(full=True, fingerprint=True, cache_dir=cache_dir, block_cache=block_cache)
+        logo = self.copy_of(os.path.join("images", "logo.png")).replace(os.sep, "/")
+        self.assertIn(f'src="/{logo}"', self.read("public", "index.html"))
+        self.assertTrue(any(logo in html for html in block_cache.entries.values()))
+        self.build(full=True, cache_dir=cache_dir, block_cache=block_cache)
+        self.assertIn('src="/images/logo.png"', self.read("public", "index.html"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import io
+import os
+import unittest
+from unittest import mock
+from generate_page import generate_page, generate_pages_recursive, render_page, write_page_html, stream_page_html, find_pages
+from template import Template
+from site_test_case import SiteTestCase
+
+TEMPLATE = "<title>{{ Title }}</title><body>{{ Content }}</body>"
+
+class TestGeneratePage(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content_dir = self.path("content")
+        self.dest_dir = self.path("public")
+        self.template_path = self.write("template.html", TEMPLATE)
+
+    def test_render_page(self):
+        html = render_page("# Hello\n\nSome **bold** text", TEMPLATE)
+        self.assertEqual(html, "<title>Hello</title><body><div><h1>Hello</h1><p>Some <b>bold</b> text</p></div></body>")
+
+    def test_render_page_repeated_content(self):
+        html = render_page("# Hi", "{{ Content }}|{{ Content }}|{{ Title }}")
+        self.assertEqual(html, "<div><h1>Hi</h1></div>|<div><h1>Hi</h1></div>|Hi")
+
+    def test_render_page_with_compiled_template(self):
+        self.assertEqual(render_page("# Hi", Template(TEMPLATE)), "<title>Hi</title><body><div><h1>Hi</h1></div></body>")
+
+    def test_render_page_without_content_placeholder(self):
+        self.assertEqual(render_page("# Hi", "<title>{{ Title }}</title>"), "<title>Hi</title>")
+
+    def test_write_page_html_streams(self):
+        fp = io.StringIO()
+        write_page_html("# Hello\n\n* one\n* two", TEMPLATE, fp)
+        self.assertEqual(fp.getvalue(), "<title>Hello</title><body><div><h1>Hello</h1><ul><li>one</li><li>two</li></ul></div></body>")
+
+    def test_stream_page_html_matches_render_page(self):
+        markdown = "# Hello\n\nSome **bold** text\n\n* one\n  * two\n\n```\na\nb\n```\n"
+        fp = io.StringIO()
+        stream_page_html(io.StringIO(markdown), "{{ Title }}|{{ Content }}|{{ Content }}", fp)
+        self.assertEqual(fp.getvalue(), render_page(markdown, "{{ Title }}|{{ Content }}|{{ Content }}"))
+
+    def test_large_page_is_streamed(self):
+        markdown = "# Big\n\n" + "\n\n".join(f"Paragraph {i} with `code`" for i in range(100))
+        from_path = self.write("content/big.md", markdown)
+        dest_path = os.path.join(self.dest_dir, "big.html")
+        with mock.patch("generate_page.STREAM_THRESHOLD", 100), mock.patch("generate_page.write_page") as write_page:
+            generate_page(from_path, self.template_path, dest_path)
+        write_page.assert_not_called()
+        self.assertEqual(self.read("public", "big.html"), render_page(markdown, TEMPLATE))
+
+    def test_failed_stream_leaves_no_file(self):
+        from_path = self.write("content/bad.md", "no title\n\n" + "text\n" * 100)
+        with mock.patch("generate_page.STREAM_THRESHOLD", 100), self.assertRaises(ValueError):
+            generate_page(from_path, self.template_path, os.path.join(self.dest_dir, "bad.html"))
+        self.assertEqual(os.listdir(self.dest_dir), [])
+
+    def test_failed_render_leaves_no_file(self):
+        from_path = self.write("content/bad.md", "# Bad\n\n####### too deep")
+        dest_path = os.path.join(self.dest_dir, "bad.html")
+        with self.assertRaises(ValueError):
+            generate_page(from_path, self.template_path, dest_path)
+        self.assertEqual(os.listdir(self.dest_dir), [])
+
+    def test_render_page_no_title(self):
+        with self.assertRaises(ValueError):
+            render_page("No title here", TEMPLATE)
+
+    def test_generate_page(self):
+        from_path = self.write("content/index.md", "# Home")
+        dest_path = os.path.join(self.dest_dir, "index.html")
+        generate_page(from_path, self.template_path, dest_path)
+        self.assertEqual(self.read("public", "index.html"), "<title>Home</title><body><div><h1>Home</h1></div></body>")
+
+    def test_find_pages_skips_other_files(self):
+        self.write("content/index.md", "# Home")
+        self.write("content/notes.txt", "not markdown")
+        jobs = find_pages(self.content_dir, self.dest_dir)
+        self.assertEqual(jobs, [(os.path.join(self.content_dir, "index.md"), os.path.join(self.dest_dir, "index.html"))])
+
+    def test_generate_pages_recursive_layout(self):
+        self.write("content/index.md", "# Home")
+        self.write("content/blog/post.md", "# Post")
+        self.write("content/blog/deep/nested.md", "# Nested")
+        generate_pages_recursive(self.content_dir, self.template_path, self.dest_dir, workers=1)
+        self.assertIn("<h1>Home</h1>", self.read("public", "index.html"))
+        self.assertIn("<h1>Post</h1>", self.read("public", "blog/post.html"))
+        self.assertIn("<h1>Nested</h1>", self.read("public", "blog/deep/nested.html"))
+
+    def test_generate_pages_recursive_process_pool(self):
+        for i in range(10):
+            self.write(f"content/pages/page{i}.md", f"# Page {i}\n\nBody {i}")
+        dest_paths = generate_pages_recursive(self.content_dir, self.template_path, self.dest_dir, workers=2)
+        self.assertEqual(len(dest_paths), 10)
+        for i in range(10):
+            self.assertEqual(self.read("public", f"pages/page{i}.html"), f"<title>Page {i}</title><body><div><h1>Page {i}</h1><p>Body {i}</p></div></body>")
+
+    def test_generate_pages_recursive_worker_error(self):
+        self.write("content/a.md", "# Good")
+        self.write("content/b.md", "missing title")
+        with self.assertRaises(ValueError):
+            generate_pages_recursive(self.content_dir, self.template_path, self.dest_dir, workers=2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,7 @@
 import unittest
 from htmlnode import *
+from leafnode import LeafNode
+from parentnode import ParentNode
 
 class TestHTMLNode(unittest.TestCase):
     def test_only_tag(self):
@@ -49,6 +51,12 @@ class TestHTMLNode(unittest.TestCase):
         expected_result = "tag= this is a tag, value= this is a value, children= ['child1', 'child2', 'child 3'], props= {'key1': 'value1', 'key2': 'value2', 'key3': 'value3'}"
         self.assertEqual(result, expected_result)
 
+    def test_no_instance_dict(self):
+        leaf = LeafNode("b", "text", None)
+        parent = ParentNode("p", [leaf], None)
+        for node in (HTMLNode("p"), leaf, parent):
+            self.assertFalse(hasattr(node, "__dict__"))
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
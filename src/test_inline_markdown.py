@@ -510,12 +510,76 @@ class TestSplitNodes(unittest.TestCase):
         expected = []
         self.assertEqual(result, expected)
 
+    def test_text_to_textnodes_bold_at_end(self):
+        text = "Ends with **bold**"
+        result = text_to_textnodes(text)
+        expected = [
+            TextNode("Ends with ", TextType.TEXT),
+            TextNode("bold", TextType.BOLD)
+        ]
+        self.assertEqual(result, expected)
+
+    def test_text_to_textnodes_delimiters_inside_code(self):
+        text = "Use `a * b` or `**kwargs` here"
+        result = text_to_textnodes(text)
+        expected = [
+            TextNode("Use ", TextType.TEXT),
+            TextNode("a * b", TextType.CODE),
+            TextNode(" or ", TextType.TEXT),
+            TextNode("**kwargs", TextType.CODE),
+            TextNode(" here", TextType.TEXT)
+        ]
+        self.assertEqual(result, expected)
+
+    def test_text_to_textnodes_markdown_inside_bold(self):
+        text = "Say **not *italic* or [a link](www.example.com)**"
+        result = text_to_textnodes(text)
+        expected = [
+            TextNode("Say ", TextType.TEXT),
+            TextNode("not *italic* or [a link](www.example.com)", TextType.BOLD)
+        ]
+        self.assertEqual(result, expected)
+
+    def test_text_to_textnodes_image_and_link_with_same_text(self):
+        text = "![same](www.example.com) and [same](www.example.com)"
+        result = text_to_textnodes(text)
+        expected = [
+            TextNode("same", TextType.IMAGE, "www.example.com"),
+            TextNode(" and ", TextType.TEXT),
+            TextNode("same", TextType.LINK, "www.example.com")
+        ]
+        self.assertEqual(result, expected)
+
+    def test_text_to_textnodes_unmatched_delimiter(self):
+        for text in ["This is *not closed", "This is **not closed", "This is `not closed"]:
+            with self.assertRaises(ValueError):
+                text_to_textnodes(text)
+
+    def test_split_nodes_link_after_image_with_same_text(self):
+        nodes = [TextNode("![same](www.example.com) and [same](www.example.com)", TextType.TEXT)]
+        result = split_nodes_link(nodes)
+        expected = [
+            TextNode("![same](www.example.com) and ", TextType.TEXT),
+            TextNode("same", TextType.LINK, "www.example.com")
+        ]
+        self.assertEqual(result, expected)
+
     def test_text_to_textnodes_no_markdown(self):
         text = "This is some plain text"
         result = text_to_textnodes(text)
         expected = [TextNode("This is some plain text", TextType.TEXT)]
         self.assertEqual(result, expected)
 
+    def test_text_to_textnodes_starting_with_bold(self):
+        text = "**I like Tolkien**. Read my [first post here](/majesty)"
+        result = text_to_textnodes(text)
+        expected = [
+            TextNode("I like Tolkien", TextType.BOLD),
+            TextNode(". Read my ", TextType.TEXT),
+            TextNode("first post here", TextType.LINK, "/majesty")
+        ]
+        self.assertEqual(result, expected)
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
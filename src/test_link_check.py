@@ -0,0 +1,101 @@
+import os
+import unittest
+from unittest import mock
+from build import merge_shards
+from generate_page import render_page
+from link_check import resolve_link, is_served, find_broken_links
+from search_index import tokenize
+from site_test_case import SiteTestCase
+from textnode_to_htmlnode import collecting_page_text, using_asset_urls
+
+TEMPLATE = "<title>{{ Title }}</title>{{ Content }}"
+
+class TestLinkCheck(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("template.html", TEMPLATE)
+        self.write("static/index.css", "body {}")
+        self.write("static/images/logo.png", "png")
+        self.write("content/index.md", "# Home\n\nRead [the post](/blog/post.html), see [the blog](/blog/) and [missing](/majesty).")
+        self.write("content/blog/index.md", "# Blog\n\n[Post](post.html) and [up](../index.html#top) and [away](https://example.com/x)")
+        self.write("content/blog/post.md", "# Post\n\n![Logo](/images/logo.png)\n\n* [broken](gone.html)\n\n[self](#section)")
+
+    def build(self, public="public", check_links=True, **kwargs):
+        return super().build(public, check_links=check_links, **kwargs)
+
+    def links(self, rel_path, asset_urls=None):
+        with collecting_page_text(tokenize) as page_text, using_asset_urls(asset_urls):
+            render_page(self.read("content", rel_path), TEMPLATE)
+        return sorted(page_text.links)
+
+    def test_page_links(self):
+        self.assertEqual(self.links("blog/post.md"), ["#section", "/images/logo.png", "gone.html"])
+        urls = {"/images/logo.png": "/images/logo.3f9a1c2b.png"}
+        self.assertIn("/images/logo.3f9a1c2b.png", self.links("blog/post.md", urls))
+
+    def test_link_after_bold_start(self):
+        # A paragraph opening with bold text is not a list, so its links are kept
+        self.write("content/fans.md", "# Fans\n\n**I like Tolkien**. Read my [first post here](/majesty)")
+        self.assertEqual(self.links("fans.md"), ["/majesty"])
+        manifest = self.build()
+        self.assertIn(("fans.md", "/majesty"), find_broken_links(manifest))
+
+    def test_resolve_link(self):
+        self.assertEqual(resolve_link("/blog/post.html", "other.html"), "/blog/other.html")
+        self.assertEqual(resolve_link("/blog/post.html", "../images/a%20b.png?v=1#x"), "/images/a b.png")
+        self.assertEqual(resolve_link("/blog/post.html", "./"), "/blog/")
+        self.assertEqual(resolve_link("/index.html", "/"), "/")
+        for url in ("https://example.com/", "//cdn.example.com/x.js", "mailto:me@example.com", "#top", "?page=2"):
+            self.assertIsNone(resolve_link("/index.html", url))
+
+    def test_is_served(self):
+        outputs = {"/index.html", "/blog/index.html", "/blog/post.html"}
+        self.assertTrue(is_served("/blog/post.html", outputs))
+        self.assertTrue(is_served("/blog/", outputs))
+        self.assertTrue(is_served("/blog", outputs)) # Redirected to /blog/
+        self.assertTrue(is_served("/", outputs))
+        self.assertFalse(is_served("/blog/post", outputs))
+        self.assertFalse(is_served("/images/", outputs))
+
+    def test_build_reports_broken_links(self):
+        manifest = self.build()
+        self.assertEqual(find_broken_links(manifest), [(os.path.join("blog", "post.md"), "gone.html"), ("index.md", "/majesty")])
+
+    def test_only_changed_pages_are_read(self):
+        self.build()
+        with mock.patch("generate_page.collecting_page_text", wraps=collecting_page_text) as collect:
+            manifest = self.build()
+        collect.assert_not_called()
+
+        self.write("content/blog/post.md", "# Post\n\n[fixed](index.html)")
+        os.remove(self.path("content", "index.md"))
+        with mock.patch("generate_page.collecting_page_text", wraps=collecting_page_text) as collect:
+            manifest = self.build()
+        self.assertEqual(collect.call_count, 1)
+        self.assertEqual(find_broken_links(manifest), [(os.path.join("blog", "index.md"), "../index.html#top")]) # Its target was removed
+
+    def test_fingerprinted_links(self):
+        manifest = self.build(fingerprint=True)
+        self.assertEqual(len(find_broken_links(manifest)), 2)
+        self.assertTrue(any(".png" in url and url != "/images/logo.png" for url in manifest["links"][os.path.join("blog", "post.md")]["links"]))
+
+    def test_links_off(self):
+        self.build()
+        manifest = self.build(check_links=False)
+        self.assertEqual(manifest["links"], {})
+        manifest = self.build(search=True) # Turning the check on again collects the links of the unchanged pages
+        self.assertEqual(len(find_broken_links(manifest)), 2)
+
+    def test_shards_are_checked_when_merged(self):
+        dirs = []
+        for index in (1, 2, 3):
+            with mock.patch("build.find_broken_links") as find:
+                self.build(f"shard{index}", shard=(index, 3))
+            find.assert_not_called() # A shard does not have the whole site to check against
+            dirs.append(self.path(f"shard{index}"))
+        manifest = merge_shards(dirs, self.path("public"))
+        self.assertEqual(find_broken_links(manifest), find_broken_links(self.build("full")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import os
+import unittest
+from manifest import new_manifest, load_manifest, save_manifest, hash_file, file_record, remove_output
+from site_test_case import SiteTestCase
+
+class TestManifest(SiteTestCase):
+    def test_load_missing_manifest(self):
+        self.assertEqual(load_manifest(self.path("missing.json")), new_manifest())
+
+    def test_load_corrupt_manifest(self):
+        path = self.write("manifest.json", "{not json")
+        self.assertEqual(load_manifest(path), new_manifest())
+
+    def test_load_outdated_manifest(self):
+        path = self.write("manifest.json", '{"version": 0, "pages": {"a.md": {}}}')
+        self.assertEqual(load_manifest(path), new_manifest())
+
+    def test_save_and_load(self):
+        manifest = new_manifest()
+        manifest["pages"]["index.md"] = {"hash": "abc", "size": 1, "mtime": 2}
+        path = self.path("manifest.json")
+        save_manifest(manifest, path)
+        self.assertEqual(load_manifest(path), manifest)
+        self.assertFalse(os.path.exists(path + ".tmp"))
+
+    def test_hash_file(self):
+        path_a = self.write("a.txt", "same")
+        path_b = self.write("b.txt", "same")
+        path_c = self.write("c.txt", "different")
+        self.assertEqual(hash_file(path_a), hash_file(path_b))
+        self.assertNotEqual(hash_file(path_a), hash_file(path_c))
+
+    def test_file_record_reuses_hash_when_stat_matches(self):
+        path = self.write("a.txt", "text")
+        record = file_record(path)
+        stale = dict(record, hash="cached")
+        self.assertEqual(file_record(path, stale)["hash"], "cached")
+
+    def test_file_record_rehashes_when_stat_differs(self):
+        path = self.write("a.txt", "text")
+        record = file_record(path)
+        stale = dict(record, hash="cached", size=record["size"] + 1)
+        self.assertEqual(file_record(path, stale)["hash"], record["hash"])
+
+    def test_remove_output_prunes_empty_directories(self):
+        root = self.path("public")
+        keep = self.write("public/keep.html", "")
+        path = self.write("public/a/b/page.html", "")
+        remove_output(path, root)
+        self.assertFalse(os.path.exists(self.path("public", "a")))
+        self.assertTrue(os.path.exists(keep))
+
+    def test_remove_output_missing_file(self):
+        root = self.path("public")
+        os.makedirs(root)
+        remove_output(self.path("public", "missing.html"), root)
+        self.assertTrue(os.path.exists(root))
+
+if __name__ == "__main__":
+    unittest.main()
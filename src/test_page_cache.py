@@ -0,0 +1,81 @@
+import os
+import io
+import tempfile
+import unittest
+from unittest import mock
+from page_cache import PageCache, copy_entry
+from block_cache import BlockCache, BLOCK_CACHE_NAME
+
+class TestPageCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = PageCache(os.path.join(self.tmp.name, "cache"), max_bytes=1024)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read_entry(self, path):
+        out = io.StringIO()
+        copy_entry(path, out)
+        return out.getvalue()
+
+    def test_key_depends_on_markdown(self):
+        self.assertEqual(self.cache.key("# A"), self.cache.key("# A"))
+        self.assertNotEqual(self.cache.key("# A"), self.cache.key("# B"))
+
+    def test_key_depends_on_parser_version(self):
+        key = self.cache.key("# A")
+        with mock.patch("page_cache.PARSER_VERSION", "other"):
+            self.assertNotEqual(self.cache.key("# A"), key)
+
+    def test_get_miss(self):
+        self.assertIsNone(self.cache.get(self.cache.key("# A")))
+
+    def test_get_or_render_renders_once(self):
+        calls = []
+        def write_body(fp):
+            calls.append(1)
+            fp.write("<div>body</div>")
+        first = self.cache.get_or_render("# A", write_body)
+        second = self.cache.get_or_render("# A", write_body)
+        self.assertEqual(first, second)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(self.read_entry(first), "<div>body</div>")
+
+    def test_failed_render_stores_nothing(self):
+        def write_body(fp):
+            fp.write("<div>")
+            raise ValueError("bad markdown")
+        with self.assertRaises(ValueError):
+            self.cache.get_or_render("# A", write_body)
+        self.assertIsNone(self.cache.get(self.cache.key("# A")))
+        self.assertEqual(os.listdir(os.path.dirname(self.cache.entry_path(self.cache.key("# A")))), [])
+
+    def test_prune_evicts_least_recently_used(self):
+        paths = {}
+        for i, name in enumerate(["old", "used", "new"]):
+            paths[name] = self.cache.put(self.cache.key(name), lambda fp: fp.write("x" * 400))
+            os.utime(paths[name], ns=(i * 10**9, i * 10**9))
+        self.cache.get(self.cache.key("old")) # Reading an entry makes it the most recently used
+        removed = self.cache.prune()
+        self.assertEqual(removed, 1)
+        self.assertFalse(os.path.exists(paths["used"]))
+        self.assertTrue(os.path.exists(paths["old"]))
+        self.assertTrue(os.path.exists(paths["new"]))
+
+    def test_prune_keeps_block_cache(self):
+        block_cache = BlockCache()
+        block_cache.render("x" * 2000) # Larger than the whole page cache budget
+        block_cache_path = os.path.join(self.cache.cache_dir, BLOCK_CACHE_NAME)
+        block_cache.save(block_cache_path)
+        os.utime(block_cache_path, ns=(0, 0)) # Older than any entry
+        entry = self.cache.put(self.cache.key("page"), lambda fp: fp.write("x" * 400))
+        self.assertEqual(self.cache.prune(), 0)
+        self.assertTrue(os.path.exists(block_cache_path))
+        self.assertTrue(os.path.exists(entry))
+
+    def test_prune_empty_cache(self):
+        self.assertEqual(self.cache.prune(), 0)
+
+if __name__ == "__main__":
+    unittest.main()
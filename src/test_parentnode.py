@@ -1,3 +1,4 @@
+import io
 import unittest
 from parentnode import *
 from leafnode import *
@@ -45,6 +46,66 @@ class TestParentNode(unittest.TestCase):
         expected_result = "<h1>this is some text<p><b>this is some text</b><a href=\"www.google.com\">Click me!</a></p></h1>"
         self.assertEqual(result, expected_result)
 
+    def test_to_html_deep_nesting(self):
+        node = LeafNode("b", "leaf", None)
+        for _ in range(50):
+            node = ParentNode("div", [LeafNode(None, "x", None), node], {"class": "c"})
+        expected_result = "<div class=\"c\">x" * 50 + "<b>leaf</b>" + "</div>" * 50
+        self.assertEqual(node.to_html(), expected_result)
+
+    def test_write_fragments(self):
+        node = ParentNode("p", [LeafNode("b", "bold", None), LeafNode(None, "text", None)], None)
+        fragments = []
+        node.write_fragments(fragments.append)
+        self.assertEqual(fragments, ["<p>", "<b>bold</b>", "text", "</p>"])
+
+    def test_write_html(self):
+        node = ParentNode("p", [LeafNode("b", "bold", None), LeafNode(None, "text", None)], {"class": "intro"})
+        fp = io.StringIO()
+        node.write_html(fp)
+        self.assertEqual(fp.getvalue(), node.to_html())
+
+    def test_iter_html(self):
+        node = ParentNode("ul", [ParentNode("li", [LeafNode("i", "one", None)], None), ParentNode("li", [LeafNode(None, "two", None)], None)], None)
+        self.assertEqual(list(node.iter_html()), ["<ul>", "<li>", "<i>one</i>", "</li>", "<li>", "two", "</li>", "</ul>"])
+        self.assertEqual("".join(node.iter_html()), node.to_html())
+
+    def test_to_html_invalid_child_added_later(self):
+        node = ParentNode("ul", [LeafNode("li", "item", None)], None)
+        node.children.append("not a node")
+        with self.assertRaises(ValueError):
+            node.to_html()
+
+    def test_iter_html_invalid_child_added_later(self):
+        node = ParentNode("ul", [ParentNode("li", [LeafNode(None, "item", None)], None)], None)
+        node.children[0].children.append(42)
+        with self.assertRaises(ValueError):
+            list(node.iter_html())
+
+    def test_deep_tree(self):
+        depth = 100000 # Far past the recursion limit
+        node = LeafNode(None, "core", None)
+        for _ in range(depth):
+            node = ParentNode("blockquote", [node], None)
+        expected = "<blockquote>" * depth + "core" + "</blockquote>" * depth
+        self.assertEqual(node.to_html(), expected)
+        self.assertEqual("".join(node.iter_html()), expected)
+
+    def test_siblings_after_deep_branch(self):
+        inner = ParentNode("li", [LeafNode(None, "a", None), ParentNode("ul", [ParentNode("li", [LeafNode(None, "b", None)], None)], None)], None)
+        node = ParentNode("ul", [inner, ParentNode("li", [LeafNode("i", "c", None)], {"class": "x"})], None)
+        expected = "<ul><li>a<ul><li>b</li></ul></li><li class=\"x\"><i>c</i></li></ul>"
+        self.assertEqual(node.to_html(), expected)
+        self.assertEqual("".join(node.iter_html()), expected)
+
+    def test_subclass_child_renders_itself(self):
+        class Comment(LeafNode):
+            def to_html(self):
+                return f"<!-- {self.value} -->"
+        node = ParentNode("div", [Comment(None, "note", None)], None)
+        self.assertEqual(node.to_html(), "<div><!-- note --></div>")
+        self.assertEqual("".join(node.iter_html()), "<div><!-- note --></div>")
+
     def test_invalid_child(self):
         with self.assertRaises(ValueError):
             ParentNode("a", ["1","2"], None)
@@ -0,0 +1,84 @@
+import os
+import json
+import time
+import unittest
+import profiler
+from profiler import stage
+from site_test_case import SiteTestCase
+
+class TestProfiler(unittest.TestCase):
+    def tearDown(self):
+        profiler.disable()
+
+    def test_disabled_stage_is_a_no_op(self):
+        with stage("parse") as timed:
+            self.assertIsNone(timed)
+        self.assertEqual(profiler.drain(), [])
+
+    def test_nested_self_time(self):
+        profiler.enable()
+        with stage("outer"):
+            with stage("inner", detail=1):
+                time.sleep(0.02)
+        events = profiler.disable().events
+        self.assertEqual([event["name"] for event in events], ["inner", "outer"])
+        inner, outer = events
+        self.assertEqual(inner["ph"], "X")
+        self.assertEqual(inner["args"]["detail"], 1)
+        self.assertGreaterEqual(inner["dur"], 20000)
+        self.assertGreaterEqual(outer["dur"], inner["dur"])
+        self.assertLess(outer["args"]["self_ms"], 10) # The sleep belongs to the inner stage
+
+    def test_report(self):
+        build_profile = profiler.enable()
+        with stage("a.md", cat="page"):
+            with stage("parse"):
+                pass
+            with stage("parse"):
+                pass
+        report = build_profile.report(top=5)
+        self.assertEqual(build_profile.stage_totals()[0][:2], ("parse", 2))
+        self.assertIn("a.md", report)
+        self.assertEqual(build_profile.slowest_pages(0), [])
+
+    def test_record(self):
+        build_profile = profiler.enable()
+        profiler.record([{"name": "parse", "cat": "stage", "args": {"self_ms": 1.0, "self_cpu_ms": 1.0}}])
+        self.assertEqual(build_profile.stage_totals(), [("parse", 1, 1.0, 1.0)])
+
+class TestProfileBuild(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(4):
+            self.write(f"content/page{i}.md", f"# Page {i}\n\nSome **bold** text")
+        self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+
+    def tearDown(self):
+        profiler.disable()
+        super().tearDown()
+
+    def profile_build(self, workers):
+        build_profile = profiler.enable()
+        self.build(workers=workers)
+        profiler.disable()
+        return build_profile
+
+    def test_serial_build(self):
+        build_profile = self.profile_build(workers=1)
+        stages = {name for name, _, _, _ in build_profile.stage_totals()}
+        self.assertTrue({"copy static", "select pages", "read", "parse", "inline", "render", "template", "write", "save manifest"} <= stages)
+        self.assertEqual(len(build_profile.slowest_pages(10)), 4)
+
+    def test_worker_events_are_collected(self):
+        build_profile = self.profile_build(workers=2)
+        self.assertEqual(sorted(os.path.basename(path) for path, _, _ in build_profile.slowest_pages(10)), ["page0.md", "page1.md", "page2.md", "page3.md"])
+        self.assertEqual(dict((name, calls) for name, calls, _, _ in build_profile.stage_totals())["parse"], 4)
+
+        trace_path = self.path("trace.json")
+        build_profile.write_trace(trace_path)
+        with open(trace_path) as f:
+            self.assertEqual(len(json.load(f)["traceEvents"]), len(build_profile.events))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,158 @@
+import os
+import unittest
+from unittest import mock
+import block_cache
+from block_cache import BlockCache
+from build import merge_shards
+from generate_page import render_page
+from manifest import load_manifest, MANIFEST_NAME
+from search_index import SEARCH_INDEX_NAME, SearchIndex, page_url, tokenize, write_varints, read_varints
+from site_test_case import SiteTestCase
+from textnode_to_htmlnode import collecting_page_text
+
+TEMPLATE = "<title>{{ Title }}</title>{{ Content }}"
+
+class TestSearchIndex(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("template.html", TEMPLATE)
+        self.write("content/index.md", "# Home\n\nWelcome to the **hobbit** site.")
+        self.write("content/blog/shire.md", "# The Shire\n\nHobbits live in the Shire. A hobbit hole.\n\n* second breakfast\n* [elevenses](/food.html)")
+        self.write("content/blog/mordor.md", "# Mordor\n\nOne does not simply walk into Mordor.\n\n```\nwalk(mordor)\n```")
+
+    def build(self, public="public", search=True, **kwargs):
+        return super().build(public, search=search, **kwargs)
+
+    def load(self, public="public"):
+        with open(self.path(public, SEARCH_INDEX_NAME), "rb") as f:
+            return SearchIndex.decode(f.read())
+
+    def test_varints(self):
+        for values in ([], [0, 1, 127], [128, 0, 300, 2 ** 32 - 1, 5]):
+            buffer = bytearray()
+            write_varints(buffer, values)
+            decoded, pos = read_varints(bytes(buffer), 0, len(values))
+            self.assertEqual(list(decoded), values)
+            self.assertEqual(pos, len(buffer))
+
+    def test_page_text(self):
+        with collecting_page_text(tokenize) as page_text:
+            render_page(self.read("content", "blog", "shire.md"), TEMPLATE)
+        self.assertEqual(page_text.title, "The Shire")
+        self.assertEqual(page_text.words["shire"], 2)
+        self.assertEqual(page_text.words["hobbit"], 1)
+        self.assertEqual(page_text.words["elevenses"], 1) # Link text is indexed
+        self.assertNotIn("food", page_text.words) # Link URLs are not
+        with collecting_page_text(tokenize) as page_text:
+            render_page(self.read("content", "blog", "mordor.md"), TEMPLATE)
+        self.assertEqual(page_text.words["mordor"], 3) # Code blocks are indexed
+        self.assertEqual(tokenize("Über " + "x" * 41), ["über"])
+        self.assertEqual(page_url(os.path.join("blog", "shire.md")), "/blog/shire.html")
+
+    def test_round_trip(self):
+        index = SearchIndex()
+        index.add_page("/a.html", "A", {"hobbit": 2, "shire": 1})
+        for i in range(200):
+            index.add_page(f"/p{i}.html", f"P{i}", {"hobbit": 1, "big": 1000 + i})
+        data = index.encode()
+        decoded = SearchIndex.decode(data)
+        self.assertEqual(decoded.encode(), data) # Untouched words are written back as read
+        self.assertEqual(decoded.search("shire hobbit"), [("/a.html", "A")])
+        self.assertEqual(decoded.search("hobbit", limit=2), [("/a.html", "A"), ("/p0.html", "P0")])
+        self.assertEqual(list(decoded.get_postings("big")[1])[-1], 1199)
+        self.assertEqual(decoded.search("nothing"), [])
+        for corrupt in (b"", b"JUNK\x01", data[:-1], data + b"\x00"):
+            with self.assertRaises(ValueError):
+                SearchIndex.decode(corrupt)
+
+    def test_update_and_compact(self):
+        index = SearchIndex()
+        for i in range(4):
+            index.add_page(f"/p{i}.html", f"P{i}", {"common": 1, f"word{i}": 1})
+        index.add_page("/p1.html", "P1 again", {"common": 1, "fresh": 1})
+        index.remove_page("/p2.html")
+        self.assertEqual(index.search("word1"), [])
+        self.assertEqual(index.search("fresh"), [("/p1.html", "P1 again")])
+        self.assertEqual(len(index.search("common")), 3)
+        index.compact()
+        self.assertEqual(len(index.docs), 3)
+        self.assertNotIn("word2", index.postings)
+        self.assertEqual(SearchIndex.decode(index.encode()).search("fresh"), [("/p1.html", "P1 again")])
+
+    def test_build_writes_index(self):
+        self.build()
+        index = self.load()
+        self.assertEqual(index.search("hobbit"), [("/blog/shire.html", "The Shire"), ("/index.html", "Home")])
+        self.assertEqual(index.search("walk mordor"), [("/blog/mordor.html", "Mordor")])
+
+    def test_build_with_workers(self):
+        self.build()
+        self.build("parallel", workers=2)
+        self.assertEqual(self.load("parallel").encode(), self.load().encode())
+
+    def test_incremental_build_reads_only_changed_pages(self):
+        self.build()
+        with mock.patch("generate_page.collecting_page_text", wraps=collecting_page_text) as collect, mock.patch("search_index.write_index") as write:
+            self.build()
+        collect.assert_not_called()
+        write.assert_not_called()
+
+        self.write("content/blog/mordor.md", "# Mordor\n\nNow with hobbits.")
+        os.remove(self.path("content", "index.md"))
+        with mock.patch("generate_page.collecting_page_text", wraps=collecting_page_text) as collect:
+            manifest = self.build()
+        self.assertEqual(collect.call_count, 1)
+        self.assertEqual(sorted(manifest["search"]), sorted(manifest["pages"]))
+        index = self.load()
+        self.assertEqual(index.search("hobbits"), [("/blog/mordor.html", "Mordor"), ("/blog/shire.html", "The Shire")])
+        self.assertEqual(index.search("walk"), [])
+        self.assertEqual(index.search("welcome"), [])
+
+    def test_collected_rebuild_uses_block_cache(self):
+        cache = BlockCache()
+        self.build(block_cache=cache, cache_dir=self.path("cache"))
+        self.write("content/blog/shire.md", "# The Shire\n\nHobbits live in the Shire. A hobbit hole.\n\n* second breakfast\n* [supper](/food.html)")
+        with mock.patch("block_cache.block_to_html_node", wraps=block_cache.block_to_html_node) as parse:
+            self.build(block_cache=cache, cache_dir=self.path("cache"))
+        self.assertEqual(parse.call_count, 1) # Only the edited list
+        index = self.load()
+        self.assertEqual(index.search("supper"), [("/blog/shire.html", "The Shire")])
+        self.assertEqual(index.search("elevenses"), [])
+        self.assertEqual(len(index.search("hobbit")), 2)
+
+    def test_unreadable_index_is_rebuilt(self):
+        self.build()
+        with open(self.path("public", SEARCH_INDEX_NAME), "wb") as f:
+            f.write(b"garbage")
+        self.build()
+        self.assertEqual(len(self.load().search("mordor")), 1)
+
+    def test_turning_search_on_renders_unchanged_pages(self):
+        self.build(search=False)
+        self.build(cache_dir=self.path("cache")) # Nothing changed, but every page has to be read for the index
+        self.assertEqual(self.load().search("hobbit"), [("/blog/shire.html", "The Shire"), ("/index.html", "Home")])
+
+    def test_turning_search_off(self):
+        self.build()
+        manifest = self.build(search=False)
+        self.assertEqual(manifest["search"], {})
+        self.assertFalse(os.path.exists(self.path("public", SEARCH_INDEX_NAME)))
+
+    def test_shard_indexes_are_merged(self):
+        for i in range(12):
+            self.write(f"content/page{i}.md", f"# Page {i}\n\nnumber{i} shared")
+        self.build("full")
+        dirs = []
+        for index in (1, 2, 3):
+            self.build(f"shard{index}", shard=(index, 3))
+            dirs.append(self.path(f"shard{index}"))
+        manifest = merge_shards(dirs, self.path("merged"))
+        self.assertEqual(manifest["search"], load_manifest(self.path("full", MANIFEST_NAME))["search"])
+        merged = self.load("merged")
+        expected = self.load("full")
+        for query in ("shared", "number7", "hobbit", "mordor walk"):
+            self.assertEqual(merged.search(query, limit=20), expected.search(query, limit=20))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,194 @@
+import os
+import gzip
+import time
+import unittest
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+from serve import SiteStore, start_server, choose_encoding
+from compress import compress_file
+from manifest import MANIFEST_NAME, new_manifest, save_manifest
+from site_test_case import SiteTestCase
+
+class TestServe(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("index.html", "<h1>Home</h1>")
+        self.write("blog/index.html", "<h1>Blog</h1>")
+        self.write("index.css", "body {}")
+        self.write(".ssg-manifest.json", "{}")
+        self.store = SiteStore(self.path())
+        self.store.sync()
+        self.server = start_server(self.store, 0)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        super().tearDown()
+
+    def write_manifest(self, compressed={}, static={}):
+        # Record the outputs the way a build would, with the encodings of their precompressed siblings
+        manifest = new_manifest()
+        manifest["compressed"] = {rel_path: {"encodings": encodings} for rel_path, encodings in compressed.items()}
+        manifest["static"] = {rel_path: {} for rel_path in static}
+        save_manifest(manifest, self.path(MANIFEST_NAME))
+
+    def request(self, path, method="GET", headers={}):
+        connection = http.client.HTTPConnection("localhost", self.server.server_address[1], timeout=10)
+        try:
+            connection.request(method, path, headers=headers)
+            response = connection.getresponse()
+            return response.status, dict(response.getheaders()), response.read()
+        finally:
+            connection.close()
+
+    def test_sync(self):
+        self.assertEqual(sorted(self.store.entries), ["/blog/index.html", "/index.css", "/index.html"])
+        self.assertEqual(self.store.sync(), 0)
+        self.write("index.css", "p {}")
+        os.remove(self.path("blog", "index.html"))
+        self.assertEqual(self.store.sync(), 2)
+        self.assertEqual(self.store.get("/index.css").body, b"p {}")
+        self.assertIsNone(self.store.get("/blog/"))
+
+    def test_get(self):
+        status, headers, body = self.request("/")
+        self.assertEqual(status, 200)
+        self.assertEqual(body, b"<h1>Home</h1>")
+        self.assertEqual(headers["Content-Type"], "text/html; charset=utf-8")
+        self.assertIn("ETag", headers)
+        self.assertIn("Last-Modified", headers)
+
+        self.assertEqual(self.request("/index.css?v=1")[2], b"body {}")
+        self.assertEqual(self.request("/blog/")[2], b"<h1>Blog</h1>")
+        self.assertEqual(self.request("/missing.html")[0], 404)
+        self.assertEqual(self.request("/.ssg-manifest.json")[0], 404)
+
+        status, headers, _ = self.request("/blog")
+        self.assertEqual(status, 301)
+        self.assertEqual(headers["Location"], "/blog/")
+
+    def test_head(self):
+        status, headers, body = self.request("/index.css", method="HEAD")
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["Content-Length"], "7")
+        self.assertEqual(body, b"")
+
+    def test_conditional_requests(self):
+        _, headers, _ = self.request("/index.css")
+        self.assertEqual(self.request("/index.css", headers={"If-None-Match": headers["ETag"]})[0], 304)
+        self.assertEqual(self.request("/index.css", headers={"If-None-Match": f'"other", W/{headers["ETag"]}'})[0], 304)
+        self.assertEqual(self.request("/index.css", headers={"If-None-Match": '"other"'})[0], 200)
+        self.assertEqual(self.request("/index.css", headers={"If-Modified-Since": headers["Last-Modified"]})[0], 304)
+        self.assertEqual(self.request("/index.css", headers={"If-Modified-Since": "Thu, 01 Jan 1970 00:00:00 GMT"})[0], 200)
+        self.assertEqual(self.request("/index.css", headers={"If-Modified-Since": "garbage"})[0], 200)
+        # If-None-Match wins over If-Modified-Since
+        self.assertEqual(self.request("/index.css", headers={"If-None-Match": '"other"', "If-Modified-Since": headers["Last-Modified"]})[0], 200)
+
+    def test_etag_changes_with_content(self):
+        etag = self.request("/index.css")[1]["ETag"]
+        self.write("index.css", "p {}")
+        self.store.sync()
+        status, headers, body = self.request("/index.css", headers={"If-None-Match": etag})
+        self.assertEqual(status, 200)
+        self.assertNotEqual(headers["ETag"], etag)
+        self.assertEqual(body, b"p {}")
+
+    def test_choose_encoding(self):
+        available = ["gzip", "deflate"]
+        self.assertEqual(choose_encoding(None, available), None)
+        self.assertEqual(choose_encoding("gzip, deflate, br", available), "gzip")
+        self.assertEqual(choose_encoding("deflate", available), "deflate")
+        self.assertEqual(choose_encoding("gzip;q=0.5, deflate", available), "deflate")
+        self.assertEqual(choose_encoding("gzip;q=0, *", available), "deflate")
+        self.assertEqual(choose_encoding("br", available), None)
+        self.assertEqual(choose_encoding("gzip;q=0.5, identity", available), None)
+
+    def test_precompressed_variants(self):
+        page = "<p>" + "text " * 100 + "</p>"
+        self.write("page.html", page)
+        compress_file(self.path("page.html"), ["gzip"])
+        self.write_manifest({"page.html": ["gzip"]})
+        self.assertEqual(self.store.sync(), 1)
+        self.assertNotIn("/page.html.gz", self.store.entries)
+
+        status, headers, body = self.request("/page.html", headers={"Accept-Encoding": "gzip, deflate"})
+        self.assertEqual(headers["Content-Encoding"], "gzip")
+        self.assertEqual(headers["Vary"], "Accept-Encoding")
+        self.assertEqual(gzip.decompress(body).decode(), page)
+        gzip_etag = headers["ETag"]
+
+        status, headers, body = self.request("/page.html")
+        self.assertNotIn("Content-Encoding", headers)
+        self.assertEqual(headers["Vary"], "Accept-Encoding")
+        self.assertEqual(body.decode(), page)
+        self.assertNotEqual(headers["ETag"], gzip_etag)
+
+        status, headers, _ = self.request("/page.html", headers={"Accept-Encoding": "gzip", "If-None-Match": gzip_etag})
+        self.assertEqual(status, 304)
+        self.assertEqual(self.request("/page.html", headers={"If-None-Match": gzip_etag})[0], 200)
+
+    def test_stale_variant_is_ignored(self):
+        self.write("page.html", "<p>" + "old " * 100 + "</p>")
+        compress_file(self.path("page.html"), ["gzip"])
+        self.write_manifest({"page.html": ["gzip"]})
+        self.write("page.html", "<p>new</p>")
+        self.store.sync()
+        status, headers, body = self.request("/page.html", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(body, b"<p>new</p>")
+        self.assertNotIn("Vary", headers)
+
+    def test_unrelated_archive_is_served(self):
+        self.write("data.tar.gz", "archive")
+        self.store.sync()
+        self.assertEqual(self.request("/data.tar.gz")[2], b"archive")
+
+    def test_static_file_with_sibling_name_is_served(self):
+        notes = "notes " * 100
+        self.write("notes.txt", notes)
+        compress_file(self.path("notes.txt"), ["gzip"]) # Shipped as a static file, not written by the build
+        self.write_manifest({"notes.txt": []}, static=["notes.txt", "notes.txt.gz"])
+        self.store.sync()
+        self.assertEqual(gzip.decompress(self.request("/notes.txt.gz")[2]).decode(), notes)
+        status, headers, body = self.request("/notes.txt", headers={"Accept-Encoding": "gzip"})
+        self.assertNotIn("Content-Encoding", headers)
+        self.assertEqual(body.decode(), notes)
+
+        # Without a manifest listing it, no sibling is taken for a variant
+        self.write("page.html", "<p>" + "text " * 100 + "</p>")
+        compress_file(self.path("page.html"), ["gzip"])
+        self.store.sync()
+        self.assertIn("/page.html.gz", self.store.entries)
+
+    def test_keep_alive(self):
+        connection = http.client.HTTPConnection("localhost", self.server.server_address[1], timeout=10)
+        try:
+            for _ in range(3):
+                connection.request("GET", "/index.css")
+                self.assertEqual(connection.getresponse().read(), b"body {}")
+        finally:
+            connection.close()
+
+    def test_keep_alive_latency(self):
+        # A second request on the same connection must not wait on the client's delayed ACK
+        self.write("page.html", "<p>text</p>" * 1000)
+        self.store.sync()
+        connection = http.client.HTTPConnection("localhost", self.server.server_address[1], timeout=10)
+        try:
+            times = []
+            for _ in range(5):
+                start = time.perf_counter()
+                connection.request("GET", "/page.html")
+                connection.getresponse().read()
+                times.append(time.perf_counter() - start)
+        finally:
+            connection.close()
+        self.assertLess(sorted(times[1:])[1], 0.02) # The stall is about 40 ms, a request without it well under 1 ms
+
+    def test_concurrent_requests(self):
+        with ThreadPoolExecutor(max_workers=50) as executor:
+            results = list(executor.map(lambda i: self.request("/index.css" if i % 2 else "/"), range(300)))
+        self.assertTrue(all(status == 200 for status, _, _ in results))
+
+
+if __name__ == "__main__":
+    unittest.main()
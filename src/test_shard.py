@@ -0,0 +1,129 @@
+import os
+import unittest
+from build import merge_shards
+from manifest import MANIFEST_NAME, load_manifest
+from shard import parse_shard, shard_of, in_shard
+from site_test_case import SiteTestCase
+
+TEMPLATE = "<title>{{ Title }}</title>{{ Content }}"
+
+class TestShard(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("template.html", TEMPLATE)
+        for i in range(20):
+            self.write(f"content/section{i % 3}/page{i}.md", f"# Page {i}\n\n" + "Some text. " * 30)
+            self.write(f"static/assets/file{i}.css", f"p {{ margin: {i}px; }}" * 20)
+
+    def build_shards(self, count, **kwargs):
+        dirs = []
+        for index in range(1, count + 1):
+            self.build(f"shard{index}", shard=(index, count), **kwargs)
+            dirs.append(self.path(f"shard{index}"))
+        return dirs
+
+    def tree(self, directory):
+        files = {}
+        for root, dirs, names in os.walk(directory):
+            for name in names:
+                path = os.path.join(root, name)
+                if name != MANIFEST_NAME:
+                    with open(path, "rb") as f:
+                        files[os.path.relpath(path, directory)] = f.read()
+        return files
+
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/4"), (2, 4))
+        for text in ("0/4", "5/4", "1/0", "2", "a/b", "1/2/3"):
+            with self.assertRaises(ValueError):
+                parse_shard(text)
+
+    def test_shard_of(self):
+        paths = [f"dir/page{i}.md" for i in range(1000)]
+        shards = [shard_of(path, 4) for path in paths]
+        self.assertEqual(shards, [shard_of(path, 4) for path in paths]) # Deterministic
+        self.assertEqual(set(shards), {1, 2, 3, 4})
+        self.assertGreater(min(shards.count(index) for index in range(1, 5)), 200) # Roughly even
+        self.assertEqual(shard_of(os.path.join("dir", "page1.md"), 4), shard_of("dir/page1.md", 4))
+        self.assertTrue(in_shard("anything", None))
+
+    def test_shards_merge_into_full_build(self):
+        full_manifest = self.build("full", compress=("gzip",))
+        dirs = self.build_shards(3, compress=("gzip",))
+        shard_trees = [self.tree(directory) for directory in dirs]
+        self.assertTrue(all(shard_trees)) # Every shard got some of the work
+
+        manifest = merge_shards(dirs, self.path("public"))
+        self.assertEqual(self.tree(self.path("public")), self.tree(self.path("full")))
+        for section in ("pages", "static", "template", "parser"):
+            self.assertEqual(manifest[section], full_manifest[section])
+        # Compressed records hold the outputs' own modification times, which differ between any two builds
+        compressed = lambda records: {rel_path: (record["hash"], record["encodings"]) for rel_path, record in records.items()}
+        self.assertEqual(compressed(manifest["compressed"]), compressed(full_manifest["compressed"]))
+        self.assertIsNone(manifest["shard"])
+        self.assertEqual(load_manifest(self.path("public", MANIFEST_NAME)), manifest)
+
+        # The merged site builds on incrementally like an unsharded one
+        self.write("content/section0/page0.md", "# Changed")
+        self.build("public")
+        self.assertIn("<h1>Changed</h1>", self.tree(self.path("public"))[os.path.join("section0", "page0.html")].decode())
+
+    def test_fingerprinted_shards_merge_into_full_build(self):
+        self.write("template.html", '<link href="/assets/file0.css">' + TEMPLATE)
+        full_manifest = self.build("full", fingerprint=True)
+        dirs = self.build_shards(3, fingerprint=True)
+        manifest = merge_shards(dirs, self.path("public"))
+        self.assertEqual(self.tree(self.path("public")), self.tree(self.path("full")))
+        paths = lambda records: {rel_path: record["path"] for rel_path, record in records.items()}
+        self.assertEqual(paths(manifest["assets"]), paths(full_manifest["assets"]))
+        # Every shard links to the copy, whichever shard wrote it
+        css = full_manifest["assets"][os.path.join("assets", "file0.css")]["path"]
+        for directory in dirs:
+            for rel_path, data in self.tree(directory).items():
+                if rel_path.endswith(".html"):
+                    self.assertIn(f'href="/{css.replace(os.sep, "/")}"', data.decode())
+
+    def test_incremental_shard_build(self):
+        self.build_shards(2)
+        self.write("content/new.md", "# New")
+        index = shard_of("new.md", 2)
+        manifest = self.build(f"shard{index}", shard=(index, 2))
+        self.assertIn("new.md", manifest["pages"])
+        self.assertTrue(os.path.exists(self.path(f"shard{index}", "new.html")))
+        self.assertFalse(os.path.exists(self.path(f"shard{3 - index}", "new.html")))
+
+    def test_merge_detects_missing_and_duplicate_shards(self):
+        dirs = self.build_shards(3)
+        with self.assertRaisesRegex(ValueError, "shard 3/3 is missing"):
+            merge_shards(dirs[:2], self.path("public"))
+        with self.assertRaisesRegex(ValueError, "shard 1/3 is given 2 times"):
+            merge_shards(dirs + dirs[:1], self.path("public"))
+        self.build("other", shard=(1, 2))
+        with self.assertRaisesRegex(ValueError, "splits into 2, 3 shards"):
+            merge_shards(dirs + [self.path("other")], self.path("public"))
+        self.assertFalse(os.path.exists(self.path("public")))
+
+    def test_merge_detects_conflicting_outputs(self):
+        dirs = self.build_shards(2)
+        self.write("shard2/assets/file0.css", "stray")
+        self.write("shard1/assets/file0.css", "stray") # Whichever shard owns it, the other now has it too
+        with self.assertRaisesRegex(ValueError, "output assets/file0.css is in both"):
+            merge_shards(dirs, self.path("public"))
+
+    def test_merge_detects_different_templates(self):
+        self.build("shard1", shard=(1, 2))
+        self.write("template.html", "<h1>{{ Title }}</h1>{{ Content }}")
+        self.build("shard2", shard=(2, 2))
+        with self.assertRaisesRegex(ValueError, "different template"):
+            merge_shards([self.path("shard1"), self.path("shard2")], self.path("public"))
+
+    def test_merge_needs_shard_manifests(self):
+        self.build("full")
+        with self.assertRaisesRegex(ValueError, "not built as a shard"):
+            merge_shards([self.path("full")], self.path("public"))
+        with self.assertRaisesRegex(ValueError, "no build manifest"):
+            merge_shards([self.path("missing")], self.path("public"))
+
+
+if __name__ == "__main__":
+    unittest.main()
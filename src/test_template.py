@@ -0,0 +1,102 @@
+import io
+import unittest
+from template import Template, compile_template, load_template, rewrite_urls
+from site_test_case import SiteTestCase
+
+class TestTemplate(unittest.TestCase):
+    def test_compile(self):
+        template = Template("<title>{{ Title }}</title><body>{{Content}}</body>")
+        self.assertEqual(template.chunks, ["<title>", "</title><body>", "</body>"])
+        self.assertEqual(template.slots, ["Title", "Content"])
+
+    def test_compile_without_slots(self):
+        template = Template("<p>static</p>")
+        self.assertEqual(template.chunks, ["<p>static</p>"])
+        self.assertEqual(template.slots, [])
+        self.assertEqual(template.render({"Title": "x"}), "<p>static</p>")
+
+    def test_render(self):
+        template = Template("{{ Title }}|{{ Content }}|{{ Title }}")
+        self.assertEqual(template.render({"Title": "a", "Content": "b"}), "a|b|a")
+
+    def test_missing_value_keeps_placeholder(self):
+        template = Template("<p>{{ Title }} {{  Other }}</p>")
+        self.assertEqual(template.render({"Title": "a"}), "<p>a {{  Other }}</p>")
+
+    def test_write_with_callable(self):
+        template = Template("<body>{{ Content }}</body>")
+        fp = io.StringIO()
+        template.write(fp, {"Content": lambda out: out.write("<p>streamed</p>")})
+        self.assertEqual(fp.getvalue(), "<body><p>streamed</p></body>")
+
+    def test_rewrite_urls(self):
+        template = Template('<link href="/index.css" rel="stylesheet"><script src=\'/app.js\'></script><a href="/about">{{ Title }}</a>')
+        urls = {"/index.css": "/index.3f9a1c2b.css", "/app.js": "/app.0d1e2f3a.js"}
+        rewritten = rewrite_urls(template, urls)
+        self.assertEqual(rewritten.render({"Title": "x"}), '<link href="/index.3f9a1c2b.css" rel="stylesheet"><script src=\'/app.0d1e2f3a.js\'></script><a href="/about">x</a>')
+        self.assertNotEqual(rewritten.digest(), template.digest())
+        self.assertIs(rewrite_urls(template, {"/other.css": "/other.1a2b3c4d.css"}), template)
+        self.assertIs(rewrite_urls(template, {}), template)
+
+    def test_compile_template_is_cached(self):
+        source = "<h1>{{ Title }}</h1>"
+        self.assertIs(compile_template(source), compile_template(source))
+
+
+class TestLoadTemplate(SiteTestCase):
+    def test_flat_template(self):
+        path = self.write("page.html", "<h1>{{ Title }}</h1>")
+        template = load_template(path)
+        self.assertEqual(template.source, "<h1>{{ Title }}</h1>")
+        self.assertEqual(list(template.dependencies), [path])
+
+    def test_include(self):
+        self.write("partials/nav.html", "<nav>{% include \"links.html\" %}</nav>")
+        self.write("partials/links.html", "<a href=\"/\">Home</a>")
+        path = self.write("page.html", "{% include \"partials/nav.html\" %}{{ Content }}")
+        template = load_template(path)
+        self.assertEqual(template.render({"Content": "x"}), "<nav><a href=\"/\">Home</a></nav>x")
+        self.assertEqual(len(template.dependencies), 3)
+
+    def test_extends(self):
+        self.write("base.html", "<title>{% block title %}Site{% endblock %}</title><main>{% block main %}{% endblock %}</main><footer>{% include \"footer.html\" %}</footer>")
+        self.write("footer.html", "(c)")
+        path = self.write("page.html", "{% extends \"base.html\" %}\nignored{% block main %}{{ Content }}{% endblock %}")
+        self.assertEqual(load_template(path).render({"Content": "x"}), "<title>Site</title><main>x</main><footer>(c)</footer>")
+
+    def test_extends_chain(self):
+        self.write("base.html", "[{% block a %}base a{% endblock %}|{% block b %}base b{% endblock %}]")
+        self.write("middle.html", "{% extends \"base.html\" %}{% block a %}middle a{% endblock %}{% block b %}middle b{% endblock %}")
+        path = self.write("page.html", "{% extends \"middle.html\" %}{% block b %}page b{% endblock %}")
+        self.assertEqual(load_template(path).source, "[middle a|page b]")
+
+    def test_cycle(self):
+        self.write("a.html", "{% include \"b.html\" %}")
+        path = self.write("b.html", "{% include \"a.html\" %}")
+        with self.assertRaises(ValueError):
+            load_template(path)
+
+    def test_missing_include(self):
+        path = self.write("page.html", "{% include \"missing.html\" %}")
+        with self.assertRaises(FileNotFoundError):
+            load_template(path)
+
+    def test_cache_reused_until_a_dependency_changes(self):
+        self.write("footer.html", "(c)")
+        self.write("unrelated.html", "x")
+        path = self.write("page.html", "{{ Content }}{% include \"footer.html\" %}")
+        template = load_template(path)
+        self.assertIs(load_template(path), template)
+
+        self.write("unrelated.html", "y")
+        self.assertIs(load_template(path), template)
+
+        self.write("footer.html", "(c) 2026")
+        reloaded = load_template(path)
+        self.assertIsNot(reloaded, template)
+        self.assertEqual(reloaded.render({"Content": ""}), "(c) 2026")
+        self.assertNotEqual(reloaded.digest(), template.digest())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -46,5 +46,11 @@ class TestTextNode(unittest.TestCase):
         expected_repr = "TextNode(This is a text node, bold, None)"
         self.assertEqual(result, expected_repr)
 
+    def test_no_instance_dict(self):
+        node = TextNode("This is a text node", TextType.BOLD)
+        self.assertFalse(hasattr(node, "__dict__"))
+        with self.assertRaises(AttributeError):
+            node.extra = "not allowed"
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -72,6 +72,18 @@ class TestHTMLNode(unittest.TestCase):
         #test HTML output
         assert html_node.to_html() == '<img src="www.virus.com/totally_not_a_virus.png" alt="Click here to win">'
 
+    def test_text_node_to_html_node_asset_urls(self):
+        urls = {"/images/logo.png": "/images/logo.3f9a1c2b.png"}
+        with using_asset_urls(urls):
+            image = text_node_to_html_node(TextNode("Logo", TextType.IMAGE, "/images/logo.png"))
+            link = text_node_to_html_node(TextNode("Logo", TextType.LINK, "/images/logo.png"))
+            other = text_node_to_html_node(TextNode("Home", TextType.LINK, "/index.html"))
+        assert image.props["src"] == "/images/logo.3f9a1c2b.png"
+        assert link.props["href"] == "/images/logo.3f9a1c2b.png"
+        assert other.props["href"] == "/index.html"
+        #the map only applies inside the with block
+        assert text_node_to_html_node(TextNode("Logo", TextType.IMAGE, "/images/logo.png")).props["src"] == "/images/logo.png"
+
     def test_text_node_to_html_node_invalid_type(self):
         text = "Hello World"
         text_node = TextNode(text, "not_a_valid_type")
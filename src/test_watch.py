@@ -0,0 +1,160 @@
+import os
+import time
+import threading
+import http.client
+import unittest
+import urllib.request
+from unittest import mock
+import block_cache
+from serve import SiteStore, start_server
+from site_test_case import SiteTestCase
+from watch import snapshot, changed_paths, TreeScanner, LiveReload, LiveReloadHandler, inject_reload_script, SiteWatcher, RELOAD_SCRIPT, RELOAD_PATH
+
+TEMPLATE = "<title>{{ Title }}</title><body>{{ Content }}</body>"
+
+class TestWatch(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("template.html", TEMPLATE)
+        self.write("static/index.css", "body {}")
+        self.write("content/index.md", "# Home")
+        self.write("content/blog/post.md", "# Post")
+        self.store = SiteStore(self.path("public"), transform_html=inject_reload_script)
+        self.watcher = SiteWatcher(self.path("static"), self.path("content"), self.path("template.html"), self.path("public"), LiveReload(), self.store, workers=1)
+
+    def test_snapshot(self):
+        files = snapshot([self.path("content"), self.path("template.html"), self.path("missing")])
+        self.assertEqual(sorted(files), [self.path("content", "blog", "post.md"), self.path("content", "index.md"), self.path("template.html")])
+
+    def test_changed_paths(self):
+        old = {"a": (1, 1), "b": (1, 1), "c": (1, 1)}
+        new = {"a": (1, 1), "b": (2, 1), "d": (1, 1)}
+        self.assertEqual(changed_paths(old, new), {"b", "c", "d"})
+
+    def test_tree_scanner(self):
+        scanner = TreeScanner()
+        paths = [self.path("content"), self.path("template.html")]
+        self.assertEqual(scanner.scan(paths), set())
+        self.assertEqual(scanner.files, snapshot(paths))
+
+        self.write("content/index.md", "# Welcome") # In place, which leaves the directory alone
+        self.write("content/about.md", "# About")
+        self.write("content/docs/guide/start.md", "# Start")
+        self.write("template.html", "{{ Content }}")
+        self.assertEqual(scanner.scan(paths), {self.path("content", "index.md"), self.path("content", "about.md"), self.path("content", "docs", "guide", "start.md"), self.path("template.html")})
+        self.assertEqual(scanner.scan(paths), set())
+
+        os.remove(self.path("content", "blog", "post.md"))
+        os.rmdir(self.path("content", "blog"))
+        self.assertEqual(scanner.scan(paths), {self.path("content", "blog", "post.md")})
+        self.assertEqual(scanner.files, snapshot(paths))
+
+    def test_inject_reload_script(self):
+        self.assertEqual(inject_reload_script(b"<body>x</body>"), b"<body>x" + RELOAD_SCRIPT.encode() + b"</body>")
+        self.assertEqual(inject_reload_script(b"x"), b"x" + RELOAD_SCRIPT.encode())
+
+    def test_live_reload_wait(self):
+        reload = LiveReload()
+        self.assertEqual(reload.wait(0, timeout=0), 0)
+        threading.Timer(0.01, reload.notify).start()
+        self.assertEqual(reload.wait(0, timeout=5), 1)
+
+    def test_poll_rebuilds_changed_page(self):
+        self.watcher.start()
+        self.assertEqual(self.read("public", "index.html"), "<title>Home</title><body><div><h1>Home</h1></div></body>")
+        self.assertEqual(self.watcher.poll(), set())
+
+        self.write("content/index.md", "# Welcome")
+        self.assertEqual(self.watcher.poll(), {self.path("content", "index.md")})
+        self.assertEqual(self.read("public", "index.html"), "<title>Welcome</title><body><div><h1>Welcome</h1></div></body>")
+        self.assertEqual(self.watcher.reload.generation, 2)
+
+    def test_poll_handles_template_static_and_deletes(self):
+        self.watcher.start()
+        self.write("template.html", "<h2>{{ Title }}</h2>{{ Content }}")
+        self.write("static/index.css", "p {}")
+        os.remove(self.path("content", "blog", "post.md"))
+        self.assertEqual(len(self.watcher.poll()), 3)
+        self.assertEqual(self.read("public", "index.html"), "<h2>Home</h2><div><h1>Home</h1></div>")
+        self.assertEqual(self.read("public", "index.css"), "p {}")
+        self.assertFalse(os.path.exists(self.path("public", "blog", "post.html")))
+
+    def test_poll_sees_included_partial(self):
+        self.write("template.html", "{% include \"footer.html\" %}{{ Content }}")
+        self.write("footer.html", "v1")
+        self.watcher.start()
+        self.write("footer.html", "v2")
+        self.assertEqual(self.watcher.poll(), {self.path("footer.html")})
+        self.assertEqual(self.read("public", "index.html"), "v2<div><h1>Home</h1></div>")
+
+    def test_rebuild_reuses_cached_blocks(self):
+        self.write("content/index.md", "# Home\n\nfirst\n\nsecond")
+        self.watcher.start()
+        self.write("content/index.md", "# Home\n\nfirst\n\nedited")
+        with mock.patch("block_cache.block_to_html_node", wraps=block_cache.block_to_html_node) as parse:
+            self.watcher.poll()
+        self.assertEqual(parse.call_count, 1)
+        self.assertEqual(self.read("public", "index.html"), "<title>Home</title><body><div><h1>Home</h1><p>first</p><p>edited</p></div></body>")
+
+    def test_failed_build_keeps_watching(self):
+        self.watcher.start()
+        self.write("content/index.md", "no title")
+        self.watcher.poll()
+        self.assertEqual(self.watcher.reload.generation, 1)
+        self.assertEqual(self.read("public", "index.html"), "<title>Home</title><body><div><h1>Home</h1></div></body>")
+
+    def test_store_follows_rebuilds(self):
+        self.watcher.start()
+        self.assertIn(RELOAD_SCRIPT.encode(), self.store.get("/").body)
+        self.write("content/index.md", "# Welcome")
+        self.watcher.poll()
+        self.assertIn(b"<h1>Welcome</h1>", self.store.get("/index.html").body)
+
+    def test_serve_with_live_reload(self):
+        self.watcher.start()
+        server = start_server(self.store, 0, LiveReloadHandler, reload=self.watcher.reload)
+        try:
+            url = f"http://localhost:{server.server_address[1]}"
+            with urllib.request.urlopen(url + "/") as response:
+                self.assertIn(RELOAD_SCRIPT, response.read().decode())
+            with urllib.request.urlopen(url + RELOAD_PATH, timeout=5) as response:
+                threading.Timer(0.05, self.watcher.reload.notify).start()
+                self.assertEqual(response.readline(), b"data: reload\n")
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_refresh_over_kept_alive_connection(self):
+        # Edit to refreshed page, with the page and stylesheet fetched again on the browser's open connection
+        self.watcher.start()
+        server = start_server(self.store, 0, LiveReloadHandler, reload=self.watcher.reload)
+        port = server.server_address[1]
+        connection = http.client.HTTPConnection("localhost", port, timeout=5)
+        events = http.client.HTTPConnection("localhost", port, timeout=5)
+        try:
+            for path in ("/", "/index.css"):
+                connection.request("GET", path)
+                connection.getresponse().read()
+            events.request("GET", RELOAD_PATH)
+            stream = events.getresponse()
+
+            start = time.perf_counter()
+            self.write("content/index.md", "# Edited")
+            self.watcher.poll()
+            self.assertEqual(stream.readline(), b"data: reload\n")
+            refresh_start = time.perf_counter()
+            for path in ("/", "/index.css"):
+                connection.request("GET", path)
+                body = connection.getresponse().read()
+            refresh = time.perf_counter() - refresh_start
+            self.assertIn(b"body {}", body)
+            self.assertLess(refresh, 0.05) # Two delayed-ACK stalls alone would take about 80 ms
+            self.assertLess(time.perf_counter() - start, 0.5)
+        finally:
+            connection.close()
+            events.close()
+            server.shutdown()
+            server.server_close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,118 @@
+import contextlib
+from collections import Counter
 from textnode import TextNode, TextType
 from leafnode import LeafNode
 
+_asset_urls = {} # URL of a static file -> URL of its fingerprinted copy, see using_asset_urls
+_page_text = None # PageText the converted nodes are recorded in, see collecting_page_text
+
+PENDING_TEXTS = 1024 # Node texts held before their words are counted, which bounds the memory of streamed pages
+LINK_PROPS = {TextType.LINK: "href", TextType.IMAGE: "src"} # The prop holding the URL of each linking node type
+
+class PageText:
+    """
+    The title, words and links of a page, recorded while the page is rendered, so the search index and the
+    link check do not have to parse the page a second time. The text of every node converted by
+    text_node_to_html_node is counted, which covers the text of links and the alt text of images but not
+    their URLs. The links are the href and src props of the nodes made for links and images, so with
+    fingerprinting they point at the fingerprinted copies, as on the rendered page.
+
+    Without a tokenize function the texts are kept as they are, which is how the block cache records the
+    text of a single block, see add_block.
+    """
+    __slots__ = ("title", "words", "links", "texts", "tokenize")
+
+    def __init__(self, tokenize):
+        self.title = "" # Set by record_title
+        self.words = Counter() # Word -> how often it appears on the page
+        self.links = set() # URLs the page links to
+        self.texts = [] # Node texts whose words are not counted yet
+        self.tokenize = tokenize
+
+    def add_node(self, text_node: TextNode, node: LeafNode):
+        self.texts.append(text_node.text)
+        if len(self.texts) >= PENDING_TEXTS and self.tokenize is not None:
+            self.count()
+        prop = LINK_PROPS.get(text_node.text_type)
+        if prop is not None:
+            self.links.add(node.props[prop])
+
+    def add_block(self, text: str, links):
+        """
+        Add the text and links of a block recorded earlier, such as a block whose HTML comes from a cache.
+
+        Args:
+            text (str): The texts of the block's nodes, joined with spaces
+            links: The URLs the block links to
+        """
+        self.texts.append(text)
+        if len(self.texts) >= PENDING_TEXTS and self.tokenize is not None:
+            self.count()
+        self.links.update(links)
+
+    def count(self) -> Counter:
+        """
+        Count the words of the texts added since the last call.
+
+        Returns:
+            Counter: How often each word appears in the texts added so far
+        """
+        if self.texts and self.tokenize is not None:
+            self.words.update(self.tokenize(" ".join(self.texts))) # One scan for many nodes, not one per node
+            self.texts.clear()
+        return self.words
+
+@contextlib.contextmanager
+def using_asset_urls(urls: dict):
+    """
+    Rewrite the link and image URLs of the nodes converted inside the with block. A URL that is a key of
+    urls, such as "/images/logo.png", is replaced by its value. Other URLs are kept as written.
+
+    Args:
+        urls (dict): The URL map, see fingerprint_assets. None or empty rewrites nothing.
+    """
+    global _asset_urls
+    previous = _asset_urls
+    _asset_urls = urls or {}
+    try:
+        yield
+    finally:
+        _asset_urls = previous
+
+@contextlib.contextmanager
+def collecting_page_text(tokenize):
+    """
+    Record the title, the node texts and the links of the page rendered inside the with block.
+
+    Args:
+        tokenize: A function splitting text into the words counted, such as search_index.tokenize, or None
+            to keep the texts
+
+    Yields:
+        PageText: The text of the page, with every word counted once the block ends
+    """
+    global _page_text
+    previous = _page_text
+    _page_text = page_text = PageText(tokenize)
+    try:
+        yield page_text
+    finally:
+        _page_text = previous
+    page_text.count()
+
+def current_page_text():
+    """
+    Get the PageText of the page being rendered, or None if its text is not being collected.
+    """
+    return _page_text
+
+def record_title(title: str):
+    """
+    Record the title of the page being rendered, if its text is being collected.
+    """
+    if _page_text is not None:
+        _page_text.title = title
+
 def text_node_to_html_node(text_node: TextNode):
     if not isinstance(text_node, TextNode):
         raise ValueError("argument must be an instance of TextNode")
@@ -15,12 +127,14 @@ def text_node_to_html_node(text_node: TextNode):
         case TextType.CODE:
             node = LeafNode("code", text_node.text, None)
         case TextType.LINK:
-            props = {"href": text_node.url}
+            props = {"href": _asset_urls.get(text_node.url, text_node.url)}
             node = LeafNode("a", text_node.text, props)
         case TextType.IMAGE:
-            props = {"src": text_node.url, "alt": text_node.text}
+            props = {"src": _asset_urls.get(text_node.url, text_node.url), "alt": text_node.text}
             node = LeafNode("img", "", props)
         case _:
             raise ValueError(f"unexpected TextType {text_node.text_type}")
 
+    if _page_text is not None:
+        _page_text.add_node(text_node, node)
     return node
\ No newline at end of file
@@ -0,0 +1,450 @@
+import os
+import time
+import threading
+from build import build_site
+from block_cache import BlockCache, BLOCK_CACHE_NAME
+from serve import SiteStore, SiteRequestHandler, start_server
+from template import load_template
+
+RELOAD_PATH = "/__livereload"
+RELOAD_SCRIPT = f'<script>new EventSource("{RELOAD_PATH}").onmessage = () => location.reload();</script>'
+SWEEP_FILES = 1000 # Files statted per scan to catch in-place edits, see TreeScanner
+HOT_FILES = 256 # Recently changed files statted on every scan
+RACY_NS = 2_000_000_000 # Directories modified this recently are listed again on every scan, as their mtime may not move for the next change
+
+def snapshot(paths) -> dict:
+    """
+    Record the size and modification time of every file under the given paths. Comparing two snapshots
+    finds the files that were added, changed or deleted in between, without needing inotify.
+
+    Args:
+        paths (list[str]): Files and directories to scan. Missing paths are skipped.
+
+    Returns:
+        dict: A mapping of file path to a (mtime_ns, size) tuple
+    """
+    files = {}
+    pending = []
+    for path in paths:
+        if os.path.isdir(path):
+            pending.append(path)
+        elif os.path.isfile(path):
+            stat = os.stat(path)
+            files[path] = (stat.st_mtime_ns, stat.st_size)
+
+    while pending:
+        try:
+            entries = os.scandir(pending.pop())
+        except FileNotFoundError:
+            continue # Deleted while scanning, the next snapshot catches up
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    else:
+                        stat = entry.stat()
+                        files[entry.path] = (stat.st_mtime_ns, stat.st_size)
+                except FileNotFoundError:
+                    continue
+    return files
+
+def changed_paths(old: dict, new: dict) -> set[str]:
+    """
+    Compare two snapshots.
+
+    Args:
+        old (dict): The earlier snapshot
+        new (dict): The later snapshot
+
+    Returns:
+        set[str]: The paths that were added, changed or deleted
+    """
+    changed = {path for path, record in new.items() if old.get(path) != record}
+    changed.update(path for path in old if path not in new)
+    return changed
+
+class TreeScanner:
+    """
+    Finds the files added, changed or deleted under a set of paths, like comparing two snapshots, without
+    statting every file on every scan.
+
+    Adding, deleting or renaming a file changes the modification time of its directory, which covers
+    editors that save by writing a new file and renaming it over the old one. Each scan stats every
+    directory and lists again only those whose modification time moved. Files written in place leave
+    their directory alone, so each scan also stats the files that changed recently, and the next
+    SWEEP_FILES files of a sweep that goes round all of them. A first in-place edit to a file is seen
+    within len(files) / SWEEP_FILES scans, later ones on the next scan.
+    """
+    def __init__(self):
+        self.paths = None # The paths of the last scan
+        self.files = {} # File path -> (mtime_ns, size)
+        self.dirs = {} # Directory path -> (mtime_ns, or None to list it again, the file and subdirectory paths in it, its subdirectories)
+        self.roots = [] # Watched paths that are not directories, statted on every scan
+        self.hot = {} # Recently changed file paths, oldest first
+        self.sweep = [] # File paths in sweep order
+        self.cursor = 0 # Position of the sweep
+
+    def scan(self, paths: list[str]) -> set[str]:
+        """
+        Bring the snapshot up to date. A scan with different paths than the last one, such as the first,
+        takes a full snapshot.
+
+        Args:
+            paths (list[str]): Files and directories to scan. Missing paths are skipped.
+
+        Returns:
+            set[str]: The paths that were added, changed or deleted since the last scan, empty for the first
+        """
+        if paths != self.paths:
+            first = self.paths is None
+            old = self.files
+            self.paths = list(paths)
+            self.files = {}
+            self.dirs = {}
+            self.roots = []
+            for path in paths:
+                if os.path.isdir(path):
+                    self.list_tree(path)
+                else:
+                    self.roots.append(path)
+                    self.stat_file(path)
+            self.sweep = list(self.files)
+            self.cursor = 0
+            return set() if first else changed_paths(old, self.files)
+
+        changed = set()
+        for path, (mtime_ns, _, _) in list(self.dirs.items()):
+            if path not in self.dirs:
+                continue # Removed with its parent earlier in this scan
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                changed.update(self.forget_tree(path))
+                continue
+            if mtime_ns != stat.st_mtime_ns:
+                changed.update(self.relist(path))
+
+        checked = self.roots + list(self.hot)
+        if self.cursor >= len(self.sweep):
+            self.sweep = list(self.files) # Picks up the files added since the sweep started
+            self.cursor = 0
+        checked += self.sweep[self.cursor:self.cursor + SWEEP_FILES]
+        self.cursor += SWEEP_FILES
+        for path in checked:
+            if path in changed:
+                continue
+            record = self.files.get(path)
+            if record is None and path not in self.roots:
+                continue # Deleted, which its directory showed
+            if self.stat_file(path) != record:
+                changed.add(path)
+
+        for path in changed:
+            self.hot.pop(path, None)
+            self.hot[path] = None
+        while len(self.hot) > HOT_FILES:
+            del self.hot[next(iter(self.hot))]
+        return changed
+
+    def stat_file(self, path: str):
+        """
+        Record the size and modification time of a file, or forget it if it is missing.
+
+        Returns:
+            tuple: The (mtime_ns, size) record, or None
+        """
+        try:
+            stat = os.stat(path)
+        except (FileNotFoundError, NotADirectoryError):
+            self.files.pop(path, None)
+            return None
+        record = self.files[path] = (stat.st_mtime_ns, stat.st_size)
+        return record
+
+    def list_dir(self, path: str) -> list[str]:
+        """
+        List one directory, recording its files and its modification time.
+
+        Returns:
+            list[str]: The paths of its subdirectories
+        """
+        try:
+            stat = os.stat(path) # Before listing, so a change made during the listing is seen next time
+            entries = os.scandir(path)
+        except (FileNotFoundError, NotADirectoryError):
+            return []
+        mtime_ns = stat.st_mtime_ns
+        if time.time_ns() - mtime_ns < RACY_NS:
+            mtime_ns = None # Another change within the same clock tick would not move the mtime
+        names = []
+        subdirs = []
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    else:
+                        entry_stat = entry.stat()
+                        self.files[entry.path] = (entry_stat.st_mtime_ns, entry_stat.st_size)
+                        names.append(entry.path)
+                except FileNotFoundError:
+                    continue
+        self.dirs[path] = (mtime_ns, names, subdirs)
+        return subdirs
+
+    def list_tree(self, path: str) -> set[str]:
+        """
+        List a directory and everything under it.
+
+        Returns:
+            set[str]: The paths of the files found
+        """
+        found = set()
+        pending = [path]
+        while pending:
+            directory = pending.pop()
+            pending.extend(self.list_dir(directory))
+            found.update(self.dirs.get(directory, (None, [], []))[1])
+        return found
+
+    def forget_tree(self, path: str) -> set[str]:
+        """
+        Forget a directory and everything under it.
+
+        Returns:
+            set[str]: The paths of the files it held
+        """
+        removed = set()
+        pending = [path]
+        while pending:
+            _, names, subdirs = self.dirs.pop(pending.pop(), (None, [], []))
+            pending.extend(subdirs)
+            for name in names:
+                if self.files.pop(name, None) is not None:
+                    removed.add(name)
+        return removed
+
+    def relist(self, path: str) -> set[str]:
+        """
+        List a directory whose entries changed, and its new subdirectories.
+
+        Returns:
+            set[str]: The paths of the files added, changed or deleted in it
+        """
+        _, old_names, old_subdirs = self.dirs[path]
+        old = {name: self.files.pop(name) for name in old_names if name in self.files}
+        subdirs = self.list_dir(path)
+        new = {name: self.files[name] for name in self.dirs.get(path, (None, [], []))[1]}
+        changed = changed_paths(old, new)
+        for subdir in old_subdirs:
+            if subdir not in subdirs:
+                changed.update(self.forget_tree(subdir))
+        for subdir in subdirs:
+            if subdir not in self.dirs:
+                changed.update(self.list_tree(subdir))
+        return changed
+
+class LiveReload:
+    """
+    Tells open browsers that the site was rebuilt. Every rebuild bumps a generation counter, and each
+    browser connection waits for the counter to move past the generation it last saw.
+    """
+    def __init__(self):
+        self.generation = 0
+        self.condition = threading.Condition()
+
+    def notify(self):
+        """
+        Wake every waiting connection.
+        """
+        with self.condition:
+            self.generation += 1
+            self.condition.notify_all()
+
+    def wait(self, generation: int, timeout: float=None) -> int:
+        """
+        Wait for a rebuild after the given generation.
+
+        Args:
+            generation (int): The generation the caller last saw
+            timeout (float): The longest to wait in seconds, or None to wait forever
+
+        Returns:
+            int: The current generation, which equals the given one if the wait timed out
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: self.generation != generation, timeout)
+            return self.generation
+
+def inject_reload_script(html: bytes) -> bytes:
+    """
+    Add the live reload script to a page, just before its closing body tag.
+
+    Args:
+        html (bytes): The page
+
+    Returns:
+        bytes: The page with the script
+    """
+    script = RELOAD_SCRIPT.encode()
+    index = html.rfind(b"</body>")
+    if index == -1:
+        return html + script
+    return html[:index] + script + html[index:]
+
+class LiveReloadHandler(SiteRequestHandler):
+    """
+    Serves the site like SiteRequestHandler, plus an event stream at RELOAD_PATH that sends a message
+    after every rebuild. Nagle's algorithm stays off as in SiteRequestHandler, so the pages and assets a
+    browser fetches again after a reload, over its kept-alive connections, are sent without delay.
+    """
+    def __init__(self, *args, reload=None, **kwargs):
+        self.reload = reload
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        if self.path == RELOAD_PATH:
+            self.send_events()
+        else:
+            super().do_GET()
+
+    def send_events(self):
+        """
+        Stream a server-sent event after every rebuild, until the browser disconnects.
+        """
+        self.close_connection = True # The stream has no length, so it ends with the connection
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        generation = self.reload.generation
+        try:
+            while True:
+                latest = self.reload.wait(generation, timeout=15)
+                if latest == generation:
+                    self.wfile.write(b": keepalive\n\n") # Fails once the browser is gone
+                else:
+                    generation = latest
+                    self.wfile.write(b"data: reload\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+class SiteWatcher:
+    """
+    Rebuilds the site whenever a file under the static directory, the content directory or the template
+    chain changes. Each rebuild is an incremental build_site call, so the build manifest limits the work to the
+    pages and static files that changed, or every page when the template changed. After a build the
+    store, if any, is synced with the public directory before open browsers are told to reload.
+
+    The watcher keeps a BlockCache across builds, so an edit to one block of a long page only parses and
+    renders that block again, and a TreeScanner, so a poll of a large site does not stat every file.
+    """
+    def __init__(self, static_dir, content_dir, template_path, public_dir, reload=None, store=None, **build_options):
+        self.static_dir = static_dir
+        self.content_dir = content_dir
+        self.template_path = template_path
+        self.public_dir = public_dir
+        self.reload = reload
+        self.store = store
+        self.build_options = build_options
+        self.block_cache = BlockCache()
+        self.scanner = TreeScanner()
+
+    def watched_paths(self) -> list[str]:
+        """
+        List the paths to watch: the static and content directories, and every file in the template's
+        extends and include chain.
+        """
+        try:
+            template_paths = list(load_template(self.template_path).dependencies)
+        except (OSError, ValueError):
+            template_paths = [os.path.dirname(os.path.abspath(self.template_path))] # Catches the missing partial being created
+        return [self.static_dir, self.content_dir] + template_paths
+
+    def build(self):
+        """
+        Build the site and tell open browsers to reload. A failed build is reported and the previous
+        output stays in place, so a typo does not stop the watcher.
+
+        Returns:
+            bool: True if the build succeeded
+        """
+        start = time.perf_counter()
+        try:
+            build_site(self.static_dir, self.content_dir, self.template_path, self.public_dir, block_cache=self.block_cache, **self.build_options)
+        except Exception as e:
+            print(f"Error: {e}")
+            return False
+        if self.store is not None:
+            self.store.sync()
+        print(f"Rebuilt in {(time.perf_counter() - start) * 1000:.0f} ms")
+        if self.reload is not None:
+            self.reload.notify()
+        return True
+
+    def start(self):
+        """
+        Take the first snapshot and build the site.
+        """
+        self.scanner.scan(self.watched_paths())
+        self.build()
+
+    def poll(self) -> set[str]:
+        """
+        Check the watched files once, and rebuild if any of them changed.
+
+        Returns:
+            set[str]: The paths that changed since the last poll
+        """
+        changed = self.scanner.scan(self.watched_paths()) # Before the build, so edits made during the build are seen next time
+        if changed:
+            self.build()
+        return changed
+
+    def run(self, interval: float=0.05):
+        """
+        Poll the watched files forever.
+
+        Args:
+            interval (float): The delay between polls in seconds
+        """
+        while True:
+            time.sleep(interval)
+            self.poll()
+
+def watch(static_dir, content_dir, template_path, public_dir, port=8888, interval=0.05, **build_options):
+    """
+    Build the site, serve it with live reload, and rebuild on every change until interrupted.
+
+    Args:
+        static_dir (str): The directory containing the static files.
+        content_dir (str): The directory containing the markdown files.
+        template_path (str): The path to the template file.
+        public_dir (str): The directory to build the site into.
+        port (int): The port to serve the site on.
+        interval (float): The delay between polls in seconds.
+        build_options: Passed on to build_site. With a cache_dir, the block cache is loaded from it at the
+            start and saved to it on exit, so the next session starts warm.
+    """
+    reload = LiveReload()
+    store = SiteStore(public_dir, transform_html=inject_reload_script)
+    watcher = SiteWatcher(static_dir, content_dir, template_path, public_dir, reload, store, **build_options)
+    cache_dir = build_options.get("cache_dir")
+    block_cache_path = os.path.join(cache_dir, BLOCK_CACHE_NAME) if cache_dir is not None else None
+    if block_cache_path is not None:
+        watcher.block_cache.load(block_cache_path)
+    watcher.start()
+
+    server = start_server(store, port, LiveReloadHandler, reload=reload)
+    print(f"Serving {public_dir} on http://localhost:{port}, watching for changes")
+    try:
+        watcher.run(interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        if block_cache_path is not None:
+            watcher.block_cache.save(block_cache_path)